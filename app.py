@@ -681,6 +681,14 @@ def main():
             with m4:
                 st.metric("Time", f"{budget.get('elapsed_seconds', 0):.1f}s")
 
+            # Coverage: how many Phase 1 candidates the budget paid for
+            task_result = result.get("result") or {}
+            counts = {**task_result.get("metadata", {}), **task_result.get("summary", {})}
+            for done, found in (("claims_analyzed", "claims_found"), ("subcalls", "candidates"), ("chunks_processed", "chunks_found")):
+                if found in counts:
+                    st.caption(f"Coverage: {counts[done]} of {counts[found]} candidates analyzed within budget")
+                    break
+
             st.markdown("---")
 
             # Results
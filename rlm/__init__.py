@@ -8,13 +8,36 @@ This package implements the RLM paradigm where:
 
 Core modules:
 - guards: Budget enforcement and limit tracking
+- tokens: Shared token estimator (calibrated heuristic or offline BPE)
 - context_access: Explicit context navigation functions
+- views: Zero-copy ContextView windows
 - subcalls: Clean interface for semantic LLM calls
 - runtime: Task execution harness
+- dryrun: Stubbed subcalls projecting a run's calls, cost and latency
+- pipeline: Scan feeding concurrent subcall workers with backpressure
+- planner: Budget knapsack choosing which candidate subcalls to make
+- severity: Severity, template rarity and recency scores for log windows
+- access_log: Compact, bounded context access audit log with sinks
+- indexes: Cached per-context indexes (line starts, token inverted index)
+- ranking: BM25 passage ranking (NumPy-accelerated when available)
+- structure: Heading parser and section tree for context_section
+- timeline: Log timestamp index for time-range slices and histograms
+- tabular: Column store and record filters for CSV / JSON-lines contexts
+- incremental: Append-only contexts whose indexes grow with the log
+- revisions: Diff-based reuse of subcall results across document versions
+- sidecar: Versioned, memory-mapped index files reused across runs
+- compressed: Block-indexed random access into gzip / zstd contexts
+- sharded_search: Parallel line-sharded regex search across processes
+- cache: Optional subcall response cache
+- daemon: Long-running job server with warm state
+- jobqueue: Durable SQLite job queue and worker pool
+- tracing: Timing spans with Chrome trace export
+- metrics: Prometheus-compatible runtime metrics
 """
 
 from .guards import GuardConfig, GuardState, BudgetExceededError
-from .context_access import context_head, context_tail, context_slice, context_search
+from .context_access import context_head, context_tail, context_slice, context_search, context_view
+from .views import ContextView
 from .subcalls import semantic_subcall
 from .runtime import run_task, finalize_result
 
@@ -26,6 +49,8 @@ __all__ = [
     "context_tail",
     "context_slice",
     "context_search",
+    "context_view",
+    "ContextView",
     "semantic_subcall",
     "run_task",
     "finalize_result",
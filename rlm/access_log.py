@@ -0,0 +1,276 @@
+"""
+RLM Context Access Log
+
+Audit trail of every context access made by a task.
+
+Records are compact __slots__ objects rather than dicts, and summary
+statistics are maintained incrementally, so summary() never rescans the
+log. For very long runs (e.g. chunking a multi-GB file) retention can be
+bounded:
+
+- max_records: keep only the most recent N records (ring buffer)
+- sample_every: keep every k-th record
+
+Retention only affects what is held in memory. When a sink is configured
+(JsonlSink, SqliteSink), every record is streamed to it, so the persisted
+audit trail is always complete.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Iterable, Protocol
+
+from .metrics import CONTEXT_CHARS_SCANNED_TOTAL, CONTEXT_OPERATIONS_TOTAL
+
+
+class AccessRecord:
+    """
+    A single context access.
+
+    Common fields are stored in slots; any other keyword arguments passed
+    to ContextAccessLog.record() are kept in `extra`.
+    """
+
+    __slots__ = (
+        "seq", "operation", "start", "end", "n", "context_length", "chars_accessed",
+        "pattern", "max_hits", "case_sensitive", "matches_found", "chunk_size", "overlap",
+        "extra",
+    )
+
+    # Field order used by to_dict(), matching the order operations pass them
+    _FIELDS = (
+        "n", "pattern", "max_hits", "case_sensitive", "start", "end",
+        "chunk_size", "overlap", "context_length", "matches_found", "chars_accessed",
+    )
+
+    def __init__(self, seq: int, operation: str, fields: dict[str, Any]):
+        self.seq = seq
+        self.operation = operation
+        for name in self._FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        self.extra = fields or None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the record as a plain dict (omitting unset fields)."""
+        entry: dict[str, Any] = {"operation": self.operation}
+        for name in self._FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                entry[name] = value
+        if self.extra:
+            entry.update(self.extra)
+        return entry
+
+
+class AccessLogSink(Protocol):
+    """Destination that receives every access record."""
+
+    def write(self, record: AccessRecord) -> None: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class JsonlSink:
+    """Append access records to a JSON-lines file."""
+
+    def __init__(self, path: str, buffer_records: int = 1000):
+        self.path = path
+        self.buffer_records = buffer_records
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending: list[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, record: AccessRecord) -> None:
+        line = json.dumps({"seq": record.seq, **record.to_dict()}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self.buffer_records:
+                self._drain()
+
+    def _drain(self) -> None:
+        if self._pending:
+            self._file.write("\n".join(self._pending) + "\n")
+            self._pending = []
+
+    def flush(self) -> None:
+        with self._lock:
+            self._drain()
+            self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class SqliteSink:
+    """Insert access records into a SQLite table (access_log)."""
+
+    _COLUMNS = ("seq", "operation") + AccessRecord._FIELDS + ("extra",)
+
+    def __init__(self, path: str, run_id: str = "", buffer_records: int = 1000):
+        self.path = path
+        self.run_id = run_id
+        self.buffer_records = buffer_records
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        columns = ", ".join(f"{name}" for name in self._COLUMNS)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS access_log (run_id TEXT, {columns})")
+        self._insert = (
+            f"INSERT INTO access_log (run_id, {columns}) "
+            f"VALUES ({', '.join('?' * (len(self._COLUMNS) + 1))})"
+        )
+        self._pending: list[tuple] = []
+        self._lock = threading.Lock()
+
+    def write(self, record: AccessRecord) -> None:
+        row = (self.run_id, record.seq, record.operation) + tuple(
+            getattr(record, name) for name in AccessRecord._FIELDS
+        ) + (json.dumps(record.extra, default=str) if record.extra else None,)
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.buffer_records:
+                self._drain()
+
+    def _drain(self) -> None:
+        if self._pending:
+            with self._conn:
+                self._conn.executemany(self._insert, self._pending)
+            self._pending = []
+
+    def flush(self) -> None:
+        with self._lock:
+            self._drain()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+class ContextAccessLog:
+    """
+    Logger for context access auditing.
+
+    Records every context access for debugging and compliance.
+    Each task run binds its own log (see new_access_log) so that
+    concurrent tasks keep separate audit trails.
+
+    Args:
+        max_records: Keep at most this many recent records in memory
+        sample_every: Keep only every k-th record in memory
+        sinks: Destinations that receive every record
+    """
+
+    def __init__(
+        self,
+        max_records: int | None = None,
+        sample_every: int = 1,
+        sinks: Iterable[AccessLogSink] = (),
+    ):
+        if max_records is not None and max_records < 0:
+            raise ValueError(f"max_records must be non-negative, got {max_records}")
+        if sample_every < 1:
+            raise ValueError(f"sample_every must be positive, got {sample_every}")
+        self.max_records = max_records
+        self.sample_every = sample_every
+        self.sinks = list(sinks)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._records: deque[AccessRecord] = deque(maxlen=self.max_records)
+        self._seq = 0
+        self._ops: dict[str, int] = {}
+        self._total_chars = 0
+
+    def record(self, operation: str, **kwargs) -> None:
+        """Record a context access operation."""
+        chars = kwargs.get("chars_accessed")
+        # Searches scan the whole context (unless answered from the token
+        # index); other operations scan what they extract. Either may
+        # report chars_scanned themselves
+        if operation == "search" and kwargs.get("strategy") != "index":
+            scanned = kwargs.get("chars_scanned", kwargs.get("context_length", 0))
+        else:
+            scanned = kwargs.get("chars_scanned", chars or 0)
+
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+            self._ops[operation] = self._ops.get(operation, 0) + 1
+            if chars is not None:
+                self._total_chars += chars
+            keep = seq % self.sample_every == 0
+            if keep or self.sinks:
+                entry = AccessRecord(seq, operation, kwargs)
+                if keep:
+                    self._records.append(entry)
+
+        for sink in self.sinks:
+            sink.write(entry)
+
+        CONTEXT_OPERATIONS_TOTAL.inc(operation=operation)
+        CONTEXT_CHARS_SCANNED_TOTAL.inc(scanned, operation=operation)
+
+    def get_log(self) -> list[dict]:
+        """Return the retained access records as dicts."""
+        with self._lock:
+            records = list(self._records)
+        return [record.to_dict() for record in records]
+
+    def records(self) -> list[AccessRecord]:
+        """Return the retained access records."""
+        with self._lock:
+            return list(self._records)
+
+    def __len__(self) -> int:
+        return self._seq
+
+    def clear(self) -> None:
+        """Clear the access log (call at task start)."""
+        with self._lock:
+            self._reset()
+
+    def flush(self) -> None:
+        """Flush all sinks."""
+        for sink in self.sinks:
+            sink.flush()
+
+    def summary(self) -> dict:
+        """Return summary statistics of context access."""
+        with self._lock:
+            summary = {
+                "total_operations": self._seq,
+                "operations_by_type": dict(self._ops),
+                "total_chars_accessed": self._total_chars,
+            }
+            if self.max_records is not None or self.sample_every > 1:
+                summary["records_retained"] = len(self._records)
+        return summary
+
+
+# Module-level default logger, used when no task has bound its own
+_logger = ContextAccessLog()
+_active_log: ContextVar[ContextAccessLog | None] = ContextVar("rlm_access_log", default=None)
+
+
+def get_access_log() -> ContextAccessLog:
+    """Get the context access logger for the current task."""
+    log = _active_log.get()
+    return _logger if log is None else log
+
+
+def bind_access_log(log: ContextAccessLog) -> ContextAccessLog:
+    """Bind an existing access log to the current task and return it."""
+    _active_log.set(log)
+    return log
+
+
+def new_access_log(**options: Any) -> ContextAccessLog:
+    """Bind a fresh access log (see ContextAccessLog for options) and return it."""
+    return bind_access_log(ContextAccessLog(**options))
@@ -0,0 +1,111 @@
+"""
+RLM Response Cache
+
+Optional in-memory cache of subcall responses, keyed by a hash of
+(model, prompt, context chunk). Subcalls run at temperature 0, so an
+identical request in a later task can reuse the earlier answer without
+spending budget.
+
+The cache is disabled by default and enabled explicitly by long-running
+processes (see rlm.daemon) via enable_response_cache().
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .metrics import CACHE_LOOKUPS_TOTAL
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of subcall responses.
+
+    Attributes:
+        max_entries: Maximum number of cached responses
+        hits: Number of lookups answered from the cache
+        misses: Number of lookups that missed
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, context_chunk: str) -> str:
+        """Return the cache key for a subcall request."""
+        h = hashlib.blake2b(digest_size=20)
+        for part in (model, prompt, context_chunk):
+            data = part.encode("utf-8", "surrogatepass")
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response for key, or None."""
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        CACHE_LOOKUPS_TOTAL.inc(result="miss" if response is None else "hit")
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached responses and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Process-wide cache, None while caching is disabled
+_response_cache: ResponseCache | None = None
+
+
+def enable_response_cache(max_entries: int = 10_000) -> ResponseCache:
+    """Enable the process-wide response cache and return it."""
+    global _response_cache
+    if _response_cache is None or _response_cache.max_entries != max_entries:
+        _response_cache = ResponseCache(max_entries)
+    return _response_cache
+
+
+def disable_response_cache() -> None:
+    """Disable the process-wide response cache."""
+    global _response_cache
+    _response_cache = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Get the process-wide response cache (None if disabled)."""
+    return _response_cache
@@ -0,0 +1,375 @@
+"""
+RLM Compressed Contexts
+
+Random access into gzip- or zstd-compressed files without decompressing
+them to disk.
+
+A CompressedContext stands in for the context string: offsets are byte
+offsets into the uncompressed data (as for a ContextView over bytes),
+slicing it returns decoded text, and context_head / context_tail /
+context_slice / context_search / plan_windows accept it directly.
+
+Random access uses a block index of checkpoints, built during the first
+sequential pass over the file and extended by any later pass that gets
+further:
+
+- gzip: a checkpoint every `span` uncompressed bytes holding the
+  compressed offset and a copy of the inflate state (about 40 KB, plus
+  up to one read of input it has not consumed yet), in the spirit of
+  zlib's zran example. Member starts of multi-member files (bgzip,
+  concatenated rotations) are checkpoints that hold no state.
+- zstd (requires the optional `zstandard` package): a checkpoint at every
+  frame start. Multi-frame files (seekable format, pzstd output) get
+  random access per frame; a single-frame file is read sequentially.
+
+A slice decompresses only from the checkpoint before it to its end; the
+last few spans between checkpoints are kept in a small LRU cache. Search
+streams from the checkpoint before its start position one piece at a
+time, so memory stays bounded whatever the file size. Checkpoints are
+in-memory only; they last as long as the context object (e.g. in the
+daemon).
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # zstandard is optional
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Uncompressed bytes between checkpoints
+DEFAULT_SPAN = 4 * 1024 * 1024
+
+# Compressed bytes read, and most uncompressed bytes produced, per step
+_READ_SIZE = 64 * 1024
+_PIECE_SIZE = 1024 * 1024
+
+# Longest match guaranteed to be found across a piece boundary
+DEFAULT_GUARD_CHARS = 4096
+
+# Characters kept before the search position for lookbehind and \b
+_LOOKBEHIND_CHARS = 256
+
+
+def detect_compression(path: str) -> str | None:
+    """Return "gzip" or "zstd" if the file starts with their magic number, else None."""
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(_GZIP_MAGIC):
+        return "gzip"
+    if magic == _ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """
+    A point decompression can resume from.
+
+    Attributes:
+        compressed: Offset in the compressed file to read on from
+        offset: Offset in the uncompressed data
+        lines: Newlines before `offset`
+        state: Copy of the decompressor, with any input it has not yet
+            consumed (None at a member / frame start)
+    """
+    compressed: int
+    offset: int
+    lines: int
+    state: Any = None
+
+
+class _ZstdFrame:
+    """zlib.decompressobj-like wrapper that decompresses one zstd frame."""
+
+    unconsumed_tail = b""
+
+    def __init__(self):
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes, max_length: int = 0) -> bytes:
+        return self._obj.decompress(data)
+
+    @property
+    def eof(self) -> bool:
+        return self._obj.eof
+
+    @property
+    def unused_data(self) -> bytes:
+        return self._obj.unused_data
+
+    def copy(self) -> None:
+        return None  # zstd state cannot be copied; only frame starts are checkpoints
+
+
+class CompressedContext:
+    """
+    A gzip / zstd file exposed as a random-access context.
+
+    len() is the uncompressed size in bytes, known once the file has been
+    read through (asking for it completes the index). Slicing returns the
+    decoded text of those bytes, widened to whole UTF-8 characters.
+
+    Example:
+        >>> logs = CompressedContext.open("app.log.gz")
+        >>> matches = context_search(logs, r"ERROR", max_hits=20)
+        >>> chunk = context_slice(logs, matches[0].start - 200, matches[0].end + 200)
+    """
+
+    def __init__(self, path: str, format: str, span: int = DEFAULT_SPAN, cache_spans: int = 4):
+        if format not in ("gzip", "zstd"):
+            raise ValueError(f"Unsupported compression format: {format!r}")
+        if format == "zstd" and zstandard is None:
+            raise ImportError("zstd-compressed contexts require the 'zstandard' package")
+        self.path = path
+        self.format = format
+        self.span = span
+        self.checkpoints: list[Checkpoint] = [Checkpoint(0, 0, 0)]
+        self._offsets: list[int] = [0]
+        self._length: int | None = None
+        self._cache: OrderedDict[int, bytes] = OrderedDict()
+        self._cache_spans = cache_spans
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str, span: int = DEFAULT_SPAN) -> CompressedContext:
+        """Open a compressed file, detecting its format from the magic number."""
+        format = detect_compression(path)
+        if format is None:
+            raise ValueError(f"{path} is not gzip- or zstd-compressed")
+        return cls(path, format, span)
+
+    def __repr__(self) -> str:
+        size = "?" if self._length is None else self._length
+        return f"CompressedContext({self.path!r}, {self.format}, len={size}, checkpoints={len(self.checkpoints)})"
+
+    def __len__(self) -> int:
+        if self._length is None:
+            for _ in self._pieces(self._offsets[-1]):
+                pass
+        return self._length
+
+    def __getitem__(self, key: slice) -> str:
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("CompressedContext only supports contiguous slices")
+        start, stop = key.start, key.stop
+        if (start is not None and start < 0) or (stop is not None and stop < 0):
+            start, stop, _ = key.indices(len(self))
+        start = start or 0
+        if stop is None:
+            stop = len(self)
+        if stop <= start:
+            return ""
+        return self.read(start, stop).decode("utf-8", errors="replace")
+
+    @property
+    def indexed(self) -> bool:
+        """Whether the file has been read through (len() is known)."""
+        return self._length is not None
+
+    def read(self, start: int, end: int) -> bytes:
+        """Uncompressed bytes [start, end), widened to UTF-8 character boundaries."""
+        start = max(0, start)
+        lead = max(0, start - 3)
+        data = self._read_raw(lead, end + 3)
+        cut = start - lead
+        while 0 < cut < len(data) and 0x80 <= data[cut] < 0xC0:
+            cut -= 1
+        stop = min(len(data), max(cut, end - lead))
+        while stop < len(data) and 0x80 <= data[stop] < 0xC0:
+            stop += 1
+        return data[cut:stop]
+
+    def _read_raw(self, start: int, end: int) -> bytes:
+        # Index up to the end of the range so its spans are bounded
+        if self._length is None and end > self._offsets[-1]:
+            for offset, _, piece in self._pieces(self._offsets[-1]):
+                if self._offsets[-1] >= end:
+                    break
+
+        parts: list[bytes] = []
+        pos = start
+        while pos < end:
+            i = bisect_right(self._offsets, pos) - 1
+            if i + 1 < len(self._offsets):
+                span_start = self._offsets[i]
+                data = self._span(i)
+                parts.append(data[pos - span_start:end - span_start])
+                pos = span_start + len(data)
+            else:
+                # Last span (e.g. a single zstd frame): stream just the range
+                for offset, _, piece in self._pieces(pos):
+                    if offset >= end:
+                        break
+                    parts.append(piece[max(0, pos - offset):end - offset])
+                break
+        return b"".join(parts)
+
+    def _span(self, i: int) -> bytes:
+        """Uncompressed data between checkpoints i and i + 1 (LRU cached)."""
+        with self._lock:
+            data = self._cache.get(i)
+            if data is not None:
+                self._cache.move_to_end(i)
+                return data
+
+        span_start, span_end = self._offsets[i], self._offsets[i + 1]
+        parts: list[bytes] = []
+        for offset, _, piece in self._pieces(span_start):
+            if offset >= span_end:
+                break
+            parts.append(piece[:span_end - offset])
+        data = b"".join(parts)
+
+        with self._lock:
+            self._cache[i] = data
+            while len(self._cache) > self._cache_spans:
+                self._cache.popitem(last=False)
+        return data
+
+    def _new_decompressor(self) -> Any:
+        if self.format == "gzip":
+            return zlib.decompressobj(wbits=31)
+        return _ZstdFrame()
+
+    def _pieces(self, start: int) -> Iterator[tuple[int, int, bytes]]:
+        """
+        Yield (offset, newlines before offset, data) pieces of uncompressed
+        data from the checkpoint at or before `start` to the end of the
+        file, recording checkpoints past the indexed part on the way.
+        """
+        checkpoint = self.checkpoints[bisect_right(self._offsets, start) - 1]
+        decompressor = self._new_decompressor() if checkpoint.state is None else checkpoint.state.copy()
+        offset = checkpoint.offset
+        lines = checkpoint.lines
+
+        with open(self.path, "rb") as f:
+            f.seek(checkpoint.compressed)
+            while True:
+                data = decompressor.unconsumed_tail or f.read(_READ_SIZE)
+                if not data:
+                    break  # Truncated stream: keep what was decompressed
+                piece = decompressor.decompress(data, _PIECE_SIZE)
+                if piece:
+                    yield offset, lines, piece
+                    lines += piece.count(b"\n")
+                    offset += len(piece)
+
+                if decompressor.eof:
+                    # The next member / frame starts after this one's input
+                    f.seek(f.tell() - len(decompressor.unused_data))
+                    if not self._next_member(f):
+                        break
+                    decompressor = self._new_decompressor()
+                    self._checkpoint(f.tell(), offset, lines, None)
+                elif offset - self._offsets[-1] >= self.span:
+                    # The copy keeps the unconsumed tail of the last read, so
+                    # resuming continues reading after that read, not before it
+                    state = decompressor.copy()
+                    if state is not None:
+                        self._checkpoint(f.tell(), offset, lines, state)
+
+        with self._lock:
+            if self._length is None:
+                self._length = offset
+
+    def _next_member(self, f: BinaryIO) -> bool:
+        """Position f at the next gzip member / zstd frame; False at the end of data."""
+        magic = _GZIP_MAGIC if self.format == "gzip" else _ZSTD_MAGIC
+        while True:
+            head = f.read(8)
+            if self.format == "zstd" and len(head) == 8 and 0x184D2A50 <= int.from_bytes(head[:4], "little") <= 0x184D2A5F:
+                f.seek(int.from_bytes(head[4:], "little"), 1)  # Skippable frame (e.g. a seek table)
+                continue
+            f.seek(-len(head), 1)
+            return head.startswith(magic)  # Anything else is trailing padding
+
+    def _checkpoint(self, compressed: int, offset: int, lines: int, state: Any) -> None:
+        with self._lock:
+            if offset > self._offsets[-1]:
+                self.checkpoints.append(Checkpoint(compressed, offset, lines, state))
+                self._offsets.append(offset)
+
+    def finditer(
+        self,
+        compiled: re.Pattern,
+        start: int = 0,
+        end: int | None = None,
+        guard_chars: int = DEFAULT_GUARD_CHARS,
+    ) -> Iterator[tuple[int, int, str, int]]:
+        """
+        Stream-search the uncompressed text of [start, end).
+
+        Decompresses piece by piece from the checkpoint before `start`,
+        keeping only unsearched text plus a guard band in memory. Matches
+        are those of a single scan except for matches longer than
+        `guard_chars`.
+
+        Yields:
+            (start, end, text, line_number) with byte offsets and
+            1-indexed line numbers
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        text = ""
+        search_from = 0
+        # Probe: a char position in text with its absolute byte offset and line
+        probe = probe_byte = probe_line = 0
+
+        def advance(to: int) -> None:
+            nonlocal probe, probe_byte, probe_line
+            segment = text[probe:to]
+            probe_byte += len(segment.encode("utf-8", errors="surrogatepass"))
+            probe_line += segment.count("\n")
+            probe = to
+
+        def scan(final: bool) -> Iterator[tuple[int, int, str, int]]:
+            nonlocal text, search_from, probe
+            limit = len(text) if final else len(text) - guard_chars
+            for m in compiled.finditer(text, search_from):
+                if m.start() >= limit:
+                    break
+                advance(m.start())
+                yield probe_byte, probe_byte + len(m.group().encode("utf-8", errors="surrogatepass")), m.group(), probe_line
+                search_from = m.end() if m.end() > m.start() else m.end() + 1
+            search_from = max(search_from, limit)
+            # Retire searched text, keeping a little for lookbehind
+            cut = max(0, search_from - _LOOKBEHIND_CHARS)
+            if probe < cut:
+                advance(cut)
+            text = text[cut:]
+            search_from -= cut
+            probe -= cut
+
+        started = False
+        for offset, lines, piece in self._pieces(start):
+            if end is not None and offset >= end:
+                break
+            if offset + len(piece) <= start:
+                continue
+            lo = max(0, start - offset)
+            hi = len(piece) if end is None else min(len(piece), end - offset)
+            if not started:
+                while lo < hi and 0x80 <= piece[lo] < 0xC0:
+                    lo += 1  # Start on a character boundary
+                probe_byte = offset + lo
+                probe_line = 1 + lines + piece.count(b"\n", 0, lo)
+                started = True
+            text += decoder.decode(piece[lo:hi])
+            if len(text) - search_from > 2 * guard_chars:
+                yield from scan(final=False)
+        if started:
+            text += decoder.decode(b"", final=True)
+            yield from scan(final=True)
@@ -9,15 +9,40 @@ Functions:
 - context_tail: Last n characters
 - context_slice: Substring extraction
 - context_search: Regex search with position results
+- context_search_all: AND / NEAR word queries from the token index
+- context_rank: Top-k passages for a query, ranked by BM25
+- context_section / context_sections: Sections found by the structure index
+- context_time_slice / context_time_histogram: Time-range access to logs
+- context_table_schema / context_rows / context_row_chunks: Column access to CSV / JSONL
+- context_chunks: Fixed-size chunks in characters
+- context_packed_chunks: Whole lines/sentences/paragraphs packed to a token budget
+- context_view: Zero-copy window (ContextView) materialized only when used
+- plan_windows: Coalesce overlapping match windows under a token cap
 
 All access is logged for auditability.
 """
 
 from __future__ import annotations
 
+import hashlib
 import re
+import time
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Iterator
+from typing import Iterable, Iterator
+
+from .access_log import ContextAccessLog, get_access_log, new_access_log
+from .compressed import CompressedContext
+from .guards import GuardConfig, estimate_tokens, get_guard_state
+from .indexes import build_context_index, get_context_index, get_line_index
+from .ranking import get_passage_index
+from .revisions import Revision, get_revision
+from .sharded_search import sharded_finditer
+from .structure import Section, get_section_index
+from .tabular import TableIndex, get_table_index
+from .timeline import TimeValue, format_time, get_timestamp_index, parse_time
+from .tracing import get_tracer, traced
+from .views import ContextView
 
 
 @dataclass(frozen=True)
@@ -41,60 +66,70 @@ class SearchMatch:
         return f"SearchMatch(line={self.line_number}, pos={self.start}-{self.end}, text={preview!r})"
 
 
-class ContextAccessLog:
+@dataclass(frozen=True)
+class MatchWindow:
     """
-    Singleton logger for context access auditing.
+    A context window covering one or more search matches.
 
-    Records every context access for debugging and compliance.
+    Attributes:
+        start: Start position in the context
+        end: End position in the context
+        matches: The matches contained in this window, in position order
     """
-    _instance: ContextAccessLog | None = None
-    _log: list[dict]
+    start: int
+    end: int
+    matches: tuple[SearchMatch, ...]
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._log = []
-        return cls._instance
+    def __len__(self) -> int:
+        return self.end - self.start
 
-    def record(self, operation: str, **kwargs) -> None:
-        """Record a context access operation."""
-        entry = {"operation": operation, **kwargs}
-        self._log.append(entry)
 
-    def get_log(self) -> list[dict]:
-        """Return the full access log."""
-        return self._log.copy()
+@dataclass(frozen=True)
+class RankedPassage:
+    """
+    A passage returned by context_rank.
+
+    Attributes:
+        start: Start position in the context
+        end: End position in the context
+        score: BM25 relevance score (higher is more relevant)
+        line_number: Line number of the passage start (1-indexed)
+    """
+    start: int
+    end: int
+    score: float
+    line_number: int
 
-    def clear(self) -> None:
-        """Clear the access log (call at task start)."""
-        self._log = []
+    def __len__(self) -> int:
+        return self.end - self.start
 
-    def summary(self) -> dict:
-        """Return summary statistics of context access."""
-        ops = {}
-        total_chars = 0
-        for entry in self._log:
-            op = entry["operation"]
-            ops[op] = ops.get(op, 0) + 1
-            if "chars_accessed" in entry:
-                total_chars += entry["chars_accessed"]
-        return {
-            "total_operations": len(self._log),
-            "operations_by_type": ops,
-            "total_chars_accessed": total_chars,
-        }
 
+@dataclass(frozen=True)
+class TableRow:
+    """
+    A record of a tabular (CSV / JSON-lines) context.
 
-# Module-level logger instance
-_logger = ContextAccessLog()
+    Attributes:
+        row: Record ordinal (0-indexed, header excluded)
+        start: Start position of the record in the context
+        end: End position of the record in the context
+        values: Field values (only the requested columns)
+    """
+    row: int
+    start: int
+    end: int
+    values: dict
 
 
-def get_access_log() -> ContextAccessLog:
-    """Get the context access logger."""
-    return _logger
+def _known_length(context: str | CompressedContext) -> int | None:
+    """len(context), or None for a compressed context not yet read through."""
+    if isinstance(context, CompressedContext) and not context.indexed:
+        return None
+    return len(context)
 
 
-def context_head(context: str, n: int) -> str:
+@traced("context_head")
+def context_head(context: str | CompressedContext, n: int) -> str:
     """
     Return the first n characters of context.
 
@@ -109,24 +144,25 @@ def context_head(context: str, n: int) -> str:
         >>> chunk = context_head(document, 1000)
         >>> # Process first 1000 chars
     """
-    if not isinstance(context, str):
+    if not isinstance(context, (str, CompressedContext)):
         raise TypeError(f"context must be str, got {type(context).__name__}")
     if not isinstance(n, int) or n < 0:
         raise ValueError(f"n must be non-negative integer, got {n}")
 
     result = context[:n]
 
-    _logger.record(
+    get_access_log().record(
         operation="head",
         n=n,
-        context_length=len(context),
+        context_length=_known_length(context),
         chars_accessed=len(result),
     )
 
     return result
 
 
-def context_tail(context: str, n: int) -> str:
+@traced("context_tail")
+def context_tail(context: str | CompressedContext, n: int) -> str:
     """
     Return the last n characters of context.
 
@@ -141,14 +177,14 @@ def context_tail(context: str, n: int) -> str:
         >>> chunk = context_tail(document, 1000)
         >>> # Process last 1000 chars (e.g., conclusion)
     """
-    if not isinstance(context, str):
+    if not isinstance(context, (str, CompressedContext)):
         raise TypeError(f"context must be str, got {type(context).__name__}")
     if not isinstance(n, int) or n < 0:
         raise ValueError(f"n must be non-negative integer, got {n}")
 
     result = context[-n:] if n > 0 else ""
 
-    _logger.record(
+    get_access_log().record(
         operation="tail",
         n=n,
         context_length=len(context),
@@ -158,12 +194,15 @@ def context_tail(context: str, n: int) -> str:
     return result
 
 
-def context_slice(context: str, start: int, end: int) -> str:
+@traced("context_slice")
+def context_slice(context: str | CompressedContext, start: int, end: int) -> str:
     """
     Return a substring from position start to end.
 
     Args:
-        context: The full context string
+        context: The full context string, or a CompressedContext (positions
+            are then uncompressed byte offsets; only the blocks covering
+            the range are decompressed)
         start: Start position (inclusive, 0-indexed)
         end: End position (exclusive)
 
@@ -174,45 +213,61 @@ def context_slice(context: str, start: int, end: int) -> str:
         >>> # Extract chars 1000-2000 around a search hit
         >>> chunk = context_slice(document, 1000, 2000)
     """
-    if not isinstance(context, str):
+    if not isinstance(context, (str, CompressedContext)):
         raise TypeError(f"context must be str, got {type(context).__name__}")
     if not isinstance(start, int) or not isinstance(end, int):
         raise ValueError(f"start and end must be integers, got {type(start).__name__}, {type(end).__name__}")
 
     # Clamp to valid range
+    length = _known_length(context)
     start = max(0, start)
-    end = min(len(context), end)
+    if length is not None:
+        end = min(length, end)
 
     if start > end:
         start, end = end, start  # Swap if inverted
 
     result = context[start:end]
 
-    _logger.record(
+    get_access_log().record(
         operation="slice",
         start=start,
         end=end,
-        context_length=len(context),
+        context_length=length,
         chars_accessed=len(result),
     )
 
     return result
 
 
+@traced("context_search")
 def context_search(
-    context: str,
+    context: str | ContextView | CompressedContext,
     pattern: str,
     max_hits: int = 10,
     case_sensitive: bool = False,
+    workers: int | None = 1,
+    start: int = 0,
 ) -> list[SearchMatch]:
     """
     Search context for regex pattern, returning match positions.
 
+    With workers > 1 (or None for one per CPU), large contexts are split
+    at line boundaries and scanned in parallel processes; see
+    rlm.sharded_search. Results are identical to a single scan except for
+    matches longer than the shard guard band (4096 chars).
+
     Args:
-        context: The full context string
+        context: The full context string, or a ContextView to search only
+            that window (positions are still absolute in the full context),
+            or a CompressedContext (streamed block by block with bounded
+            memory; positions are uncompressed byte offsets)
         pattern: Regex pattern to search for
         max_hits: Maximum number of matches to return (default: 10)
         case_sensitive: Whether search is case-sensitive (default: False)
+        workers: Processes for sharded search (default: 1, no sharding)
+        start: Only search from this position on, e.g. the high-water mark
+            of an IncrementalContext so only appended content is scanned
 
     Returns:
         List of SearchMatch objects with positions
@@ -223,12 +278,28 @@ def context_search(
         ...     chunk = context_slice(document, m.start - 200, m.end + 200)
         ...     # Process chunk around each match
     """
-    if not isinstance(context, str):
+    if isinstance(context, ContextView):
+        if not isinstance(context.source, str):
+            raise TypeError("context_search requires a view over a str context")
+        window_start, window_end = context.start, context.end
+        context = context.source
+    elif isinstance(context, str):
+        window_start, window_end = 0, len(context)
+    elif isinstance(context, CompressedContext):
+        window_start, window_end = 0, None
+    else:
         raise TypeError(f"context must be str, got {type(context).__name__}")
     if not isinstance(pattern, str):
         raise TypeError(f"pattern must be str, got {type(pattern).__name__}")
     if not isinstance(max_hits, int) or max_hits < 1:
         raise ValueError(f"max_hits must be positive integer, got {max_hits}")
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError(f"workers must be a positive integer or None, got {workers}")
+    if not isinstance(start, int) or start < 0:
+        raise ValueError(f"start must be a non-negative integer, got {start}")
+    window_start = max(window_start, start)
+    if window_end is not None:
+        window_start = min(window_start, window_end)
 
     flags = 0 if case_sensitive else re.IGNORECASE
 
@@ -237,42 +308,700 @@ def context_search(
     except re.error as e:
         raise ValueError(f"Invalid regex pattern: {e}")
 
-    # Pre-compute line starts for line number calculation
-    line_starts = [0]
-    for i, char in enumerate(context):
-        if char == '\n':
-            line_starts.append(i + 1)
-
-    def get_line_number(pos: int) -> int:
-        """Binary search for line number at position."""
-        lo, hi = 0, len(line_starts)
-        while lo < hi:
-            mid = (lo + hi) // 2
-            if line_starts[mid] <= pos:
-                lo = mid + 1
-            else:
-                hi = mid
-        return lo  # 1-indexed line number
+    if isinstance(context, CompressedContext):
+        return _compressed_search(context, pattern, compiled, max_hits, case_sensitive, window_start)
+
+    # Line starts are computed once per context and cached
+    line_index = get_line_index(context)
+
+    # A registered token index answers word-literal patterns directly
+    index = get_context_index(context)
+    if index is not None and index.can_answer(pattern):
+        strategy = "index"
+        found = (
+            (m.start(), m.end(), m.group())
+            for m in index.search(context, compiled, window_start, window_end)
+        )
+    elif workers == 1:
+        strategy = "scan"
+        found = (
+            (m.start(), m.end(), m.group())
+            for m in compiled.finditer(context, window_start, window_end)
+        )
+    else:
+        strategy = "sharded"
+        found = sharded_finditer(context, compiled, window_start, window_end, max_hits, workers)
 
     matches: list[SearchMatch] = []
-    for match in compiled.finditer(context):
+    for match_start, match_end, text in found:
         if len(matches) >= max_hits:
             break
         matches.append(SearchMatch(
-            text=match.group(),
-            start=match.start(),
-            end=match.end(),
-            line_number=get_line_number(match.start()),
+            text=text,
+            start=match_start,
+            end=match_end,
+            line_number=line_index.line_number(match_start),
         ))
 
-    _logger.record(
+    get_access_log().record(
         operation="search",
         pattern=pattern,
         max_hits=max_hits,
         case_sensitive=case_sensitive,
-        context_length=len(context),
+        context_length=window_end - window_start,
         matches_found=len(matches),
         chars_accessed=0,  # Search doesn't extract text
+        **({} if strategy == "scan" else {"strategy": strategy}),
+    )
+
+    return matches
+
+
+def context_search_iter(
+    context: str | ContextView | CompressedContext,
+    pattern: str,
+    max_hits: int | None = None,
+    case_sensitive: bool = False,
+    start: int = 0,
+) -> Iterator[SearchMatch]:
+    """
+    Lazy context_search: yield matches as a single forward scan finds them.
+
+    The scan only advances as matches are consumed, so a consumer can
+    start subcalls on the first hits while later ones are still being
+    searched for (see rlm.pipeline). Line numbers are counted along the
+    way instead of from a prebuilt line index.
+
+    Args:
+        context: The full context string, a ContextView of one, or a
+            CompressedContext
+        pattern: Regex pattern to search for
+        max_hits: Stop after this many matches (default: no limit)
+        case_sensitive: Whether search is case-sensitive (default: False)
+        start: Only search from this position on
+
+    Yields:
+        SearchMatch objects in position order
+
+    Example:
+        >>> for match in context_search_iter(logs, r"ERROR", max_hits=100):
+        ...     queue.put(match)  # consumed while the scan continues
+    """
+    if isinstance(context, ContextView):
+        if not isinstance(context.source, str):
+            raise TypeError("context_search_iter requires a view over a str context")
+        window_start, window_end = context.start, context.end
+        context = context.source
+    elif isinstance(context, str):
+        window_start, window_end = 0, len(context)
+    elif isinstance(context, CompressedContext):
+        window_start, window_end = 0, None
+    else:
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if not isinstance(pattern, str):
+        raise TypeError(f"pattern must be str, got {type(pattern).__name__}")
+    if max_hits is not None and (not isinstance(max_hits, int) or max_hits < 1):
+        raise ValueError(f"max_hits must be positive integer, got {max_hits}")
+    if not isinstance(start, int) or start < 0:
+        raise ValueError(f"start must be a non-negative integer, got {start}")
+    window_start = max(window_start, start)
+    if window_end is not None:
+        window_start = min(window_start, window_end)
+
+    try:
+        compiled = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid regex pattern: {e}")
+
+    return _search_iter(context, pattern, compiled, max_hits, case_sensitive, window_start, window_end)
+
+
+def _search_iter(
+    context: str | CompressedContext,
+    pattern: str,
+    compiled: re.Pattern,
+    max_hits: int | None,
+    case_sensitive: bool,
+    window_start: int,
+    window_end: int | None,
+) -> Iterator[SearchMatch]:
+    if isinstance(context, CompressedContext):
+        found = context.finditer(compiled, window_start)
+    else:
+        def scan() -> Iterator[tuple[int, int, str, int]]:
+            line, pos = context.count("\n", 0, window_start) + 1, window_start
+            for m in compiled.finditer(context, window_start, window_end):
+                line += context.count("\n", pos, m.start())
+                pos = m.start()
+                yield m.start(), m.end(), m.group(), line
+        found = scan()
+
+    hits = 0
+    scanned_to = window_start
+    try:
+        for match_start, match_end, text, line_number in found:
+            hits += 1
+            scanned_to = match_end
+            yield SearchMatch(text=text, start=match_start, end=match_end, line_number=line_number)
+            if max_hits is not None and hits >= max_hits:
+                return
+        scanned_to = window_end if window_end is not None else len(context)
+    finally:
+        get_access_log().record(
+            operation="search",
+            pattern=pattern,
+            max_hits=max_hits,
+            case_sensitive=case_sensitive,
+            context_length=_known_length(context) if window_end is None else window_end - window_start,
+            matches_found=hits,
+            chars_accessed=0,  # Search doesn't extract text
+            chars_scanned=scanned_to - window_start,
+            strategy="stream",
+        )
+
+
+def _compressed_search(
+    context: CompressedContext,
+    pattern: str,
+    compiled: re.Pattern,
+    max_hits: int,
+    case_sensitive: bool,
+    start: int,
+) -> list[SearchMatch]:
+    """context_search over a compressed context: decompress and scan block by block."""
+    matches: list[SearchMatch] = []
+    scanned_to = start
+    for match_start, match_end, text, line_number in context.finditer(compiled, start):
+        matches.append(SearchMatch(text=text, start=match_start, end=match_end, line_number=line_number))
+        scanned_to = match_end
+        if len(matches) >= max_hits:
+            break
+    else:
+        scanned_to = len(context)
+
+    get_access_log().record(
+        operation="search",
+        pattern=pattern,
+        max_hits=max_hits,
+        case_sensitive=case_sensitive,
+        context_length=_known_length(context) or scanned_to - start,
+        matches_found=len(matches),
+        chars_accessed=0,  # Search doesn't extract text
+        chars_scanned=scanned_to - start,
+        strategy="compressed",
+    )
+
+    return matches
+
+
+@traced("context_rank")
+def context_rank(context: str, query: str, k: int = 5) -> list[RankedPassage]:
+    """
+    Return the k passages most relevant to a query, ranked by BM25.
+
+    Passages are paragraphs (long ones cut at line breaks, ~1000 chars);
+    the passage index is built once per context and cached. Use this to
+    spend a fixed number of subcalls on the most relevant regions rather
+    than the earliest regex hits.
+
+    Args:
+        context: The full context string
+        query: Free-text query (words are matched case-insensitively)
+        k: Maximum number of passages to return (default: 5)
+
+    Returns:
+        RankedPassage objects, most relevant first
+
+    Example:
+        >>> for p in context_rank(document, "conclusion findings significant", k=3):
+        ...     chunk = context_slice(document, p.start, p.end)
+        ...     claim = semantic_subcall("Extract the key claim.", chunk)
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("query must be a non-empty string")
+    if not isinstance(k, int) or k < 1:
+        raise ValueError(f"k must be positive integer, got {k}")
+
+    index = get_passage_index(context)
+    line_index = get_line_index(context)
+    passages = [
+        RankedPassage(
+            start=index.starts[pid],
+            end=index.ends[pid],
+            score=round(score, 4),
+            line_number=line_index.line_number(index.starts[pid]),
+        )
+        for pid, score in index.top_k(query, k)
+    ]
+
+    get_access_log().record(
+        operation="rank",
+        pattern=query,
+        max_hits=k,
+        context_length=len(context),
+        matches_found=len(passages),
+        chars_accessed=0,  # Ranking doesn't extract text
+    )
+
+    return passages
+
+
+@traced("context_section")
+def context_section(
+    context: str,
+    name: str,
+    include_heading: bool = False,
+    max_chars: int | None = None,
+) -> str | None:
+    """
+    Return the text of the section with the given heading.
+
+    Headings are found by the structure index (Markdown, underlined,
+    numbered and all-caps headings; built once per context and cached).
+    Titles match case-insensitively, exactly first and then by prefix, so
+    "conclusion" finds "Conclusions".
+
+    Args:
+        context: The full context string
+        name: Section title to look for
+        include_heading: Include the heading line (default: False)
+        max_chars: Truncate the section to this many characters
+
+    Returns:
+        The section text, including its subsections, or None if no
+        heading matches
+
+    Example:
+        >>> abstract = context_section(paper, "abstract", max_chars=4000)
+        >>> if abstract is None:
+        ...     abstract = context_head(paper, 2000)
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name must be a non-empty string")
+    if max_chars is not None and max_chars < 1:
+        raise ValueError(f"max_chars must be positive, got {max_chars}")
+
+    section = get_section_index(context).find(name)
+    result = None
+    if section is not None:
+        start = section.start if include_heading else section.body_start
+        end = section.end if max_chars is None else min(section.end, start + max_chars)
+        result = context[start:end]
+
+    get_access_log().record(
+        operation="section",
+        pattern=name,
+        start=None if result is None else start,
+        end=None if result is None else end,
+        context_length=len(context),
+        chars_accessed=0 if result is None else len(result),
+    )
+
+    return result
+
+
+def context_sections(context: str, max_level: int | None = None) -> Iterator[Section]:
+    """
+    Iterate over the sections of a context in document order.
+
+    Yields Section spans only; extract text with context_slice or
+    context_section.
+
+    Args:
+        context: The full context string
+        max_level: Skip sections nested deeper than this level
+
+    Example:
+        >>> for s in context_sections(paper, max_level=2):
+        ...     print(s.level, s.title, s.end - s.body_start)
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+
+    index = get_section_index(context)
+    get_access_log().record(
+        operation="sections",
+        context_length=len(context),
+        matches_found=len(index),
+        chars_accessed=0,  # Listing headings doesn't extract text
+    )
+    for section in index:
+        if max_level is None or section.level <= max_level:
+            yield section
+
+
+@traced("context_time_slice")
+def context_time_slice(
+    context: str,
+    start: TimeValue = None,
+    end: TimeValue = None,
+    max_chars: int | None = None,
+) -> str:
+    """
+    Return the log entries timestamped in [start, end).
+
+    Leading timestamps of log lines (ISO 8601, Common Log Format, syslog,
+    epoch seconds) are indexed once per context; the window is then found
+    by binary search rather than a regex over the whole log. Continuation
+    lines (stack traces) stay with their entry.
+
+    Args:
+        context: The full log
+        start: Earliest time (inclusive); None = from the beginning
+        end: Latest time (exclusive); None = to the end
+        max_chars: Truncate the slice to this many characters
+
+    Times are epoch seconds, datetimes (naive = UTC) or timestamp strings.
+
+    Returns:
+        The matching entries (empty if none fall in the window)
+
+    Example:
+        >>> incident = context_time_slice(logs, "2024-01-15T10:20:00", "2024-01-15T10:30:00")
+        >>> errors = context_search(incident, r"ERROR|FATAL", max_hits=20)
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if max_chars is not None and max_chars < 1:
+        raise ValueError(f"max_chars must be positive, got {max_chars}")
+    lo_time, hi_time = parse_time(start), parse_time(end)
+
+    lo, hi = get_timestamp_index(context).span(lo_time, hi_time, len(context))
+    if max_chars is not None:
+        hi = min(hi, lo + max_chars)
+    result = context[lo:hi]
+
+    get_access_log().record(
+        operation="time_slice",
+        start=lo,
+        end=hi,
+        time_start=None if lo_time is None else format_time(lo_time),
+        time_end=None if hi_time is None else format_time(hi_time),
+        context_length=len(context),
+        chars_accessed=len(result),
+    )
+
+    return result
+
+
+@traced("context_time_histogram")
+def context_time_histogram(
+    context: str,
+    pattern: str | None = None,
+    start: TimeValue = None,
+    end: TimeValue = None,
+    bucket_seconds: int = 60,
+    case_sensitive: bool = False,
+) -> list[tuple[str, int]]:
+    """
+    Count log entries, or matches of a pattern, per time bucket.
+
+    Without a pattern the counts come from the timestamp index alone.
+    With one, only the [start, end) window is scanned and each match is
+    counted under the timestamp of its entry.
+
+    Args:
+        context: The full log
+        pattern: Regex to count (None counts entries)
+        start, end: Time window, as for context_time_slice
+        bucket_seconds: Bucket width (default: 60, i.e. per minute)
+        case_sensitive: Whether the pattern is case-sensitive (default: False)
+
+    Returns:
+        (bucket start as ISO 8601 UTC, count) pairs in time order; empty
+        buckets are omitted
+
+    Example:
+        >>> for minute, n in context_time_histogram(logs, r"\bERROR\b"):
+        ...     print(minute, n)
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if not isinstance(bucket_seconds, int) or bucket_seconds < 1:
+        raise ValueError(f"bucket_seconds must be positive integer, got {bucket_seconds}")
+    lo_time, hi_time = parse_time(start), parse_time(end)
+
+    index = get_timestamp_index(context)
+    positions = None
+    scanned = 0
+    if pattern is not None:
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            compiled = re.compile(pattern, flags)
+        except re.error as e:
+            raise ValueError(f"Invalid regex pattern: {e}")
+        lo, hi = index.span(lo_time, hi_time, len(context))
+        positions = [m.start() for m in compiled.finditer(context, lo, hi)]
+        scanned = hi - lo
+
+    buckets = [
+        (format_time(ts), count)
+        for ts, count in index.histogram(lo_time, hi_time, bucket_seconds, positions)
+    ]
+
+    get_access_log().record(
+        operation="time_histogram",
+        pattern=pattern,
+        case_sensitive=case_sensitive,
+        context_length=len(context),
+        matches_found=sum(count for _, count in buckets),
+        chars_accessed=0,  # Counting doesn't extract text
+        chars_scanned=scanned,
+    )
+
+    return buckets
+
+
+def _require_table(context: str) -> TableIndex:
+    table = get_table_index(context)
+    if table is None:
+        raise ValueError("context is not tabular (CSV, TSV, JSON lines or a JSON array of objects)")
+    return table
+
+
+@traced("context_table_schema")
+def context_table_schema(context: str) -> dict | None:
+    """
+    Describe a tabular context, parsing it into a column store on first use.
+
+    Returns:
+        {"format": "csv" | "jsonl" | "json", "columns": [...], "rows": n},
+        or None if the context is not tabular
+
+    Example:
+        >>> schema = context_table_schema(data)
+        >>> if schema and "status" in schema["columns"]:
+        ...     failures = context_rows(data, where={"status": (">=", 500)})
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+
+    table = get_table_index(context)
+    schema = None
+    if table is not None:
+        schema = {"format": table.format, "columns": list(table.columns), "rows": len(table)}
+
+    get_access_log().record(
+        operation="table_schema",
+        context_length=len(context),
+        matches_found=0 if table is None else len(table),
+        chars_accessed=0,  # Parsing doesn't extract text
+    )
+
+    return schema
+
+
+@traced("context_rows")
+def context_rows(
+    context: str,
+    where: dict | None = None,
+    columns: list[str] | None = None,
+    start_row: int = 0,
+    end_row: int | None = None,
+    max_rows: int = 100,
+) -> list[TableRow]:
+    """
+    Select records of a tabular context by column predicates.
+
+    Conditions are ANDed; see TableIndex.select for the forms a condition
+    can take. Numeric comparisons are evaluated over the whole column at
+    once (vectorized with NumPy when installed).
+
+    Args:
+        context: The full CSV / JSON-lines context
+        where: Column -> condition, e.g. {"status": (">=", 500), "method": "POST"}
+        columns: Fields to return (default: all)
+        start_row: First record to consider (0-indexed)
+        end_row: Stop before this record (default: last)
+        max_rows: Maximum number of records to return (default: 100)
+
+    Returns:
+        TableRow objects in record order
+
+    Raises:
+        ValueError: If the context is not tabular
+        KeyError: If a column does not exist
+
+    Example:
+        >>> slow = context_rows(requests_csv, where={"latency_ms": (">", 1000)}, columns=["path", "latency_ms"])
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if not isinstance(max_rows, int) or max_rows < 1:
+        raise ValueError(f"max_rows must be positive integer, got {max_rows}")
+
+    table = _require_table(context)
+    if columns is not None:
+        missing = [c for c in columns if c not in table.values]
+        if missing:
+            raise KeyError(f"Unknown columns {missing}; columns are {table.columns}")
+
+    selected = table.select(where, start_row, end_row)
+    rows = [
+        TableRow(row=i, start=table.starts[i], end=table.ends[i], values=table.record(i, columns))
+        for i in selected[:max_rows]
+    ]
+
+    get_access_log().record(
+        operation="rows",
+        pattern=None if not where else ", ".join(where),
+        max_hits=max_rows,
+        context_length=len(context),
+        matches_found=len(selected),
+        chars_accessed=sum(r.end - r.start for r in rows),
+    )
+
+    return rows
+
+
+def context_row_chunks(
+    context: str,
+    prompt: str = "",
+    rows: list[int] | None = None,
+    columns: list[str] | None = None,
+    max_tokens: int | None = None,
+    reserve_tokens: int = 32,
+) -> Iterator[tuple[list[int], str]]:
+    """
+    Yield whole records packed up to the per-subcall token budget.
+
+    Records are never split across chunks (one larger than the budget is
+    sent alone, truncated). CSV chunks repeat the header line so each
+    chunk is self-describing.
+
+    Args:
+        context: The full CSV / JSON-lines context
+        prompt: The prompt that will accompany each chunk
+        rows: Record ordinals to pack, e.g. from context_rows (default: all)
+        columns: Project records onto these fields (default: raw records)
+        max_tokens: Token cap per subcall including the prompt
+            (default: GuardConfig.max_tokens_per_subcall of the running task)
+        reserve_tokens: Headroom for text the subcall helpers add to the prompt
+
+    Yields:
+        Tuples of (record ordinals, chunk_text)
+
+    Example:
+        >>> hits = context_rows(data, where={"level": re.compile("error|fatal", re.I)})
+        >>> for ids, chunk in context_row_chunks(data, prompt, rows=[r.row for r in hits]):
+        ...     summary = semantic_subcall(prompt, chunk)
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+
+    table = _require_table(context)
+    cap = _default_token_cap() if max_tokens is None else max_tokens
+    header = table.render_header(columns)
+    budget = cap - reserve_tokens - (estimate_tokens(prompt) if prompt else 0) - (estimate_tokens(header) if header else 0)
+    if budget < 1:
+        raise ValueError(f"No token budget left for records: cap {cap}, prompt, header and reserve exceed it")
+
+    ids = range(len(table)) if rows is None else rows
+    chunk_ids: list[int] = []
+    parts: list[str] = []
+    used = 0
+    for i in ids:
+        text = table.render([i], context, columns)[0]
+        if not text.endswith("\n"):
+            text += "\n"
+        cost = estimate_tokens(text)
+        if cost > budget:
+            # Oversized record: keep the largest fitting prefix
+            offsets = range(1, len(text) + 1)
+            text = text[:offsets[max(0, _last_fitting(text, 0, offsets, 0, budget))]]
+            cost = budget
+        if parts and used + cost > budget:
+            yield _row_chunk(context, header, chunk_ids, parts, budget)
+            chunk_ids, parts, used = [], [], 0
+        chunk_ids.append(i)
+        parts.append(text)
+        used += cost
+    if parts:
+        yield _row_chunk(context, header, chunk_ids, parts, budget)
+
+
+def _row_chunk(context: str, header: str, ids: list[int], parts: list[str], budget: int) -> tuple[list[int], str]:
+    chunk = header + "".join(parts)
+    get_access_log().record(
+        operation="row_chunk",
+        start=ids[0],
+        end=ids[-1] + 1,
+        context_length=len(context),
+        chars_accessed=len(chunk),
+        rows=len(ids),
+        token_budget=budget,
+    )
+    return ids, chunk
+
+
+@traced("context_search_all")
+def context_search_all(
+    context: str,
+    terms: list[str],
+    within: int | None = None,
+    max_hits: int = 10,
+    case_sensitive: bool = False,
+) -> list[SearchMatch]:
+    """
+    Find places where all terms occur together (AND / NEAR query).
+
+    Terms are whole words, answered from the context's token index
+    (built on first use and cached; see build_context_index).
+
+    Args:
+        context: The full context string
+        terms: Words that must all occur
+        within: Maximum span in characters (NEAR); None means the same line (AND)
+        max_hits: Maximum number of matches to return (default: 10)
+        case_sensitive: Whether terms are case-sensitive (default: False)
+
+    Returns:
+        SearchMatch objects whose text is the matching line or span
+
+    Example:
+        >>> hits = context_search_all(logs, ["timeout", "db01"])           # same line
+        >>> hits = context_search_all(logs, ["login", "failed"], within=80)  # nearby
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if not terms or not all(isinstance(t, str) and re.fullmatch(r"\w+", t) for t in terms):
+        raise ValueError(f"terms must be a non-empty list of words, got {terms!r}")
+    if not isinstance(max_hits, int) or max_hits < 1:
+        raise ValueError(f"max_hits must be positive integer, got {max_hits}")
+    if within is not None and within < 1:
+        raise ValueError(f"within must be positive, got {within}")
+
+    index = build_context_index(context)
+    line_index = get_line_index(context)
+    if within is None:
+        spans = index.lines_with_all(terms, line_index, len(context), case_sensitive)
+    else:
+        spans = index.near(terms, within, case_sensitive)
+
+    matches: list[SearchMatch] = []
+    for start, end in spans:
+        if len(matches) >= max_hits:
+            break
+        matches.append(SearchMatch(
+            text=context[start:end],
+            start=start,
+            end=end,
+            line_number=line_index.line_number(start),
+        ))
+
+    get_access_log().record(
+        operation="search_all",
+        pattern=" ".join(terms),
+        max_hits=max_hits,
+        case_sensitive=case_sensitive,
+        context_length=len(context),
+        matches_found=len(matches),
+        chars_accessed=sum(len(m.text) for m in matches),
+        within=within,
     )
 
     return matches
@@ -282,7 +1011,8 @@ def context_chunks(
     context: str,
     chunk_size: int,
     overlap: int = 0,
-) -> Iterator[tuple[int, int, str]]:
+    as_views: bool = False,
+) -> Iterator[tuple[int, int, str | ContextView]]:
     """
     Yield non-overlapping (or overlapping) chunks of context.
 
@@ -293,9 +1023,10 @@ def context_chunks(
         context: The full context string
         chunk_size: Size of each chunk in characters
         overlap: Number of characters to overlap between chunks
+        as_views: Yield zero-copy ContextViews instead of str copies
 
     Yields:
-        Tuples of (start_pos, end_pos, chunk_text)
+        Tuples of (start_pos, end_pos, chunk_text or ContextView)
 
     Example:
         >>> for start, end, chunk in context_chunks(document, 2000, overlap=200):
@@ -308,12 +1039,14 @@ def context_chunks(
     if overlap < 0 or overlap >= chunk_size:
         raise ValueError(f"overlap must be in [0, chunk_size), got {overlap}")
 
+    tracer = get_tracer()
     pos = 0
     while pos < len(context):
+        started = time.perf_counter() if tracer is not None else 0.0
         end = min(pos + chunk_size, len(context))
-        chunk = context[pos:end]
+        chunk = ContextView(context, pos, end) if as_views else context[pos:end]
 
-        _logger.record(
+        get_access_log().record(
             operation="chunk",
             start=pos,
             end=end,
@@ -323,6 +1056,9 @@ def context_chunks(
             chars_accessed=len(chunk),
         )
 
+        if tracer is not None:
+            tracer.add("context_chunks", "context", started, time.perf_counter())
+
         yield (pos, end, chunk)
 
         if end >= len(context):
@@ -330,6 +1066,172 @@ def context_chunks(
         pos = end - overlap
 
 
+# Boundary patterns for packed chunking; a chunk may end after any match
+_BOUNDARIES = {
+    "line": re.compile(r"\n"),
+    "sentence": re.compile(r"(?<=[.!?])\s+|\n"),
+    "paragraph": re.compile(r"\n[ \t]*\n\s*"),
+}
+
+
+def _fits(context: str, start: int, end: int, budget: int) -> bool:
+    return estimate_tokens(context[start:end]) <= budget
+
+
+def _last_fitting(
+    context: str,
+    start: int,
+    ends: list[int] | range,
+    lo: int,
+    budget: int,
+    hi: int | None = None,
+) -> int:
+    """
+    Index of the furthest end in ends[lo:hi] whose span from start fits the
+    budget, or lo - 1 if none does. Gallops forward then bisects, so the
+    estimator only sees spans about as large as the resulting chunk.
+    """
+    hi = len(ends) if hi is None else hi
+    if lo >= hi or not _fits(context, start, ends[lo], budget):
+        return lo - 1
+    good, step = lo, 1
+    while good + step < hi and _fits(context, start, ends[good + step], budget):
+        good += step
+        step *= 2
+    bad = min(good + step, hi)
+    while bad - good > 1:
+        mid = (good + bad) // 2
+        if _fits(context, start, ends[mid], budget):
+            good = mid
+        else:
+            bad = mid
+    return good
+
+
+def context_packed_chunks(
+    context: str,
+    max_tokens: int | None = None,
+    prompt: str = "",
+    unit: str = "sentence",
+    reserve_tokens: int = 32,
+    as_views: bool = False,
+) -> Iterator[tuple[int, int, str | ContextView]]:
+    """
+    Yield chunks packed with whole lines, sentences or paragraphs up to a token budget.
+
+    Unlike context_chunks, chunk size is measured in tokens with the same
+    estimator the per-subcall guard uses, so each chunk is as large as a
+    subcall allows and the number of subcalls is minimized. Chunks end on
+    unit boundaries; a single unit larger than the budget is split at the
+    largest fitting character offset.
+
+    When the task analyzes a new version of a document (see
+    rlm.revisions), chunks of the previous run that lie in unchanged text
+    are reproduced exactly and only the changed spans are packed afresh,
+    so the unchanged chunks' subcalls are answered from the previous run.
+
+    Args:
+        context: The full context string
+        max_tokens: Token cap per subcall including the prompt
+            (default: GuardConfig.max_tokens_per_subcall of the running task)
+        prompt: The prompt that will accompany each chunk
+        unit: Boundary to pack on: "line", "sentence" or "paragraph"
+        reserve_tokens: Headroom for text the subcall helpers add to the prompt
+        as_views: Yield zero-copy ContextViews instead of str copies
+
+    Yields:
+        Tuples of (start_pos, end_pos, chunk_text or ContextView)
+
+    Example:
+        >>> prompt = "Extract named entities from this text."
+        >>> for start, end, chunk in context_packed_chunks(document, prompt=prompt):
+        ...     entities = semantic_subcall_json(prompt, chunk)
+    """
+    if not isinstance(context, str):
+        raise TypeError(f"context must be str, got {type(context).__name__}")
+    if unit not in _BOUNDARIES:
+        raise ValueError(f"unit must be one of {sorted(_BOUNDARIES)}, got {unit!r}")
+
+    cap = _default_token_cap() if max_tokens is None else max_tokens
+    budget = cap - reserve_tokens - (estimate_tokens(prompt) if prompt else 0)
+    if budget < 1:
+        raise ValueError(f"No token budget left for context: cap {cap}, prompt and reserve exceed it")
+
+    # All candidate chunk ends, found in a single pass
+    ends = [m.end() for m in _BOUNDARIES[unit].finditer(context)]
+    if not ends or ends[-1] != len(context):
+        ends.append(len(context))
+
+    # Previous-version chunks in unchanged text, by start in this version
+    revision = get_revision()
+    if revision is None or context is not revision.current:
+        revision = None
+    prompt_hash = hashlib.blake2b(prompt.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+    scheme = f"{unit}:{cap}:{reserve_tokens}:{prompt_hash}"
+    anchors = _revision_anchors(revision, context, scheme)
+    anchor_starts = sorted(anchors)
+    if anchors:
+        ends = sorted(set(ends).union(anchor_starts, anchors.values()))
+
+    tracer = get_tracer()
+    pos = 0
+    i = 0
+    while pos < len(context):
+        started = time.perf_counter() if tracer is not None else 0.0
+        while ends[i] <= pos:
+            i += 1
+
+        anchor_end = anchors.get(pos)
+        if anchor_end is not None and _fits(context, pos, anchor_end, budget):
+            end = anchor_end
+        else:
+            # Pack up to the next reusable chunk at most
+            k = bisect_right(anchor_starts, pos)
+            hi = bisect_right(ends, anchor_starts[k]) if k < len(anchor_starts) else len(ends)
+            j = _last_fitting(context, pos, ends, i, budget, hi)
+            if j >= i:
+                end = ends[j]
+            else:
+                # Oversized unit: split it at the largest fitting offset
+                offsets = range(pos + 1, ends[i] + 1)
+                end = offsets[max(0, _last_fitting(context, pos, offsets, 0, budget))]
+
+        if revision is not None:
+            revision.record_chunk(scheme, pos, end)
+
+        chunk = ContextView(context, pos, end) if as_views else context[pos:end]
+
+        get_access_log().record(
+            operation="packed_chunk",
+            start=pos,
+            end=end,
+            context_length=len(context),
+            chars_accessed=end - pos,
+            unit=unit,
+            token_budget=budget,
+        )
+
+        if tracer is not None:
+            tracer.add("context_packed_chunks", "context", started, time.perf_counter())
+
+        yield (pos, end, chunk)
+        pos = end
+
+
+def _revision_anchors(revision: Revision | None, context: str, scheme: str) -> dict[int, int]:
+    """Chunks of the previous run that are unchanged in context, as start -> end."""
+    alignment = revision.alignment(context) if revision is not None else None
+    if alignment is None:
+        return {}
+    anchors: dict[int, int] = {}
+    for start, end in revision.previous_chunks(scheme):
+        mapped = alignment.to_new(start, end)
+        if mapped is not None:
+            anchors[mapped[0]] = mapped[1]
+    return anchors
+
+
+@traced("context_around_match")
 def context_around_match(
     context: str,
     match: SearchMatch,
@@ -359,3 +1261,199 @@ def context_around_match(
     start = max(0, match.start - before)
     end = min(len(context), match.end + after)
     return context_slice(context, start, end)
+
+
+@traced("context_view")
+def context_view(context: str, start: int, end: int) -> ContextView:
+    """
+    Return a zero-copy view of context[start:end].
+
+    Like context_slice, but no text is copied until the view is passed
+    to a subcall (or its .text is read). Views support sub-slicing,
+    expansion and merging; see rlm.views.ContextView.
+
+    Args:
+        context: The full context string (or bytes/mmap buffer)
+        start: Start position (inclusive, 0-indexed)
+        end: End position (exclusive)
+
+    Returns:
+        A ContextView over the clamped range
+
+    Example:
+        >>> views = [context_view(document, m.start - 200, m.end + 200) for m in matches]
+        >>> for view in ContextView.merge_all(views):
+        ...     analysis = semantic_subcall("Explain these errors.", view)
+    """
+    if not isinstance(start, int) or not isinstance(end, int):
+        raise ValueError(f"start and end must be integers, got {type(start).__name__}, {type(end).__name__}")
+
+    view = ContextView(context, start, end)
+
+    get_access_log().record(
+        operation="view",
+        start=view.start,
+        end=view.end,
+        context_length=view.source_length,
+        chars_accessed=len(view),
+    )
+
+    return view
+
+
+def context_view_around_match(
+    context: str,
+    match: SearchMatch,
+    before: int = 200,
+    after: int = 200,
+) -> ContextView:
+    """
+    Zero-copy counterpart of context_around_match.
+
+    Args:
+        context: The full context string
+        match: A SearchMatch from context_search
+        before: Characters to include before match
+        after: Characters to include after match
+
+    Returns:
+        A ContextView including the match with surrounding context
+    """
+    return context_view(context, match.start - before, match.end + after)
+
+
+def _default_token_cap() -> int:
+    """Per-subcall token limit of the running task (or the default config)."""
+    try:
+        return get_guard_state().config.max_tokens_per_subcall
+    except RuntimeError:
+        return GuardConfig().max_tokens_per_subcall
+
+
+@traced("plan_windows")
+def plan_windows(
+    context: str,
+    matches: list[SearchMatch],
+    before: int = 200,
+    after: int = 200,
+    max_tokens: int | None = None,
+    prompt: str = "",
+    gap: int = 0,
+    reserve_tokens: int = 32,
+) -> list[MatchWindow]:
+    """
+    Coalesce overlapping or adjacent match windows before issuing subcalls.
+
+    Each match gets a window [start - before, end + after). Windows that
+    overlap (or are within `gap` characters) are merged as long as the
+    merged window, plus the prompt and `reserve_tokens` for the text the
+    subcall helpers append to it, stays within the token cap. A single
+    window that already exceeds the cap is returned unmerged.
+
+    Args:
+        context: The full context string
+        matches: Matches from context_search (any order)
+        before: Characters to include before each match
+        after: Characters to include after each match
+        max_tokens: Token cap per window including the prompt
+            (default: GuardConfig.max_tokens_per_subcall of the running task)
+        prompt: The prompt that will accompany each window
+        gap: Also merge windows separated by at most this many characters
+        reserve_tokens: Headroom for text the subcall helpers add to the prompt
+
+    Returns:
+        Merged windows in position order, each with the matches it contains
+
+    Example:
+        >>> matches = context_search(logs, r"error|exception", max_hits=50)
+        >>> for window in plan_windows(logs, matches, before=100, after=200):
+        ...     chunk = context_slice(logs, window.start, window.end)
+        ...     # One subcall classifies every match in window.matches
+    """
+    if before < 0 or after < 0 or gap < 0:
+        raise ValueError("before, after and gap must be non-negative")
+
+    ordered = sorted(matches, key=lambda m: (m.start, m.end))
+    windows = list(_coalesce_windows(context, ordered, before, after, max_tokens, prompt, gap, reserve_tokens))
+
+    get_access_log().record(
+        operation="plan_windows",
+        context_length=len(context),
+        matches_found=len(matches),
+        windows=len(windows),
+        chars_accessed=0,  # Planning doesn't extract text
+    )
+
+    return windows
+
+
+def stream_windows(
+    context: str | CompressedContext,
+    matches: Iterable[SearchMatch],
+    before: int = 200,
+    after: int = 200,
+    max_tokens: int | None = None,
+    prompt: str = "",
+    gap: int = 0,
+    reserve_tokens: int = 32,
+) -> Iterator[MatchWindow]:
+    """
+    plan_windows for matches arriving in position order (e.g. from
+    context_search_iter): each window is yielded as soon as the next
+    match cannot join it, so subcalls can start while the scan goes on.
+
+    Example:
+        >>> hits = context_search_iter(logs, r"error|exception", max_hits=50)
+        >>> for window in stream_windows(logs, hits, before=100, after=200):
+        ...     chunk = context_slice(logs, window.start, window.end)
+    """
+    if before < 0 or after < 0 or gap < 0:
+        raise ValueError("before, after and gap must be non-negative")
+
+    windows = 0
+    try:
+        for window in _coalesce_windows(context, matches, before, after, max_tokens, prompt, gap, reserve_tokens):
+            windows += 1
+            yield window
+    finally:
+        get_access_log().record(
+            operation="plan_windows",
+            context_length=_known_length(context),
+            windows=windows,
+            chars_accessed=0,  # Planning doesn't extract text
+        )
+
+
+def _coalesce_windows(
+    context: str | CompressedContext,
+    matches: Iterable[SearchMatch],
+    before: int,
+    after: int,
+    max_tokens: int | None,
+    prompt: str,
+    gap: int,
+    reserve_tokens: int,
+) -> Iterator[MatchWindow]:
+    """Merge windows of position-ordered matches while they fit the token cap."""
+    cap = _default_token_cap() if max_tokens is None else max_tokens
+    budget = cap - reserve_tokens - (estimate_tokens(prompt) if prompt else 0)
+    length = _known_length(context)
+
+    cur_start = cur_end = 0
+    cur_matches: list[SearchMatch] = []
+
+    for match in matches:
+        start = max(0, match.start - before)
+        end = match.end + after if length is None else min(length, match.end + after)
+        if cur_matches and start <= cur_end + gap:
+            merged_end = max(cur_end, end)
+            if estimate_tokens(context[cur_start:merged_end]) <= budget:
+                cur_end = merged_end
+                cur_matches.append(match)
+                continue
+        if cur_matches:
+            yield MatchWindow(cur_start, cur_end, tuple(cur_matches))
+        cur_start, cur_end, cur_matches = start, end, [match]
+
+    if cur_matches:
+        yield MatchWindow(cur_start, cur_end, tuple(cur_matches))
@@ -0,0 +1,318 @@
+"""
+RLM Daemon
+
+Long-running worker that keeps the expensive parts of a run warm between
+jobs and accepts jobs over a local JSON API (TCP or Unix socket).
+
+Kept warm across jobs:
+- The OpenAI client (see subcalls._get_client)
+- Context strings and their indexes (see rlm.indexes)
+- Subcall responses (see rlm.cache)
+
+Each job carries its own GuardConfig and runs through run_task, so budget
+accounting and the context access log are isolated per job even when
+jobs execute concurrently.
+
+API:
+- GET  /health  Liveness and daemon statistics
+- GET  /tasks   Registered task names
+- GET  /metrics Prometheus text-format metrics
+- POST /jobs    Run a job, returning the run_task output
+
+Job payload:
+    {
+        "task": "find_errors_in_log",
+        "context": "...",                  # or "context_file": "/path/to/file"
+        "config": {"max_cost": 0.25}      # optional GuardConfig overrides
+    }
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import itertools
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+from .cache import enable_response_cache
+from .guards import GuardConfig
+from .indexes import get_index_cache
+from .metrics import get_metrics_registry
+from .runtime import run_task
+from .tokens import get_token_estimator
+
+
+# Largest accepted request body (inline contexts)
+MAX_REQUEST_BYTES = 256 * 1024 * 1024
+
+
+class JobRejectedError(Exception):
+    """Raised when a job payload is invalid or the daemon is at capacity."""
+
+    def __init__(self, status: int, message: str):
+        self.status = status
+        self.message = message
+        super().__init__(message)
+
+
+class ContextStore:
+    """
+    Bounded store of job contexts, deduplicated by content.
+
+    Returning the same string object for the same content lets the
+    identity-keyed index cache hit across jobs.
+    """
+
+    def __init__(self, max_contexts: int = 8):
+        self.max_contexts = max_contexts
+        self._by_file: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+        self._by_digest: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_file(self, path: str) -> str:
+        """Return the contents of a UTF-8 file, reusing the cached copy if unchanged."""
+        real = os.path.realpath(path)
+        st = os.stat(real)
+        key = (real, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._by_file.get(key)
+            if cached is not None:
+                self._by_file.move_to_end(key)
+                return cached
+
+        with open(real, encoding="utf-8") as f:
+            text = self.intern(f.read())
+
+        with self._lock:
+            self._by_file[key] = text
+            while len(self._by_file) > self.max_contexts:
+                self._by_file.popitem(last=False)
+        return text
+
+    def intern(self, text: str) -> str:
+        """Return a canonical string object for this content."""
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            cached = self._by_digest.get(digest)
+            if cached is not None:
+                self._by_digest.move_to_end(digest)
+                return cached
+            self._by_digest[digest] = text
+            while len(self._by_digest) > self.max_contexts:
+                self._by_digest.popitem(last=False)
+        return text
+
+
+class RLMDaemon:
+    """
+    Job executor shared by the HTTP and Unix-socket front ends.
+
+    Example:
+        >>> daemon = RLMDaemon({"analyze_document": analyze_document})
+        >>> daemon.serve_http("127.0.0.1", 8765)
+    """
+
+    def __init__(
+        self,
+        tasks: dict[str, Callable[[str], Any]],
+        default_config: GuardConfig | None = None,
+        max_concurrent_jobs: int = 4,
+        max_cached_contexts: int = 8,
+        cache_responses: bool = True,
+        max_cached_responses: int = 10_000,
+    ):
+        if max_concurrent_jobs < 1:
+            raise ValueError(f"max_concurrent_jobs must be positive, got {max_concurrent_jobs}")
+        self.tasks = dict(tasks)
+        self.default_config = default_config or GuardConfig()
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.contexts = ContextStore(max_cached_contexts)
+        self.response_cache = enable_response_cache(max_cached_responses) if cache_responses else None
+        get_index_cache().max_contexts = max(get_index_cache().max_contexts, max_cached_contexts)
+
+        self._slots = threading.BoundedSemaphore(max_concurrent_jobs)
+        self._job_ids = itertools.count(1)
+        self._stats_lock = threading.Lock()
+        self._jobs_completed = 0
+        self._jobs_rejected = 0
+        self._started = time.time()
+
+    def warm_up(self) -> None:
+        """Construct the OpenAI client up front if an API key is configured."""
+        if os.environ.get("OPENAI_API_KEY"):
+            from .subcalls import _get_client
+            _get_client()
+
+    def _build_config(self, overrides: Any) -> GuardConfig:
+        if overrides is None:
+            return self.default_config
+        if not isinstance(overrides, dict):
+            raise JobRejectedError(400, "config must be an object")
+        known = {f.name for f in dataclasses.fields(GuardConfig)}
+        unknown = sorted(set(overrides) - known)
+        if unknown:
+            raise JobRejectedError(400, f"Unknown config fields: {unknown}")
+        try:
+            return dataclasses.replace(self.default_config, **overrides)
+        except (TypeError, ValueError) as e:
+            raise JobRejectedError(400, f"Invalid config: {e}")
+
+    def _resolve_context(self, job: dict) -> str:
+        if "context" in job:
+            if not isinstance(job["context"], str):
+                raise JobRejectedError(400, "context must be a string")
+            return self.contexts.intern(job["context"])
+        if "context_file" in job:
+            try:
+                return self.contexts.load_file(str(job["context_file"]))
+            except (OSError, UnicodeDecodeError) as e:
+                raise JobRejectedError(400, f"Failed to read context file: {e}")
+        raise JobRejectedError(400, "job requires 'context' or 'context_file'")
+
+    def run_job(self, job: Any) -> dict[str, Any]:
+        """
+        Validate and execute a single job.
+
+        Raises:
+            JobRejectedError: Invalid payload (400) or daemon at capacity (503)
+        """
+        if not isinstance(job, dict):
+            raise JobRejectedError(400, "job must be a JSON object")
+        task_name = job.get("task")
+        if task_name not in self.tasks:
+            raise JobRejectedError(400, f"Unknown task: {task_name!r}")
+        config = self._build_config(job.get("config"))
+        context = self._resolve_context(job)
+
+        # Backpressure: reject instead of queueing unboundedly
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._jobs_rejected += 1
+            raise JobRejectedError(503, "Daemon at capacity, retry later")
+
+        job_id = next(self._job_ids)
+        started = time.perf_counter()
+        try:
+            output = run_task(
+                self.tasks[task_name], context, config,
+                source_path=job.get("context_file") if "context" not in job else None,
+            )
+        finally:
+            self._slots.release()
+
+        output["job"] = {
+            "id": job_id,
+            "task": task_name,
+            "wall_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        with self._stats_lock:
+            self._jobs_completed += 1
+        return output
+
+    def stats(self) -> dict[str, Any]:
+        """Return daemon statistics."""
+        with self._stats_lock:
+            stats = {
+                "status": "ok",
+                "uptime_seconds": round(time.time() - self._started, 2),
+                "jobs_completed": self._jobs_completed,
+                "jobs_rejected": self._jobs_rejected,
+                "max_concurrent_jobs": self.max_concurrent_jobs,
+            }
+        stats["index_cache"] = get_index_cache().stats()
+        stats["token_estimator"] = get_token_estimator().stats()
+        if self.response_cache is not None:
+            stats["response_cache"] = self.response_cache.stats()
+        return stats
+
+    def make_handler(self) -> type[BaseHTTPRequestHandler]:
+        """Create a request handler class bound to this daemon."""
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            server_version = "RLMDaemon/1.0"
+
+            def address_string(self) -> str:
+                # Unix sockets report an empty client address
+                if isinstance(self.client_address, tuple):
+                    return str(self.client_address[0])
+                return "unix"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass  # Keep the daemon quiet; results carry their own audit data
+
+            def _send_json(self, status: int, payload: Any) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                if self.path == "/health":
+                    self._send_json(200, daemon.stats())
+                elif self.path == "/tasks":
+                    self._send_json(200, {"tasks": sorted(daemon.tasks)})
+                elif self.path == "/metrics":
+                    body = get_metrics_registry().render_prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self._send_json(404, {"error": f"Not found: {self.path}"})
+
+            def do_POST(self) -> None:
+                if self.path != "/jobs":
+                    self._send_json(404, {"error": f"Not found: {self.path}"})
+                    return
+                try:
+                    try:
+                        length = int(self.headers.get("Content-Length", "0"))
+                    except ValueError:
+                        raise JobRejectedError(400, "Invalid Content-Length")
+                    if length < 0:
+                        raise JobRejectedError(400, "Invalid Content-Length")
+                    if length > MAX_REQUEST_BYTES:
+                        raise JobRejectedError(413, "Request body too large")
+                    try:
+                        job = json.loads(self.rfile.read(length) or b"null")
+                    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                        raise JobRejectedError(400, f"Invalid JSON: {e}")
+                    self._send_json(200, daemon.run_job(job))
+                except JobRejectedError as e:
+                    self._send_json(e.status, {"error": e.message})
+
+        return Handler
+
+    def serve_http(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """Serve the JSON API over HTTP until interrupted."""
+        server = ThreadingHTTPServer((host, port), self.make_handler())
+        server.daemon_threads = True
+        with server:
+            server.serve_forever()
+
+    def serve_unix(self, path: str) -> None:
+        """Serve the JSON API over a Unix domain socket until interrupted."""
+        if os.path.exists(path):
+            os.unlink(path)
+        server = _UnixHTTPServer(path, self.make_handler())
+        try:
+            with server:
+                server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
@@ -0,0 +1,171 @@
+"""
+RLM Dry Runs
+
+Predict what a task will cost before running it for real.
+
+A dry run executes the task with all context access for real (searches,
+slices, indexes, planning) but intercepts every subcall before it
+reaches the model. An intercepted call still passes the guard checks,
+and its *estimated* tokens and cost are charged to the dry run's own
+tally: the cost cap is checked against the projected spend and the
+budget planner plans with what is left of it, so a run that would be
+truncated is reported as such. Nothing is recorded in the guard state,
+so budget_summary shows what was really spent (nothing) and the
+per-helper usage histograms hold observations only. Instead of a model
+response the task receives a stub:
+
+- json / bool / choice helpers get an empty response, so they fall
+  back to the default the task passed (the task's own "no answer"
+  shape); json without a default yields {} and choice without a
+  default its first choice
+- raw helpers get a fixed placeholder
+
+Data-dependent branches therefore follow the "nothing found" path
+unless the task supplies its own stubs (DryRun(stubs={helper: text or
+callable(prompt, chunk)})).
+
+Latency is projected from the subcall latency observed so far in this
+process (the metrics registry, warm in the daemon) or a default: calls
+made from pipeline workers are spread over max_concurrent_subcalls,
+the others run one after another.
+
+Enabled per run with run_task(..., dry_run=True) or `run.py --dry-run`.
+Dry runs write nothing to the response cache or revision store.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Union
+
+from .guards import CostLimitError, get_guard_state
+from .metrics import SUBCALL_LATENCY
+from .planner import make_candidate
+
+# Per-call latency assumed before any subcall has been observed
+DEFAULT_LATENCY_SECONDS = 1.5
+
+# Response handed to raw subcalls
+PLACEHOLDER_RESPONSE = "[dry run: no response]"
+
+Stub = Union[str, Callable[[str, str], str]]
+
+
+class DryRun:
+    """
+    Subcall interceptor and tally for one dry run.
+
+    Attributes:
+        stubs: Response per helper ("raw", "json", "bool", "choice"),
+            either text or a function of (prompt, chunk)
+        latency_seconds: Per-call latency to project with (default:
+            observed mean for the model, else DEFAULT_LATENCY_SECONDS)
+        calls: Intercepted calls by helper, with estimated tokens
+        input_tokens: Estimated input tokens of all intercepted calls
+        output_tokens: Estimated output tokens of all intercepted calls
+        cost: Projected USD cost of all intercepted calls
+    """
+
+    def __init__(self, stubs: dict[str, Stub] | None = None, latency_seconds: float | None = None):
+        self.stubs = {"raw": PLACEHOLDER_RESPONSE, "json": "", "bool": "", "choice": ""}
+        self.stubs.update(stubs or {})
+        self.latency_seconds = latency_seconds
+        self.calls: dict[str, dict[str, int]] = {}
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.serial_calls = 0
+        self.concurrent_calls = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def intercept(self, prompt: str, context_chunk: str, helper: str) -> str:
+        """
+        Charge a subcall its estimated usage and return the stub response.
+
+        Raises:
+            BudgetExceededError: If the real call would have exceeded a limit
+        """
+        state = get_guard_state()
+        config = state.config
+        state.check_runtime()
+        self.check_cost(config.max_cost)
+        state.check_depth()
+        state.check_token_limit(prompt, context_chunk)
+
+        estimate = make_candidate(None, prompt, context_chunk, helper=helper)
+        cost = (
+            (estimate.input_tokens / 1000) * config.cost_per_1k_input +
+            (estimate.output_tokens / 1000) * config.cost_per_1k_output
+        )
+        with self._lock:
+            self.input_tokens += estimate.input_tokens
+            self.output_tokens += estimate.output_tokens
+            self.cost += cost
+            stats = self.calls.setdefault(helper, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+            stats["calls"] += 1
+            stats["input_tokens"] += estimate.input_tokens
+            stats["output_tokens"] += estimate.output_tokens
+            if threading.current_thread().name.startswith("rlm-pipeline"):
+                self.concurrent_calls += 1
+            else:
+                self.serial_calls += 1
+        self.check_cost(config.max_cost)
+
+        stub = self.stubs.get(helper, "")
+        return stub(prompt, context_chunk) if callable(stub) else stub
+
+    def check_cost(self, limit: float) -> None:
+        """Raise CostLimitError once the projected cost reaches limit."""
+        if self.cost >= limit:
+            raise CostLimitError(self.cost, limit)
+
+    def _latency(self, model: str) -> tuple[float, float, str]:
+        """(mean, p95, source) of the per-call latency to project with."""
+        if self.latency_seconds is not None:
+            return self.latency_seconds, self.latency_seconds, "given"
+        observed = SUBCALL_LATENCY.collect().get((model,))
+        if observed and observed["count"]:
+            return observed["sum"] / observed["count"], observed["0.95"], "observed"
+        return DEFAULT_LATENCY_SECONDS, DEFAULT_LATENCY_SECONDS, "default"
+
+    def report(self) -> dict[str, Any]:
+        """Projected calls, tokens, cost and wall time of the real run."""
+        state = get_guard_state()
+        config = state.config
+        mean, p95, source = self._latency(config.model)
+        rounds = self.serial_calls + math.ceil(self.concurrent_calls / config.max_concurrent_subcalls)
+        context_seconds = time.perf_counter() - self.started
+        return {
+            "calls": sum(stats["calls"] for stats in self.calls.values()),
+            "by_helper": {helper: dict(stats) for helper, stats in sorted(self.calls.items())},
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "projected_cost_usd": round(self.cost, 6),
+            "latency_per_call_seconds": round(mean, 3),
+            "latency_source": source,
+            "context_seconds": round(context_seconds, 3),
+            "projected_seconds": round(context_seconds + rounds * mean, 1),
+            "projected_seconds_p95": round(context_seconds + rounds * p95, 1),
+        }
+
+
+_active_dry_run: ContextVar[DryRun | None] = ContextVar("rlm_dry_run", default=None)
+
+
+def get_dry_run() -> DryRun | None:
+    """Get the dry run of the current task, if it is one."""
+    return _active_dry_run.get()
+
+
+def bind_dry_run(dry_run: DryRun | None) -> Token:
+    """Bind a dry run (or None) to the current task; returns the token for reset_dry_run."""
+    return _active_dry_run.set(dry_run)
+
+
+def reset_dry_run(token: Token) -> None:
+    """Restore the binding that was current before bind_dry_run."""
+    _active_dry_run.reset(token)
@@ -14,19 +14,31 @@ from __future__ import annotations
 
 import time
 import threading
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from typing import Any, Callable
 from contextlib import contextmanager
 
+from .histogram import LogHistogram
+from .metrics import BUDGET_VIOLATIONS_TOTAL, SUBCALLS_IN_FLIGHT, record_subcall
+from .tokens import count_tokens, get_token_estimator
+from .tracing import get_tracer
+
 
 class BudgetExceededError(Exception):
-    """Raised when any budget limit is exceeded."""
+    """
+    Raised when any budget limit is exceeded.
+
+    A task may set `partial_result` before re-raising, so run_task
+    reports the work finished before the limit was hit.
+    """
 
     def __init__(self, budget_type: str, limit: float, current: float, message: str = ""):
         self.budget_type = budget_type
         self.limit = limit
         self.current = current
         self.message = message or f"{budget_type} budget exceeded: {current:.4f} >= {limit:.4f}"
+        self.partial_result: Any = None
         super().__init__(self.message)
 
 
@@ -78,6 +90,11 @@ class CostLimitError(BudgetExceededError):
         )
 
 
+def estimate_tokens(text: str) -> int:
+    """Token estimate from the shared estimator (see rlm.tokens)."""
+    return count_tokens(text)
+
+
 @dataclass
 class GuardConfig:
     """
@@ -89,6 +106,8 @@ class GuardConfig:
         max_recursion_depth: Maximum subcall depth (fixed at 1)
         max_runtime_seconds: Maximum wall-clock time (default: 60s)
         model: OpenAI model to use (default: gpt-4o-mini)
+        max_concurrent_subcalls: Worker threads for pipelined subcalls
+            (default: 4; see rlm.pipeline)
         cost_per_1k_input: Cost per 1000 input tokens
         cost_per_1k_output: Cost per 1000 output tokens
     """
@@ -97,6 +116,7 @@ class GuardConfig:
     max_recursion_depth: int = 1  # Fixed, not configurable
     max_runtime_seconds: float = 60.0
     model: str = "gpt-4o-mini"
+    max_concurrent_subcalls: int = 4
     cost_per_1k_input: float = 0.00015  # gpt-4o-mini pricing
     cost_per_1k_output: float = 0.0006
 
@@ -106,12 +126,18 @@ class GuardConfig:
             raise ValueError("max_recursion_depth must be 1 (architectural constraint)")
 
 
+# Depth of the subcall being executed by the current thread / task
+_subcall_depth: ContextVar[int] = ContextVar("rlm_subcall_depth", default=0)
+
+
 @dataclass
 class GuardState:
     """
     Mutable state tracking for budget consumption.
 
-    Thread-safe accumulator for cost, calls, and timing.
+    Thread-safe accumulator for cost, calls, and timing. Per-call latency
+    and token counts are also kept as histograms keyed by
+    (model, helper), where helper is "raw", "json", "bool" or "choice".
     """
     config: GuardConfig
     total_cost: float = 0.0
@@ -119,9 +145,15 @@ class GuardState:
     total_input_tokens: int = 0
     total_output_tokens: int = 0
     start_time: float = field(default_factory=time.time)
-    current_depth: int = 0
+    cache_hits: int = 0
+    _histograms: dict[tuple[str, str], dict[str, LogHistogram]] = field(default_factory=dict, repr=False)
     _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
+    @property
+    def current_depth(self) -> int:
+        """Subcall depth of the calling thread / task (concurrent subcalls are siblings)."""
+        return _subcall_depth.get()
+
     def check_runtime(self) -> None:
         """Check if runtime limit exceeded. Raises RuntimeLimitError if so."""
         elapsed = time.time() - self.start_time
@@ -139,8 +171,8 @@ class GuardState:
             raise RecursionDepthError(self.current_depth + 1)
 
     def estimate_tokens(self, text: str) -> int:
-        """Rough token estimate: ~4 chars per token for English."""
-        return max(1, len(text) // 4)
+        """Token estimate from the shared estimator (see rlm.tokens)."""
+        return estimate_tokens(text)
 
     def check_token_limit(self, prompt: str, context_chunk: str) -> None:
         """Check if request would exceed per-subcall token limit."""
@@ -148,8 +180,14 @@ class GuardState:
         if estimated > self.config.max_tokens_per_subcall:
             raise TokenLimitError(estimated, self.config.max_tokens_per_subcall)
 
-    def record_usage(self, input_tokens: int, output_tokens: int) -> None:
-        """Record token usage and update cost accumulator."""
+    def record_usage(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        latency_seconds: float | None = None,
+        helper: str = "raw",
+    ) -> float:
+        """Record token usage, update cost accumulator and histograms, return call cost."""
         with self._lock:
             self.total_input_tokens += input_tokens
             self.total_output_tokens += output_tokens
@@ -161,21 +199,51 @@ class GuardState:
             )
             self.total_cost += cost
 
+            key = (self.config.model, helper)
+            hists = self._histograms.get(key)
+            if hists is None:
+                hists = self._histograms[key] = {
+                    "latency_ms": LogHistogram(),
+                    "input_tokens": LogHistogram(),
+                    "output_tokens": LogHistogram(),
+                }
+            if latency_seconds is not None:
+                hists["latency_ms"].record(latency_seconds * 1000)
+            hists["input_tokens"].record(input_tokens)
+            hists["output_tokens"].record(output_tokens)
+
+        return cost
+
+    def get_distributions(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Return p50/p95/p99 summaries nested as {model: {helper: {metric: stats}}}."""
+        with self._lock:
+            result: dict[str, dict[str, dict[str, Any]]] = {}
+            for (model, helper), hists in sorted(self._histograms.items()):
+                result.setdefault(model, {})[helper] = {
+                    name: hist.summary() for name, hist in hists.items()
+                }
+            return result
+
+    def record_cache_hit(self) -> None:
+        """Record a subcall answered from the response cache (no cost)."""
+        with self._lock:
+            self.cache_hits += 1
+
     @contextmanager
     def subcall_context(self):
         """
         Context manager for subcall depth tracking.
 
         Ensures depth is incremented on entry and decremented on exit,
-        even if an exception occurs.
+        even if an exception occurs. Depth is tracked per execution
+        context, so subcalls issued concurrently from worker threads
+        (see rlm.pipeline) do not count as nested.
         """
-        with self._lock:
-            self.current_depth += 1
+        token = _subcall_depth.set(_subcall_depth.get() + 1)
         try:
             yield
         finally:
-            with self._lock:
-                self.current_depth -= 1
+            _subcall_depth.reset(token)
 
     def get_summary(self) -> dict[str, Any]:
         """Return summary of budget consumption."""
@@ -187,25 +255,31 @@ class GuardState:
             "total_calls": self.total_calls,
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
+            "cache_hits": self.cache_hits,
             "elapsed_seconds": round(elapsed, 2),
             "runtime_limit_seconds": self.config.max_runtime_seconds,
+            "distributions": self.get_distributions(),
         }
 
 
-# Global guard state - initialized per task run
-_guard_state: GuardState | None = None
+# Guard state - initialized per task run. Held in a context variable so
+# concurrent tasks (daemon jobs, worker threads) keep isolated accounting.
+_guard_state: ContextVar[GuardState | None] = ContextVar("rlm_guard_state", default=None)
 
 
 def init_guards(config: GuardConfig | None = None) -> GuardState:
     """
     Initialize guard state for a new task.
 
+    Also freezes the token estimator's calibration for the run.
     Must be called before any subcalls. Returns the guard state
     for inspection/testing purposes.
     """
-    global _guard_state
-    _guard_state = GuardState(config=config or GuardConfig())
-    return _guard_state
+    state = GuardState(config=config or GuardConfig())
+    _guard_state.set(state)
+    # Chunkers, planners and the token guard agree for the whole run
+    get_token_estimator().freeze()
+    return state
 
 
 def get_guard_state() -> GuardState:
@@ -214,15 +288,17 @@ def get_guard_state() -> GuardState:
 
     Raises RuntimeError if guards not initialized.
     """
-    if _guard_state is None:
+    state = _guard_state.get()
+    if state is None:
         raise RuntimeError("Guards not initialized. Call init_guards() first.")
-    return _guard_state
+    return state
 
 
 def guarded_call(
     llm_function: Callable[[str, str], tuple[str, int, int]],
     prompt: str,
     context_chunk: str,
+    helper: str = "raw",
 ) -> str:
     """
     Execute an LLM call with full guard enforcement.
@@ -232,6 +308,7 @@ def guarded_call(
                      (response_text, input_tokens, output_tokens)
         prompt: The instruction/question for the LLM
         context_chunk: The bounded context slice to reason about
+        helper: Subcall helper type for latency/token histograms
 
     Returns:
         The LLM response text
@@ -240,7 +317,22 @@ def guarded_call(
         BudgetExceededError: If any budget limit is exceeded
         RuntimeError: If guards not initialized
     """
+    try:
+        return _guarded_call(llm_function, prompt, context_chunk, helper)
+    except BudgetExceededError as e:
+        BUDGET_VIOLATIONS_TOTAL.inc(budget_type=e.budget_type)
+        raise
+
+
+def _guarded_call(
+    llm_function: Callable[[str, str], tuple[str, int, int]],
+    prompt: str,
+    context_chunk: str,
+    helper: str,
+) -> str:
     state = get_guard_state()
+    tracer = get_tracer()
+    started = time.perf_counter() if tracer is not None else 0.0
 
     # Pre-flight checks
     state.check_runtime()
@@ -253,14 +345,37 @@ def guarded_call(
         # Re-check runtime in case of slow queue
         state.check_runtime()
 
-        response, input_tokens, output_tokens = llm_function(prompt, context_chunk)
+        call_started = time.perf_counter()
+        if tracer is not None:
+            tracer.add("guard_preflight", "guard", started, call_started)
+
+        SUBCALLS_IN_FLIGHT.inc()
+        try:
+            response, input_tokens, output_tokens = llm_function(prompt, context_chunk)
+        finally:
+            SUBCALLS_IN_FLIGHT.dec()
+
+        call_ended = time.perf_counter()
+        if tracer is not None:
+            tracer.add("llm_call", "network", call_started, call_ended, {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+            })
 
-        # Record usage
-        state.record_usage(input_tokens, output_tokens)
+        # Record usage and calibrate the token estimator against it
+        latency = call_ended - call_started
+        get_token_estimator().observe_usage(prompt, context_chunk, input_tokens)
+        cost = state.record_usage(input_tokens, output_tokens, latency, helper)
+        record_subcall(state.config.model, helper, input_tokens, output_tokens, cost, latency)
 
         # Post-flight cost check
         state.check_cost()
 
+    if tracer is not None:
+        ended = time.perf_counter()
+        tracer.add("guard_postflight", "guard", call_ended, ended)
+        tracer.add("guarded_call", "subcall", started, ended)
+
     return response
 
 
@@ -0,0 +1,103 @@
+"""
+RLM Streaming Histograms
+
+Compact fixed-log-bucket histograms for latency and token distributions.
+
+Values are counted in logarithmic buckets (8 per power of two, roughly 9%
+relative width), so memory stays bounded no matter how many values are
+recorded and percentiles are accurate to within one bucket.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+
+# Buckets per power of two; bucket upper bounds grow by 2 ** (1 / 8) ~ 9%
+_BUCKETS_PER_OCTAVE = 8
+_LOG_BASE = math.log(2) / _BUCKETS_PER_OCTAVE
+
+
+class LogHistogram:
+    """
+    Streaming histogram over non-negative values.
+
+    Attributes:
+        count: Number of recorded values
+        total: Sum of recorded values
+        min: Smallest recorded value
+        max: Largest recorded value
+    """
+
+    __slots__ = ("count", "total", "min", "max", "_zeros", "_buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._zeros = 0
+        self._buckets: dict[int, int] = {}
+
+    def record(self, value: float) -> None:
+        """Record a single value (negative values are clamped to 0)."""
+        if value <= 0:
+            value = 0.0
+            self._zeros += 1
+        else:
+            index = math.floor(math.log(value) / _LOG_BASE)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: LogHistogram) -> None:
+        """Add another histogram's counts into this one."""
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._zeros += other._zeros
+        for index, n in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + n
+
+    def percentile(self, q: float) -> float:
+        """
+        Return the approximate q-th percentile (q in [0, 100]).
+
+        The result is the geometric midpoint of the bucket holding the
+        percentile, clamped to the observed min/max.
+        """
+        if not 0 <= q <= 100:
+            raise ValueError(f"q must be in [0, 100], got {q}")
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = self._zeros
+        if seen >= rank:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                midpoint = math.exp((index + 0.5) * _LOG_BASE)
+                return min(max(midpoint, self.min), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        """Return the mean of recorded values."""
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self, ndigits: int = 2) -> dict[str, Any]:
+        """Return count, mean, p50/p95/p99 and max."""
+        return {
+            "count": self.count,
+            "mean": round(self.mean(), ndigits),
+            "p50": round(self.percentile(50), ndigits),
+            "p95": round(self.percentile(95), ndigits),
+            "p99": round(self.percentile(99), ndigits),
+            "max": round(self.max, ndigits),
+        }
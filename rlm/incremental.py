@@ -0,0 +1,187 @@
+"""
+RLM Incremental Contexts
+
+Append-only contexts for logs that keep growing between runs.
+
+An IncrementalContext commits appended data a whole line at a time and
+extends the indexes already built for it (line starts, token index,
+timestamps) over the new lines only, instead of rebuilding them. Together
+with its high-water mark and run_incremental (rlm.runtime), a refresh
+scans and analyzes only the content appended since the last completed
+run, so its cost scales with the delta rather than the file size.
+
+Indexes without an extend() method (passages, sections) are dropped on
+append and rebuilt on demand.
+
+For unbounded input (a pipe that never ends), max_chars bounds the
+text kept in memory: analyzed text beyond the bound is dropped from the
+front (optionally written to a spill file), and base_offset / base_line
+record where `text` now starts in the whole stream.
+
+Do not append while a task is running over the context: indexes are
+extended in place.
+"""
+
+from __future__ import annotations
+
+import codecs
+import os
+from typing import TextIO
+
+from .indexes import get_index_cache
+
+
+class IncrementalContext:
+    """
+    A context that grows by appends, e.g. a log being tailed.
+
+    Only complete lines are committed to `text`; a trailing partial line
+    waits in `pending` until its newline arrives (or flush() is called).
+
+    Attributes:
+        text: Committed content (pass this to tasks)
+        pending: Uncommitted partial last line
+        high_water_mark: End of the content already analyzed; advanced by
+            run_incremental after each completed run
+        path: File followed by refresh(), if any
+        max_chars: Bound on len(text); analyzed text past it is trimmed
+            from the front (None: keep everything)
+        spill: Text file that trimmed text is appended to, if any
+        base_offset: Position of text[0] in the whole stream
+        base_line: Lines of the stream before text[0]
+        result: Merged result of every completed run (set by
+            run_incremental); runs cut short by a budget leave it as is
+
+    Example:
+        >>> live = IncrementalContext.open("app.log")
+        >>> run_incremental(find_errors_in_log, live, merge=merge_error_reports)
+        >>> live.refresh()  # later: read what was appended
+        >>> run_incremental(find_errors_in_log, live, merge=merge_error_reports)
+        >>> report = live.result  # everything analyzed so far
+    """
+
+    def __init__(
+        self,
+        text: str = "",
+        path: str | None = None,
+        max_chars: int | None = None,
+        spill: TextIO | None = None,
+    ):
+        self.text = ""
+        self.pending = ""
+        self.high_water_mark = 0
+        self.path = path
+        self.max_chars = max_chars
+        self.spill = spill
+        self.base_offset = 0
+        self.base_line = 0
+        self.result = None
+        self._offset = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.append(text)
+
+    @classmethod
+    def open(cls, path: str) -> IncrementalContext:
+        """Create a context from a file's current content; refresh() follows it."""
+        context = cls(path=path)
+        context.refresh()
+        return context
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @property
+    def unanalyzed(self) -> int:
+        """Committed characters past the high-water mark."""
+        return len(self.text) - self.high_water_mark
+
+    def append(self, data: str) -> int:
+        """
+        Append data, committing every complete line.
+
+        Returns:
+            Number of characters committed to text
+        """
+        if not data:
+            return 0
+        data = self.pending + data
+        cut = data.rfind("\n") + 1
+        self.pending = data[cut:]
+        return self._commit(data[:cut])
+
+    def flush(self) -> int:
+        """Commit the pending partial line (e.g. at end of input)."""
+        data, self.pending = self.pending, ""
+        return self._commit(data)
+
+    def refresh(self) -> int:
+        """
+        Read what was appended to the followed file since the last read.
+
+        A file that shrank (truncated or rotated) is read again from the
+        start and the context is reset.
+
+        Returns:
+            Number of characters committed to text
+        """
+        if self.path is None:
+            raise ValueError("refresh() requires a context created with a path")
+        size = os.path.getsize(self.path)
+        if size < self._offset:
+            self.reset()
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        self._offset += len(data)
+        return self.append(self._decoder.decode(data))
+
+    def reset(self) -> None:
+        """Drop all content, indexes, the high-water mark and the merged result."""
+        get_index_cache().pop(self.text)
+        self.text = ""
+        self.pending = ""
+        self.high_water_mark = 0
+        self.base_offset = 0
+        self.base_line = 0
+        self.result = None
+        self._offset = 0
+        self._decoder.reset()
+
+    def trim(self, keep: int = 0) -> int:
+        """
+        Drop analyzed text from the front, keeping at least `keep`
+        characters before the high-water mark (whole lines only).
+
+        Returns:
+            Number of characters dropped
+        """
+        cut = self.text.rfind("\n", 0, max(0, self.high_water_mark - keep)) + 1
+        if not cut:
+            return 0
+        dropped = self.text[:cut]
+        if self.spill is not None:
+            self.spill.write(dropped)
+        get_index_cache().pop(self.text)
+        self.text = self.text[cut:]
+        self.high_water_mark -= cut
+        self.base_offset += cut
+        self.base_line += dropped.count("\n")
+        return cut
+
+    def _commit(self, data: str) -> int:
+        if not data:
+            return 0
+        if self.max_chars is not None and len(self.text) + len(data) > self.max_chars:
+            # Keep some analyzed text as lead-in for windows at the delta's start
+            self.trim(keep=min(self.max_chars // 4, max(0, self.max_chars - len(data))))
+        old = self.text
+        new = old + data
+        cache = get_index_cache()
+        indexes = cache.pop(old) if old else {}
+        for kind, index in indexes.items():
+            extend = getattr(index, "extend", None)
+            if extend is not None:
+                extend(new, len(old))
+                cache.put(new, kind, index)
+        self.text = new
+        return len(data)
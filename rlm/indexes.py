@@ -0,0 +1,499 @@
+"""
+RLM Context Indexes
+
+Derived lookup structures over a context string, built once and reused
+by the context access layer.
+
+Indexes are cached by context *identity*: the cache holds a reference to
+the context string itself, so an entry is only reused for the exact same
+object. Long-lived processes (daemon, worker pool) that keep a context in
+memory therefore pay index build time once per document, not once per task.
+
+Classes:
+- LineIndex: Sorted line start offsets for position -> line number lookups
+- ContextIndex: Inverted index of word tokens -> sorted positions
+- IndexCache: Bounded identity-keyed cache of per-context indexes
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Iterator, TypeVar
+
+
+I = TypeVar("I")
+
+_NEWLINE = re.compile("\n")
+_WORD = re.compile(r"\w+")
+
+# Patterns made only of word-character literals, \b and alternation can
+# only match inside a single \w+ token, so the token index can answer them
+_INDEXABLE = re.compile(
+    r"(?:\\b)?(?:\(\?:|\()?"
+    r"(?:\\b)?\w+(?:\\b)?(?:\|(?:\\b)?\w+(?:\\b)?)*"
+    r"\)?(?:\\b)?"
+)
+_WHOLE_WORDS = re.compile(r"\\b(?:\(\?:|\()?(\w+(?:\|\w+)*)\)?\\b")
+
+
+class LineIndex:
+    """
+    Line start offsets for a context.
+
+    Attributes:
+        starts: Sorted array of line start positions (first entry is 0)
+    """
+
+    __slots__ = ("starts",)
+
+    def __init__(self, starts: array):
+        self.starts = starts
+
+    @classmethod
+    def build(cls, context: str) -> LineIndex:
+        """Build a line index in a single pass over the context."""
+        index = cls(array("q", [0]))
+        index.extend(context, 0)
+        return index
+
+    def extend(self, context: str, start: int) -> None:
+        """Index the lines of context after start (a line start) in place."""
+        if not isinstance(self.starts, array):
+            self.starts = array("q", self.starts)  # Persisted arrays are read-only
+        self.starts.extend(m.end() for m in _NEWLINE.finditer(context, start))
+
+    def line_number(self, pos: int) -> int:
+        """Return the 1-indexed line number containing position pos."""
+        return bisect_right(self.starts, pos)
+
+    def line_start(self, line_number: int) -> int:
+        """Return the start offset of a 1-indexed line."""
+        return self.starts[line_number - 1]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def to_buffers(self) -> tuple[dict, dict[str, Any]]:
+        """Return (metadata, named arrays) for persisting (see rlm.sidecar)."""
+        return {}, {"starts": _narrow(self.starts)}
+
+    @classmethod
+    def from_buffers(cls, meta: dict, buffers: dict[str, Any]) -> LineIndex:
+        """Rebuild from persisted buffers (memoryviews are used as-is)."""
+        return cls(buffers["starts"])
+
+
+class ContextIndex:
+    """
+    Inverted index of the word tokens (\\w+ runs) in a context.
+
+    Built in one pass; afterwards literal and word-boundary searches are
+    answered from the vocabulary instead of rescanning the context.
+
+    Attributes:
+        postings: Token -> sorted array of start positions
+    """
+
+    __slots__ = ("postings", "_lowered", "_vocab")
+
+    def __init__(self, postings: Mapping[str, Sequence[int]]):
+        self.postings = postings
+        self._lowered: dict[str, list[str]] | None = None
+        self._vocab: dict[bool, tuple[str, array, list[str], list[str]]] | None = None
+
+    def to_buffers(self) -> tuple[dict, dict[str, Any]]:
+        """Return (metadata, named arrays) for persisting (see rlm.sidecar)."""
+        offsets = array("q", [0])
+        positions = array("q")
+        for token_positions in self.postings.values():
+            positions.extend(token_positions)
+            offsets.append(len(positions))
+        vocab = "\n".join(self.postings).encode("utf-8", "surrogatepass")
+        return {}, {"vocab": vocab, "offsets": _narrow(offsets), "positions": _narrow(positions)}
+
+    @classmethod
+    def from_buffers(cls, meta: dict, buffers: dict[str, Any]) -> ContextIndex:
+        """Rebuild from persisted buffers; posting lists stay memory-mapped."""
+        vocab = bytes(buffers["vocab"]).decode("utf-8", "surrogatepass")
+        tokens = vocab.split("\n") if vocab else []
+        return cls(_MappedPostings(tokens, buffers["offsets"], buffers["positions"]))
+
+    @classmethod
+    def build(cls, context: str) -> ContextIndex:
+        """Tokenize the context once and build the posting arrays."""
+        index = cls({})
+        index.extend(context, 0)
+        return index
+
+    def extend(self, context: str, start: int) -> None:
+        """
+        Index the tokens of context after start in place.
+
+        start must not fall inside a token (a line start is always safe).
+        """
+        if not isinstance(self.postings, dict):
+            # Persisted posting lists are read-only
+            self.postings = {token: array("q", positions) for token, positions in self.postings.items()}
+        postings = self.postings
+        new_tokens = False
+        for m in _WORD.finditer(context, start):
+            token = m.group()
+            positions = postings.get(token)
+            if positions is None:
+                positions = postings[token] = array("q")
+                new_tokens = True
+            positions.append(m.start())
+        if new_tokens:
+            self._lowered = None
+            self._vocab = None
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def _variants(self, word: str) -> list[str]:
+        """Vocabulary tokens equal to word ignoring (ASCII) case."""
+        if self._lowered is None:
+            lowered: dict[str, list[str]] = {}
+            for token in self.postings:
+                lowered.setdefault(token.lower(), []).append(token)
+            self._lowered = lowered
+        return self._lowered.get(word.lower(), [])
+
+    @staticmethod
+    def can_answer(pattern: str) -> bool:
+        """Whether every match of pattern lies within a single word token."""
+        return (
+            _INDEXABLE.fullmatch(pattern) is not None
+            and pattern.count("(") == pattern.count(")")
+        )
+
+    def matching_tokens(self, compiled: re.Pattern) -> list[str]:
+        """
+        Vocabulary tokens containing at least one match of compiled.
+
+        Whole-word ASCII queries (\\bword\\b, \\b(?:a|b)\\b) are dictionary
+        lookups. Other queries find candidate tokens with a substring scan
+        of the joined vocabulary, then apply the regex to each candidate,
+        so results follow regex semantics exactly.
+        """
+        ignore_case = bool(compiled.flags & re.IGNORECASE)
+        words = _whole_words(compiled.pattern)
+        if words is not None:
+            tokens: list[str] = []
+            for word in dict.fromkeys(words):
+                if ignore_case:
+                    tokens.extend(t for t in self._variants(word) if t.isascii())
+                elif word in self.postings:
+                    tokens.append(word)
+            if ignore_case:
+                # Non-ASCII tokens can case-fold onto ASCII words
+                tokens.extend(self._vocabulary(ignore_case)[3])
+            return [t for t in tokens if compiled.fullmatch(t)]
+
+        literals = _WORD.findall(compiled.pattern.replace("\\b", " "))
+        vocab, starts, ascii_tokens, other_tokens = self._vocabulary(ignore_case)
+        candidates: set[int] = set()
+        if all(lit.isascii() for lit in literals):
+            for lit in literals:
+                needle = lit.lower() if ignore_case else lit
+                pos = vocab.find(needle)
+                while pos != -1:
+                    i = bisect_right(starts, pos) - 1
+                    candidates.add(i)
+                    pos = vocab.find(needle, starts[i + 1]) if i + 1 < len(starts) else -1
+        else:
+            candidates.update(range(len(ascii_tokens)))
+
+        tokens = [ascii_tokens[i] for i in sorted(candidates)]
+        tokens.extend(other_tokens)
+        return [t for t in tokens if compiled.search(t)]
+
+    def _vocabulary(self, ignore_case: bool) -> tuple[str, array, list[str], list[str]]:
+        """
+        Joined ASCII vocabulary (lowercased when ignore_case) with token
+        start offsets, plus the non-ASCII tokens that are always checked
+        by regex (their case folding is not simple lowercasing).
+        """
+        if self._vocab is None:
+            self._vocab = {}
+        cached = self._vocab.get(ignore_case)
+        if cached is None:
+            ascii_tokens = [t for t in self.postings if t.isascii()]
+            other_tokens = [t for t in self.postings if not t.isascii()]
+            starts = array("q")
+            offset = 0
+            for token in ascii_tokens:
+                starts.append(offset)
+                offset += len(token) + 1
+            joined = "\n".join(ascii_tokens)
+            cached = (joined.lower() if ignore_case else joined, starts, ascii_tokens, other_tokens)
+            self._vocab[ignore_case] = cached
+        return cached
+
+    def occurrences(self, tokens: list[str], start: int = 0, end: int | None = None) -> Iterator[tuple[int, int]]:
+        """Yield (start, end) of every occurrence of tokens in position order."""
+        streams = []
+        for token in tokens:
+            positions = self.postings.get(token)
+            if not positions:
+                continue
+            lo = bisect_left(positions, start - len(token) + 1)
+            hi = len(positions) if end is None else bisect_left(positions, end)
+            streams.append(_spans(positions, lo, hi, len(token)))
+        return heapq.merge(*streams)
+
+    def search(self, context: str, compiled: re.Pattern, start: int, end: int) -> Iterator[re.Match]:
+        """
+        Yield the matches compiled.finditer(context, start, end) would
+        yield, running the regex only over candidate tokens.
+        """
+        for tok_start, tok_end in self.occurrences(self.matching_tokens(compiled), start, end):
+            yield from compiled.finditer(context, max(tok_start, start), min(tok_end, end))
+
+    def near(
+        self,
+        terms: list[str],
+        distance: int,
+        case_sensitive: bool = False,
+    ) -> Iterator[tuple[int, int]]:
+        """
+        Yield minimal (start, end) spans of at most `distance` characters
+        containing an occurrence of every term (whole tokens).
+        """
+        term_tokens = [
+            ([t] if t in self.postings else []) if case_sensitive else self._variants(t)
+            for t in terms
+        ]
+        if not term_tokens or not all(term_tokens):
+            return
+        streams = [self._tagged(tokens, i) for i, tokens in enumerate(term_tokens)]
+        last: list[tuple[int, int] | None] = [None] * len(terms)
+        prev_start = -1
+        for s, e, i in heapq.merge(*streams):
+            last[i] = (s, e)
+            if any(occ is None for occ in last):
+                continue
+            span_start = min(occ[0] for occ in last)
+            span_end = max(occ[1] for occ in last)
+            if span_end - span_start <= distance and span_start > prev_start:
+                prev_start = span_start
+                yield (span_start, span_end)
+
+    def lines_with_all(
+        self,
+        terms: list[str],
+        lines: LineIndex,
+        context_length: int,
+        case_sensitive: bool = False,
+    ) -> Iterator[tuple[int, int]]:
+        """
+        Yield (start, end) of each line containing every term (whole tokens).
+
+        Walks the rarest term's occurrences and probes the other terms'
+        posting arrays by binary search within each candidate line.
+        """
+        term_positions = []
+        for t in terms:
+            tokens = ([t] if t in self.postings else []) if case_sensitive else self._variants(t)
+            term_positions.append([self.postings[token] for token in tokens])
+        if not term_positions or not all(term_positions):
+            return
+        term_positions.sort(key=lambda arrays: sum(len(a) for a in arrays))
+        rarest, others = term_positions[0], term_positions[1:]
+
+        prev_line = 0
+        for pos in heapq.merge(*rarest):
+            line = lines.line_number(pos)
+            if line == prev_line:
+                continue
+            prev_line = line
+            line_start = lines.line_start(line)
+            line_end = lines.line_start(line + 1) if line < len(lines) else context_length
+            if all(_any_within(arrays, line_start, line_end) for arrays in others):
+                yield (line_start, line_end)
+
+    def _tagged(self, tokens: list[str], tag: int) -> Iterator[tuple[int, int, int]]:
+        for s, e in self.occurrences(tokens):
+            yield (s, e, tag)
+
+
+def _narrow(values: Sequence[int]) -> Sequence[int]:
+    """Store offsets as 32-bit when they fit, halving persisted size."""
+    if array("I").itemsize == 4 and (not values or max(values) < 2**32):
+        return array("I", values)
+    return values
+
+
+class _MappedPostings(Mapping):
+    """Read-only token -> positions mapping over flat persisted arrays."""
+
+    __slots__ = ("_ordinals", "_offsets", "_positions")
+
+    def __init__(self, tokens: list[str], offsets: Sequence[int], positions: Sequence[int]):
+        self._ordinals = {token: i for i, token in enumerate(tokens)}
+        self._offsets = offsets
+        self._positions = positions
+
+    def __getitem__(self, token: str) -> Sequence[int]:
+        i = self._ordinals[token]
+        return self._positions[self._offsets[i]:self._offsets[i + 1]]
+
+    def __contains__(self, token: object) -> bool:
+        return token in self._ordinals
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ordinals)
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+
+def _whole_words(pattern: str) -> list[str] | None:
+    """The words of a \\bword\\b / \\b(?:a|b)\\b / \\ba\\b|\\bb\\b pattern, if ASCII."""
+    words: list[str] = []
+    for alternative in pattern.split("|") if "(" not in pattern else [pattern]:
+        m = _WHOLE_WORDS.fullmatch(alternative)
+        if m is None or (m.group(0).count("(") != m.group(0).count(")")):
+            return None
+        words.extend(m.group(1).split("|"))
+    return words if all(w.isascii() for w in words) else None
+
+
+def _spans(positions: array, lo: int, hi: int, length: int) -> Iterator[tuple[int, int]]:
+    for i in range(lo, hi):
+        yield (positions[i], positions[i] + length)
+
+
+def _any_within(arrays: list[array], start: int, end: int) -> bool:
+    """Whether any sorted array has a value in [start, end)."""
+    for a in arrays:
+        i = bisect_left(a, start)
+        if i < len(a) and a[i] < end:
+            return True
+    return False
+
+
+class IndexCache:
+    """
+    Thread-safe LRU cache of indexes keyed by context identity.
+
+    Each entry keeps a strong reference to its context so the id() of
+    a cached context cannot be recycled by a different string.
+    """
+
+    def __init__(self, max_contexts: int = 8):
+        self.max_contexts = max_contexts
+        self._entries: OrderedDict[int, tuple[str, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, context: str, kind: str, builder: Callable[[str], I]) -> I:
+        """Return the cached index of this kind, building it on a miss."""
+        key = id(context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is context:
+                self._entries.move_to_end(key)
+                index = entry[1].get(kind)
+                if index is not None:
+                    return index
+
+        # Build outside the lock; concurrent builders race harmlessly
+        index = builder(context)
+        self.put(context, kind, index)
+        return index
+
+    def peek(self, context: str, kind: str) -> Any:
+        """Return the cached index of this kind, or None (never builds)."""
+        with self._lock:
+            entry = self._entries.get(id(context))
+            if entry is None or entry[0] is not context:
+                return None
+            return entry[1].get(kind)
+
+    def indexes(self, context: str) -> dict[str, Any]:
+        """Return all cached indexes of a context by kind."""
+        with self._lock:
+            entry = self._entries.get(id(context))
+            if entry is None or entry[0] is not context:
+                return {}
+            return dict(entry[1])
+
+    def put(self, context: str, kind: str, index: Any) -> None:
+        """Register a prebuilt index for a context."""
+        key = id(context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not context:
+                entry = (context, {})
+                self._entries[key] = entry
+            entry[1][kind] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_contexts:
+                self._entries.popitem(last=False)
+
+    def pop(self, context: str) -> dict[str, Any]:
+        """Remove and return all cached indexes of a context by kind."""
+        with self._lock:
+            entry = self._entries.get(id(context))
+            if entry is None or entry[0] is not context:
+                return {}
+            del self._entries[id(context)]
+            return entry[1]
+
+    def clear(self) -> None:
+        """Drop all cached indexes."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return cache occupancy statistics."""
+        with self._lock:
+            return {
+                "contexts": len(self._entries),
+                "max_contexts": self.max_contexts,
+                "indexes": sum(len(kinds) for _, kinds in self._entries.values()),
+            }
+
+
+# Module-level cache shared by the context access layer
+_index_cache = IndexCache()
+
+
+def get_index_cache() -> IndexCache:
+    """Get the shared index cache."""
+    return _index_cache
+
+
+# Index kinds known to the cache, by cache key; each class provides
+# build(context), to_buffers() and from_buffers(meta, buffers), and
+# optionally extend(context, start) for appended content (rlm.incremental)
+INDEX_KINDS: dict[str, type] = {
+    "lines": LineIndex,
+    "tokens": ContextIndex,
+}
+
+
+def register_index_kind(kind: str, cls: type) -> None:
+    """Make an index class persistable under a cache key (see rlm.sidecar)."""
+    INDEX_KINDS[kind] = cls
+
+
+def get_line_index(context: str) -> LineIndex:
+    """Get (or build and cache) the line index for a context."""
+    return _index_cache.get(context, "lines", LineIndex.build)
+
+
+def build_context_index(context: str) -> ContextIndex:
+    """Build (or reuse) the token index for a context and register it."""
+    return _index_cache.get(context, "tokens", ContextIndex.build)
+
+
+def get_context_index(context: str) -> ContextIndex | None:
+    """Return the registered token index for a context, if any."""
+    return _index_cache.peek(context, "tokens")
@@ -0,0 +1,467 @@
+"""
+RLM Job Queue
+
+Durable, SQLite-backed job queue for batch workloads, with a worker pool
+that executes jobs through run_task.
+
+Job lifecycle:
+    pending -> leased -> done
+                 |
+                 +-> pending (retry with backoff) -> ... -> dead (dead-letter)
+
+- Workers lease one job at a time; a lease must be renewed by heartbeat.
+- A lease that expires (worker crashed) makes the job available again.
+- Finished jobs are never leased again, so restarts do not reprocess them.
+- Jobs whose run ends with a transient error (network, overload, rate
+  limit; see runtime.TRANSIENT_ERRORS) are retried up to max_attempts,
+  then moved to the dead-letter state with their last output. Errors
+  that would recur (token or recursion limits, task exceptions, unknown
+  task, invalid config) are dead-lettered at once.
+- Completed and partial outputs (result, budget summary) are written back.
+
+Backpressure:
+- enqueue() raises QueueFullError once max_pending jobs are waiting.
+- Workers only lease when they have a free slot (no prefetching).
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .daemon import ContextStore
+from .guards import GuardConfig
+from .metrics import RETRIES_TOTAL
+from .runtime import run_task
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    task           TEXT    NOT NULL,
+    context        TEXT,
+    context_file   TEXT,
+    config         TEXT,
+    state          TEXT    NOT NULL DEFAULT 'pending',
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    max_attempts   INTEGER NOT NULL,
+    available_at   REAL    NOT NULL,
+    lease_owner    TEXT,
+    lease_expires  REAL,
+    status         TEXT,
+    output         TEXT,
+    error          TEXT,
+    created_at     REAL    NOT NULL,
+    updated_at     REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, available_at);
+"""
+
+JOB_STATES = ("pending", "leased", "done", "dead")
+
+
+class QueueFullError(Exception):
+    """Raised when enqueueing would exceed the queue's max_pending limit."""
+
+    def __init__(self, pending: int, limit: int):
+        self.pending = pending
+        self.limit = limit
+        super().__init__(f"Job queue full: {pending} pending >= {limit}")
+
+
+@dataclass(frozen=True)
+class Job:
+    """
+    A leased job.
+
+    Attributes:
+        id: Job id
+        task: Task name
+        context: Inline context text (or None)
+        context_file: Path to a context file (or None)
+        config: GuardConfig overrides
+        attempts: Number of leases so far, including this one
+        max_attempts: Attempts allowed before dead-lettering
+    """
+    id: int
+    task: str
+    context: str | None
+    context_file: str | None
+    config: dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue.
+
+    Safe to share between threads of one process, and between processes
+    pointing at the same database file.
+
+    Example:
+        >>> queue = JobQueue("jobs.db")
+        >>> job_id = queue.enqueue("find_errors_in_log", context_file="app.log")
+        >>> job = queue.lease("worker-1")
+        >>> queue.complete(job.id, "worker-1", output)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_pending: int | None = None,
+        retry_delay: float = 5.0,
+    ):
+        self.path = path
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(
+        self,
+        task: str,
+        context: str | None = None,
+        context_file: str | None = None,
+        config: dict[str, Any] | None = None,
+        max_attempts: int = 3,
+    ) -> int:
+        """
+        Add a job to the queue.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already waiting
+        """
+        if (context is None) == (context_file is None):
+            raise ValueError("Exactly one of context or context_file is required")
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be positive, got {max_attempts}")
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.max_pending is not None:
+                    pending = self._conn.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE state = 'pending'"
+                    ).fetchone()[0]
+                    if pending >= self.max_pending:
+                        raise QueueFullError(pending, self.max_pending)
+                cur = self._conn.execute(
+                    "INSERT INTO jobs (task, context, context_file, config, max_attempts,"
+                    " available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (task, context, context_file, json.dumps(config or {}), max_attempts, now, now, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cur.lastrowid
+
+    def lease(self, worker_id: str, lease_seconds: float = 60.0) -> Job | None:
+        """
+        Atomically lease the next available job, or return None.
+
+        Jobs whose previous lease expired are reclaimed here; if they have
+        used up their attempts they are dead-lettered instead.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'dead', error = COALESCE(error, 'Lease expired'),"
+                    " lease_owner = NULL, updated_at = ?"
+                    " WHERE state = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = self._conn.execute(
+                    "SELECT * FROM jobs"
+                    " WHERE (state = 'pending' AND available_at <= ?)"
+                    "    OR (state = 'leased' AND lease_expires < ?)"
+                    " ORDER BY available_at, id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'leased', attempts = attempts + 1,"
+                        " lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                        (worker_id, now + lease_seconds, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        return Job(
+            id=row["id"],
+            task=row["task"],
+            context=row["context"],
+            context_file=row["context_file"],
+            config=json.loads(row["config"] or "{}"),
+            attempts=row["attempts"] + 1,
+            max_attempts=row["max_attempts"],
+        )
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = 60.0) -> bool:
+        """Extend a lease. Returns False if the worker no longer holds it."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ?"
+                " WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (now + lease_seconds, now, job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, output: dict[str, Any]) -> bool:
+        """Write back a run_task output and mark the job done."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET state = 'done', status = ?, output = ?, error = ?,"
+                " lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                " WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (output.get("status"), json.dumps(output, ensure_ascii=False),
+                 output.get("error"), now, job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def fail(
+        self,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        output: dict[str, Any] | None = None,
+        retryable: bool = True,
+    ) -> str | None:
+        """
+        Record a failed attempt.
+
+        The job is retried with exponential backoff until max_attempts,
+        then dead-lettered. Non-retryable failures are dead-lettered at
+        once. Returns the job's new state, or None if the worker no
+        longer holds the lease.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT attempts, max_attempts FROM jobs"
+                    " WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                    (job_id, worker_id),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                attempts = row["attempts"]
+                exhausted = attempts >= row["max_attempts"]
+                state = "dead" if exhausted or not retryable else "pending"
+                delay = self.retry_delay * (2 ** (attempts - 1))
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, error = ?, status = ?, output = ?,"
+                    " available_at = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                    " WHERE id = ?",
+                    (state, error, output.get("status") if output else None,
+                     json.dumps(output, ensure_ascii=False) if output else None,
+                     now + delay, now, job_id),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if state == "pending":
+            RETRIES_TOTAL.inc()
+        return state
+
+    def requeue(self, job_id: int) -> bool:
+        """Move a dead-lettered job back to pending with fresh attempts."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET state = 'pending', attempts = 0, available_at = ?, updated_at = ?"
+                " WHERE id = ? AND state = 'dead'",
+                (now, now, job_id),
+            )
+        return cur.rowcount == 1
+
+    def get(self, job_id: int) -> dict[str, Any] | None:
+        """Return a job record (with parsed output), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row is not None else None
+
+    def dead_letters(self, limit: int = 100) -> list[dict[str, Any]]:
+        """Return dead-lettered jobs, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE state = 'dead' ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of jobs in each state."""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {state: 0 for state in JOB_STATES}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    def outstanding(self) -> int:
+        """Return the number of jobs not yet done or dead."""
+        counts = self.counts()
+        return counts["pending"] + counts["leased"]
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    record = dict(row)
+    record["config"] = json.loads(record["config"] or "{}")
+    if record["output"] is not None:
+        record["output"] = json.loads(record["output"])
+    return record
+
+
+class WorkerPool:
+    """
+    Pool of worker threads pulling jobs from a JobQueue.
+
+    Concurrency is bounded by the number of workers; each worker leases
+    a new job only after finishing its current one. A single heartbeat
+    thread keeps all active leases alive.
+
+    Example:
+        >>> pool = WorkerPool(queue, {"find_errors_in_log": find_errors_in_log}, workers=8)
+        >>> pool.run_until_empty()
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        tasks: dict[str, Callable[[str], Any]],
+        workers: int = 4,
+        default_config: GuardConfig | None = None,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 0.5,
+    ):
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        self.queue = queue
+        self.tasks = dict(tasks)
+        self.workers = workers
+        self.default_config = default_config or GuardConfig()
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.contexts = ContextStore()
+
+        self._pool_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._active: dict[int, str] = {}
+        self._active_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start worker and heartbeat threads."""
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work_loop,
+                args=(f"{self._pool_id}-w{i}",),
+                name=f"rlm-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="rlm-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+    def stop(self, wait: bool = True) -> None:
+        """Signal workers to stop after their current job."""
+        self._stop.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def run_until_empty(self) -> dict[str, int]:
+        """Process jobs until none are pending or leased, then stop."""
+        self.start()
+        try:
+            while self.queue.outstanding() > 0:
+                time.sleep(self.poll_interval)
+        finally:
+            self.stop()
+        return self.queue.counts()
+
+    def _work_loop(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            job = self.queue.lease(worker_id, self.lease_seconds)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            with self._active_lock:
+                self._active[job.id] = worker_id
+            try:
+                self._execute(job, worker_id)
+            finally:
+                with self._active_lock:
+                    self._active.pop(job.id, None)
+
+    def _execute(self, job: Job, worker_id: str) -> None:
+        task_fn = self.tasks.get(job.task)
+        if task_fn is None:
+            self.queue.fail(job.id, worker_id, f"Unknown task: {job.task!r}", retryable=False)
+            return
+
+        try:
+            config = dataclasses.replace(self.default_config, **job.config)
+        except (TypeError, ValueError) as e:
+            self.queue.fail(job.id, worker_id, f"Invalid config: {e}", retryable=False)
+            return
+
+        try:
+            if job.context is not None:
+                context = job.context
+            else:
+                context = self.contexts.load_file(job.context_file)
+        except (OSError, UnicodeDecodeError) as e:
+            self.queue.fail(job.id, worker_id, f"Failed to read context file: {e}")
+            return
+
+        output = run_task(task_fn, context, config, source_path=job.context_file)
+        output["job"] = {"id": job.id, "attempt": job.attempts, "worker": worker_id}
+
+        if output["status"] == "error":
+            self.queue.fail(
+                job.id, worker_id, output.get("error") or "Task error", output,
+                retryable=output.get("retryable", False),
+            )
+        else:
+            self.queue.complete(job.id, worker_id, output)
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(self.lease_seconds / 3, 0.05)
+        while not self._stop.wait(interval):
+            with self._active_lock:
+                active = list(self._active.items())
+            for job_id, worker_id in active:
+                self.queue.heartbeat(job_id, worker_id, self.lease_seconds)
@@ -0,0 +1,419 @@
+"""
+RLM Metrics
+
+Process-wide operational metrics for daemon and batch modes, exposed in
+the Prometheus text format (GET /metrics on the daemon) or dumped
+periodically to a file (e.g. for the node_exporter textfile collector).
+
+Updated from:
+- guarded_call: in-flight subcalls, calls, tokens, cost, latency
+- ContextAccessLog.record: context operations and characters scanned
+- run_task: task outcomes and budget violations by budget_type
+- subcalls / jobqueue: response cache lookups, job retries
+
+Counters are sharded per thread, so increments on the hot path touch only
+the calling thread's dictionary and take no lock. Shards of exited threads
+are folded into one total on collection and whenever a new thread's shard
+would grow the list past twice the live shards, so thread-per-request
+servers and per-run pipeline threads keep a bounded number of shards.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Iterable
+
+from .histogram import LogHistogram
+
+
+LabelKey = tuple[str, ...]
+
+# Shards kept before exited threads are folded, at the least
+MIN_SHARDS = 64
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class: name, help text and label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, Any]) -> LabelKey:
+        if not self.labelnames:
+            if labels:
+                raise ValueError(f"{self.name} takes no labels, got {sorted(labels)}")
+            return ()
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} requires label {e.args[0]!r}")
+
+    def _label_str(self, key: LabelKey, extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def collect(self) -> dict[LabelKey, Any]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        """Return Prometheus text exposition lines for this metric."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{self._label_str(key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter with per-thread shards.
+
+    inc() updates the calling thread's shard without locking; collect()
+    sums all shards. Shards of threads that have exited are folded into
+    a retired total by collect() and when new shards pile up.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._local = threading.local()
+        self._shards: list[tuple[threading.Thread, dict[LabelKey, float]]] = []
+        self._retired: dict[LabelKey, float] = {}
+        self._fold_at = MIN_SHARDS
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict[LabelKey, float]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: dict[LabelKey, float] = {}
+            self._local.shard = shard
+            with self._lock:
+                if len(self._shards) >= self._fold_at:
+                    self._fold_exited()
+                    self._fold_at = max(MIN_SHARDS, 2 * len(self._shards))
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _fold_exited(self) -> None:
+        """Move the counts of exited threads into the retired total (lock held)."""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for key, value in shard.items():
+                    self._retired[key] = self._retired.get(key, 0.0) + value
+        self._shards = live
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increment the counter (amount must be non-negative)."""
+        if amount < 0:
+            raise ValueError(f"Counter increment must be non-negative, got {amount}")
+        key = self._key(labels)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def collect(self) -> dict[LabelKey, float]:
+        totals: dict[LabelKey, float] = {}
+        with self._lock:
+            self._fold_exited()
+            for _, shard in self._shards:
+                for key, value in dict(shard).items():
+                    totals[key] = totals.get(key, 0.0) + value
+            for key, value in self._retired.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def value(self, **labels: Any) -> float:
+        """Return the current total for one label set."""
+        return self.collect().get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at collection time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelKey, float] = {}
+        self._function: Callable[[], float] | None = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Compute this (unlabeled) gauge by calling fn at collection time."""
+        self._function = fn
+
+    def collect(self) -> dict[LabelKey, float]:
+        if self._function is not None:
+            return {(): float(self._function())}
+        with self._lock:
+            return dict(self._values)
+
+    def value(self, **labels: Any) -> float:
+        return self.collect().get(self._key(labels), 0.0)
+
+
+class Summary(_Metric):
+    """Distribution exported as p50/p95/p99 quantiles plus _sum and _count."""
+
+    kind = "summary"
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._histograms: dict[LabelKey, LogHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = LogHistogram()
+            hist.record(value)
+
+    def collect(self) -> dict[LabelKey, dict[str, float]]:
+        with self._lock:
+            return {
+                key: {
+                    **{str(q): hist.percentile(q * 100) for q in self.QUANTILES},
+                    "sum": hist.total,
+                    "count": hist.count,
+                }
+                for key, hist in self._histograms.items()
+            }
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, stats in sorted(self.collect().items()):
+            for q in self.QUANTILES:
+                label = self._label_str(key, f'quantile="{q}"')
+                lines.append(f"{self.name}{label} {_format_value(stats[str(q)])}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {_format_value(stats['sum'])}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {_format_value(stats['count'])}")
+        return lines
+
+
+class RollingRate:
+    """Sum of values over a sliding time window, in per-second buckets."""
+
+    def __init__(self, window_seconds: float = 60.0):
+        self.window_seconds = window_seconds
+        self._buckets: deque[list[float]] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, amount: float) -> None:
+        now = int(time.time())
+        with self._lock:
+            if self._buckets and self._buckets[-1][0] == now:
+                self._buckets[-1][1] += amount
+            else:
+                self._buckets.append([now, amount])
+            self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._buckets and self._buckets[0][0] <= cutoff:
+            self._buckets.popleft()
+
+    def total(self) -> float:
+        """Return the sum over the current window."""
+        with self._lock:
+            self._expire(time.time())
+            return sum(amount for _, amount in self._buckets)
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def summary(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Summary:
+        return self._register(Summary(name, help, labelnames))
+
+    def render_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return all metric values as a JSON-friendly dict."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        result: dict[str, Any] = {}
+        for metric in metrics:
+            values = metric.collect()
+            if not metric.labelnames:
+                result[metric.name] = values.get((), 0.0)
+            else:
+                result[metric.name] = {",".join(key): value for key, value in values.items()}
+        return result
+
+    def write_to_file(self, path: str) -> None:
+        """Atomically write the Prometheus text format to a file."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+
+class MetricsDumper:
+    """
+    Background thread that periodically writes metrics to a file.
+
+    Example:
+        >>> dumper = MetricsDumper("/var/lib/node_exporter/rlm.prom", interval=15)
+        >>> dumper.start()
+    """
+
+    def __init__(self, path: str, interval: float = 15.0, registry: MetricsRegistry | None = None):
+        self.path = path
+        self.interval = interval
+        self.registry = registry or _registry
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="rlm-metrics-dumper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.registry.write_to_file(self.path)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.registry.write_to_file(self.path)
+
+
+# Process-wide registry and runtime metrics
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _registry
+
+
+SUBCALLS_IN_FLIGHT = _registry.gauge(
+    "rlm_subcalls_in_flight", "LLM subcalls currently executing")
+SUBCALLS_TOTAL = _registry.counter(
+    "rlm_subcalls_total", "Completed LLM subcalls", ("model", "helper"))
+TOKENS_TOTAL = _registry.counter(
+    "rlm_tokens_total", "Tokens consumed by subcalls", ("model", "direction"))
+COST_USD_TOTAL = _registry.counter(
+    "rlm_cost_usd_total", "Subcall spend in USD", ("model",))
+SUBCALL_LATENCY = _registry.summary(
+    "rlm_subcall_latency_seconds", "LLM subcall latency", ("model",))
+TOKENS_PER_SECOND = _registry.gauge(
+    "rlm_tokens_per_second", "Tokens consumed per second over the last minute")
+COST_USD_PER_MINUTE = _registry.gauge(
+    "rlm_cost_usd_per_minute", "Spend in USD over the last minute")
+CACHE_LOOKUPS_TOTAL = _registry.counter(
+    "rlm_response_cache_lookups_total", "Response cache lookups", ("result",))
+CACHE_HIT_RATIO = _registry.gauge(
+    "rlm_response_cache_hit_ratio", "Fraction of response cache lookups that hit")
+RETRIES_TOTAL = _registry.counter(
+    "rlm_retries_total", "Job attempts scheduled for retry")
+BUDGET_VIOLATIONS_TOTAL = _registry.counter(
+    "rlm_budget_violations_total", "Budget violations by type", ("budget_type",))
+TASKS_TOTAL = _registry.counter(
+    "rlm_tasks_total", "Finished task runs by status", ("status",))
+CONTEXT_OPERATIONS_TOTAL = _registry.counter(
+    "rlm_context_operations_total", "Context access operations", ("operation",))
+CONTEXT_CHARS_SCANNED_TOTAL = _registry.counter(
+    "rlm_context_chars_scanned_total", "Context characters scanned or extracted", ("operation",))
+
+_tokens_window = RollingRate(60.0)
+_cost_window = RollingRate(60.0)
+TOKENS_PER_SECOND.set_function(lambda: _tokens_window.total() / _tokens_window.window_seconds)
+COST_USD_PER_MINUTE.set_function(_cost_window.total)
+
+
+def _cache_hit_ratio() -> float:
+    lookups = CACHE_LOOKUPS_TOTAL.collect()
+    hits = lookups.get(("hit",), 0.0)
+    total = hits + lookups.get(("miss",), 0.0)
+    return hits / total if total else 0.0
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratio)
+
+
+def record_subcall(
+    model: str,
+    helper: str,
+    input_tokens: int,
+    output_tokens: int,
+    cost: float,
+    latency_seconds: float,
+) -> None:
+    """Record a completed subcall (called from guarded_call)."""
+    SUBCALLS_TOTAL.inc(model=model, helper=helper)
+    TOKENS_TOTAL.inc(input_tokens, model=model, direction="input")
+    TOKENS_TOTAL.inc(output_tokens, model=model, direction="output")
+    COST_USD_TOTAL.inc(cost, model=model)
+    SUBCALL_LATENCY.observe(latency_seconds, model=model)
+    _tokens_window.add(input_tokens + output_tokens)
+    _cost_window.add(cost)
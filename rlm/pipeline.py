@@ -0,0 +1,207 @@
+"""
+RLM Pipelines
+
+Overlap Phase 1 (programmatic narrowing) with Phase 2 (subcalls).
+
+Without a pipeline a task scans first and calls the LLM afterwards, so
+wall time is scan + LLM. A Pipeline runs the scan in the calling thread
+and hands each item it yields (a match window, a chunk) through a
+bounded queue to a pool of subcall workers. The first subcall starts as
+soon as the scan finds the first item, and a full queue blocks the scan
+(backpressure), so at most `queue_size` items wait in memory. Wall time
+approaches max(scan, LLM).
+
+Workers run in copies of the caller's contextvars context, so guard
+state, the access log, the tracer and the active revision of the task
+are shared with them; subcall depth is tracked per worker, so
+concurrent subcalls are siblings, not nested calls.
+
+Budget checks happen before each subcall, so up to `workers - 1`
+in-flight calls can finish after the cost limit is reached. With a
+`priority` function, waiting items are handed to workers highest
+priority first rather than in source order, so a run cut short by a
+budget limit has spent it on the most valuable items the scan had
+found; the items finished before the failure stay in `results`.
+
+Example:
+    >>> hits = context_search_iter(logs, r"error|exception", max_hits=50)
+    >>> windows = stream_windows(logs, hits, before=100, after=200, prompt=prompt)
+    >>> results = run_pipeline(windows, lambda w: semantic_subcall(prompt, context_view(logs, w.start, w.end)))
+"""
+
+from __future__ import annotations
+
+import contextvars
+import math
+import queue
+import threading
+import time
+from typing import Any, Callable, Generic, Iterable, TypeVar
+
+from .guards import GuardConfig, get_guard_state
+from .tracing import trace_span
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _default_workers() -> int:
+    """Concurrent subcalls allowed for the running task (or the default config)."""
+    try:
+        return get_guard_state().config.max_concurrent_subcalls
+    except RuntimeError:
+        return GuardConfig().max_concurrent_subcalls
+
+
+class Pipeline(Generic[T, R]):
+    """
+    A producer (any iterable) feeding concurrent workers through a bounded queue.
+
+    Attributes:
+        process: Function applied to each item by a worker (e.g. a subcall)
+        workers: Number of worker threads
+        queue_size: Items that may wait for a worker before the producer blocks
+        limit: Process at most this many items; the rest of the source is
+            still consumed (so scan-side counters stay complete) but skipped
+        priority: Function of an item; waiting items with higher priority
+            are started first (default: source order)
+        results: Results by item index, including those finished before
+            a failure
+        stats: Items produced / processed / skipped and time the producer
+            spent blocked on a full queue
+    """
+
+    def __init__(
+        self,
+        process: Callable[[T], R],
+        workers: int | None = None,
+        queue_size: int | None = None,
+        limit: int | None = None,
+        priority: Callable[[T], float] | None = None,
+    ):
+        workers = _default_workers() if workers is None else workers
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must be non-negative, got {limit}")
+        self.process = process
+        self.workers = workers
+        self.queue_size = 2 * workers if queue_size is None else max(1, queue_size)
+        self.limit = limit
+        self.priority = priority
+        self.results: dict[int, R] = {}
+        self.stats: dict[str, Any] = {}
+
+    def run(self, source: Iterable[T]) -> list[R]:
+        """
+        Feed every item of source to the workers and wait for them.
+
+        Returns:
+            Results in source order
+
+        Raises:
+            The first exception raised by a worker (e.g. a budget error),
+            after in-flight items finish; no new items are started once
+            a worker has failed
+        """
+        # Entries are (sort key, index, item); the index breaks ties in
+        # source order and end-of-input markers sort after every item
+        items: queue.Queue = (
+            queue.Queue(maxsize=self.queue_size) if self.priority is None
+            else queue.PriorityQueue(maxsize=self.queue_size)
+        )
+        errors: list[BaseException] = []
+        stop = threading.Event()
+        lock = threading.Lock()
+        self.results = {}
+        processed = 0
+
+        def work() -> None:
+            nonlocal processed
+            while True:
+                key, index, item = items.get()
+                if key == math.inf:
+                    return
+                if stop.is_set():
+                    continue  # Drain without starting new work
+                try:
+                    result = self.process(item)
+                except BaseException as e:
+                    with lock:
+                        errors.append(e)
+                    stop.set()
+                    continue
+                with lock:
+                    self.results[index] = result
+                    processed += 1
+
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(work,), name=f"rlm-pipeline-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        produced = skipped = 0
+        blocked = 0.0
+        try:
+            with trace_span("pipeline_produce", category="task"):
+                for item in source:
+                    if stop.is_set():
+                        break
+                    if self.limit is not None and produced >= self.limit:
+                        skipped += 1
+                        continue
+                    entry = (0.0 if self.priority is None else -self.priority(item), produced, item)
+                    if items.full():
+                        started = time.perf_counter()
+                        items.put(entry)  # Backpressure: wait for a worker
+                        blocked += time.perf_counter() - started
+                    else:
+                        items.put(entry)
+                    produced += 1
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for i in range(len(threads)):
+                items.put((math.inf, i, None))
+            with trace_span("pipeline_drain", category="task"):
+                for thread in threads:
+                    thread.join()
+            self.stats = {
+                "produced": produced,
+                "processed": processed,
+                "skipped": skipped,
+                "producer_blocked_seconds": round(blocked, 4),
+            }
+
+        if errors:
+            raise errors[0]
+        return [self.results[i] for i in sorted(self.results)]
+
+
+def run_pipeline(
+    source: Iterable[T],
+    process: Callable[[T], R],
+    workers: int | None = None,
+    queue_size: int | None = None,
+    limit: int | None = None,
+    priority: Callable[[T], float] | None = None,
+) -> list[R]:
+    """
+    Process the items of source concurrently as the source yields them.
+
+    Args:
+        source: Producer, ideally lazy (context_search_iter, stream_windows,
+            context_packed_chunks) so work starts before it is exhausted
+        process: Function applied to each item, e.g. one subcall
+        workers: Worker threads (default: GuardConfig.max_concurrent_subcalls)
+        queue_size: Bound on items waiting for a worker (default: 2 * workers)
+        limit: Process at most this many items (the source is still exhausted)
+        priority: Start waiting items with higher priority first
+
+    Returns:
+        Results in source order
+    """
+    return Pipeline(process, workers, queue_size, limit, priority).run(source)
@@ -0,0 +1,434 @@
+"""
+RLM Budget Planner
+
+Choose which candidate subcalls to make so coverage follows the budget.
+
+Tasks used to analyze a fixed number of hits (the first 5 windows, the
+top 3 passages) whatever max_cost allowed: a large budget bought no
+extra coverage and a tiny one could fail mid-task. Instead, Phase 1
+now produces every candidate it finds, each with an estimated cost and
+a priority, and plan_budget picks the subset with the greatest total
+priority whose estimated cost fits the remaining budget (a 0/1
+knapsack). Plan.dispatch then runs the chosen calls through a pipeline,
+highest priority first, so if estimates were low and a limit is hit
+anyway, the calls already made are the most valuable ones; the results
+finished by then are kept in Plan.results for a partial report.
+
+For lazy sources (context_search_iter + stream_windows, packed chunks)
+plan_stream keeps Phase 1 and Phase 2 overlapped where that costs no
+coverage: candidates arrive in bounded batches, and while the budget is
+sure to pay for every candidate the source can still yield (it declares
+an upper bound, `limit`), each batch is dispatched as it arrives. Once
+that is no longer certain, candidates are held back until the source is
+exhausted, optionally re-prioritized with statistics over all of them,
+and planned with one knapsack, so the plan is that of plan_budget over
+the whole set. Without a limit, plans are approximate: each batch may
+spend at most `share` of what is left of the budget on the best of the
+candidates held back so far, and the rest is planned once the source
+ends, so early candidates can still take budget a later, better one
+would have used.
+
+Costs are estimated from GuardConfig pricing: input tokens from the
+shared estimator plus a per-call overhead, output tokens from the mean
+observed so far in this task for the same helper (or a per-helper
+default before any call). A headroom factor absorbs estimation error.
+
+Example:
+    >>> candidates = [make_candidate(w, prompt, chunk, priority=len(w.matches))
+    ...               for w, chunk in windows]
+    >>> plan = plan_budget(candidates, reserve=estimate_call_cost(summary_prompt, summary_chunk))
+    >>> results = plan.dispatch(lambda w: semantic_subcall(prompt, ...))
+    >>> plan = plan_stream(batched(candidates_iter, 16), limit=200)  # overlapped with the scan
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Generic, Iterable, Iterator, Sequence, TypeVar
+
+from .guards import GuardConfig, estimate_tokens, get_guard_state
+from .pipeline import Pipeline
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy is optional
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Tokens of the system message and framing added to every subcall
+CALL_OVERHEAD_TOKENS = 60
+
+# Output tokens assumed per helper until this task has observed some
+DEFAULT_OUTPUT_TOKENS = {"raw": 200, "json": 120, "bool": 5, "choice": 10}
+
+# Budget buckets of the knapsack table (cost resolution = budget / this)
+KNAPSACK_RESOLUTION = 1000
+
+# Most candidates considered exactly; beyond this, the best by priority
+# per cost are kept first
+MAX_CANDIDATES = 500
+
+
+@dataclass(frozen=True)
+class Candidate(Generic[T]):
+    """
+    A subcall a task could make.
+
+    Attributes:
+        item: What the task needs to make the call (window, chunk, ...)
+        input_tokens: Estimated prompt + chunk tokens
+        output_tokens: Estimated response tokens
+        priority: Value of making the call (higher is better)
+    """
+    item: T
+    input_tokens: int
+    output_tokens: int
+    priority: float = 1.0
+
+
+@dataclass
+class Plan(Generic[T]):
+    """
+    The candidates chosen under a budget.
+
+    Attributes:
+        selected: Chosen candidates, in their original order
+        candidates: Number of candidates considered
+        budget: Budget the plan had to fit (after reserve and headroom)
+        estimated_cost: Estimated cost of the chosen calls
+        results: Results of dispatched calls by index into `selected`,
+            including those finished before a failure
+    """
+    selected: list[Candidate[T]]
+    candidates: int
+    budget: float
+    estimated_cost: float
+    results: dict[int, Any] = field(default_factory=dict)
+
+    @property
+    def items(self) -> list[T]:
+        return [c.item for c in self.selected]
+
+    @property
+    def skipped(self) -> int:
+        return self.candidates - len(self.selected)
+
+    def dispatch(self, process: Callable[[T], R], workers: int | None = None) -> list[R]:
+        """
+        Make the chosen calls concurrently, highest priority first.
+
+        Returns:
+            Results aligned with `selected`
+
+        Raises:
+            The first error of a call (e.g. a budget error); calls finished
+            before it are in `results` (see completed)
+        """
+        order = sorted(range(len(self.selected)), key=lambda i: -self.selected[i].priority)
+        pipeline = Pipeline(
+            lambda i: process(self.selected[i].item),
+            workers,
+            priority=lambda i: self.selected[i].priority,
+        )
+        try:
+            pipeline.run(order)
+        finally:
+            self.results = {order[k]: result for k, result in pipeline.results.items()}
+        return [self.results[i] for i in range(len(self.selected))]
+
+    def completed(self, by_priority: bool = False) -> list[tuple[T, Any]]:
+        """(item, result) of every finished call, in the candidates' original order or highest priority first."""
+        done = sorted(self.results)
+        if by_priority:
+            done.sort(key=lambda i: -self.selected[i].priority)
+        return [(self.selected[i].item, self.results[i]) for i in done]
+
+    def summary(self) -> dict[str, Any]:
+        """Coverage statistics for task output."""
+        return {
+            "candidates": self.candidates,
+            "selected": len(self.selected),
+            "estimated_cost_usd": round(self.estimated_cost, 6),
+            "planning_budget_usd": round(self.budget, 6),
+        }
+
+
+@dataclass
+class StreamPlan(Plan[T]):
+    """
+    A plan admitting candidates batch by batch while a lazy source runs.
+
+    `selected`, `candidates` and `estimated_cost` grow as batches are
+    planned during dispatch; `selected` is in admission order.
+
+    Attributes:
+        batches: Lists of candidates in arrival order
+        limit: Most candidates the source can yield (None: unbounded,
+            plans are approximate)
+        share: Without a limit, fraction of the remaining budget one
+            batch may spend
+        rescore: Re-prioritizes held-back candidates once the source is
+            exhausted (e.g. with statistics over all candidates)
+    """
+    batches: Iterable[Sequence[Candidate[T]]] = field(default=(), repr=False)
+    limit: int | None = None
+    share: float = 0.5
+    rescore: Callable[[list[Candidate[T]]], list[Candidate[T]]] | None = field(default=None, repr=False)
+
+    def _admit(self) -> Iterator[int]:
+        config = _config()
+        pool: list[Candidate[T]] = []
+        pool_cost = dearest = 0.0
+        for batch in self.batches:
+            self.candidates += len(batch)
+            for candidate in batch:
+                cost = _candidate_cost(candidate, config)
+                pool_cost += cost
+                dearest = max(dearest, cost)
+            pool.extend(batch)
+
+            remaining = self.budget - self.estimated_cost
+            if self.limit is not None:
+                # Dispatch now only if the budget pays for all that can still come
+                if pool_cost + max(0, self.limit - self.candidates) * dearest > remaining:
+                    continue
+                chosen = pool
+            else:
+                chosen = plan_budget(pool, budget=remaining * self.share, headroom=1.0).selected
+            yield from self._take(chosen, config)
+            taken = {id(c) for c in chosen}
+            pool = [c for c in pool if id(c) not in taken]
+            if len(pool) > MAX_CANDIDATES:
+                pool.sort(key=lambda c: c.priority / max(_candidate_cost(c, config), 1e-12), reverse=True)
+                del pool[MAX_CANDIDATES:]
+            pool_cost = sum(_candidate_cost(c, config) for c in pool)
+
+        if pool and self.rescore is not None:
+            pool = self.rescore(pool)
+        plan = plan_budget(pool, budget=self.budget - self.estimated_cost, headroom=1.0)
+        yield from self._take(plan.selected, config)
+
+    def _take(self, chosen: Sequence[Candidate[T]], config: GuardConfig) -> Iterator[int]:
+        """Admit candidates highest priority first."""
+        for candidate in sorted(chosen, key=lambda c: -c.priority):
+            self.selected.append(candidate)
+            self.estimated_cost += _candidate_cost(candidate, config)
+            yield len(self.selected) - 1
+
+    def dispatch(self, process: Callable[[T], R], workers: int | None = None) -> list[R]:
+        """
+        Plan each batch as the source yields it and make its calls concurrently.
+
+        Returns:
+            Results aligned with `selected`
+
+        Raises:
+            The first error of a call; calls finished before it are in
+            `results` (see completed)
+        """
+        pipeline = Pipeline(
+            lambda i: process(self.selected[i].item),
+            workers,
+            priority=lambda i: self.selected[i].priority,
+        )
+        try:
+            pipeline.run(self._admit())
+        finally:
+            self.results = dict(pipeline.results)  # Admission order is production order
+        return [self.results[i] for i in range(len(self.selected))]
+
+
+def _config() -> GuardConfig:
+    try:
+        return get_guard_state().config
+    except RuntimeError:
+        return GuardConfig()
+
+
+def expected_output_tokens(helper: str = "raw") -> int:
+    """Mean output tokens of this task's calls with helper (default before any)."""
+    default = DEFAULT_OUTPUT_TOKENS.get(helper, DEFAULT_OUTPUT_TOKENS["raw"])
+    try:
+        state = get_guard_state()
+    except RuntimeError:
+        return default
+    stats = state.get_distributions().get(state.config.model, {}).get(helper)
+    if not stats or stats["output_tokens"]["count"] < 3:
+        return default
+    return max(1, math.ceil(stats["output_tokens"]["mean"]))
+
+
+def make_candidate(item: T, prompt: str, chunk: str, priority: float = 1.0, helper: str = "raw") -> Candidate[T]:
+    """Build a candidate, estimating the tokens of sending chunk with prompt."""
+    return Candidate(
+        item=item,
+        input_tokens=estimate_tokens(prompt) + estimate_tokens(chunk) + CALL_OVERHEAD_TOKENS,
+        output_tokens=expected_output_tokens(helper),
+        priority=priority,
+    )
+
+
+def estimate_call_cost(prompt: str, chunk: str, helper: str = "raw") -> float:
+    """Estimated USD cost of one subcall with the running task's pricing."""
+    candidate = make_candidate(None, prompt, chunk, helper=helper)
+    return _candidate_cost(candidate, _config())
+
+
+def _candidate_cost(candidate: Candidate, config: GuardConfig) -> float:
+    return (
+        candidate.input_tokens / 1000 * config.cost_per_1k_input
+        + candidate.output_tokens / 1000 * config.cost_per_1k_output
+    )
+
+
+def remaining_budget() -> float:
+    """Cost budget left for the running task (the full default budget outside a task)."""
+    from .dryrun import get_dry_run  # dryrun imports this module
+
+    try:
+        state = get_guard_state()
+    except RuntimeError:
+        return GuardConfig().max_cost
+    dry_run = get_dry_run()
+    spent = state.total_cost if dry_run is None else dry_run.cost
+    return max(0.0, state.config.max_cost - spent)
+
+
+def plan_budget(
+    candidates: Sequence[Candidate[T]],
+    budget: float | None = None,
+    reserve: float = 0.0,
+    headroom: float = 0.9,
+) -> Plan[T]:
+    """
+    Choose the candidates with the greatest total priority within budget.
+
+    Args:
+        candidates: Candidate subcalls (any order)
+        budget: USD available (default: remaining budget of the running task)
+        reserve: USD to keep for calls the task makes after these
+        headroom: Fraction of the budget plans may use, absorbing
+            estimation error (default: 0.9)
+
+    Returns:
+        Plan whose `selected` keeps the candidates' original order
+    """
+    config = _config()
+    available = (remaining_budget() if budget is None else budget) * headroom - reserve
+    costs = [_candidate_cost(c, config) for c in candidates]
+
+    if available <= 0 or not candidates:
+        chosen: list[int] = []
+    elif sum(costs) <= available:
+        chosen = list(range(len(candidates)))
+    else:
+        chosen = _knapsack(candidates, costs, available)
+
+    chosen.sort()
+    return Plan(
+        selected=[candidates[i] for i in chosen],
+        candidates=len(candidates),
+        budget=max(0.0, available),
+        estimated_cost=sum(costs[i] for i in chosen),
+    )
+
+
+def plan_stream(
+    batches: Iterable[Sequence[Candidate[T]]],
+    budget: float | None = None,
+    reserve: float = 0.0,
+    headroom: float = 0.9,
+    limit: int | None = None,
+    rescore: Callable[[list[Candidate[T]]], list[Candidate[T]]] | None = None,
+    share: float = 0.5,
+) -> StreamPlan[T]:
+    """
+    Plan candidates from a lazy source one bounded batch at a time.
+
+    Nothing is read from `batches` until dispatch, so the scan producing
+    them overlaps with the calls of batches the budget surely covers.
+    With a limit the result is the plan_budget plan over all candidates
+    (assuming later candidates cost no more than the dearest so far);
+    without one it is approximate (see the module docstring).
+
+    Args:
+        batches: Lists of candidates in arrival order (see batched)
+        budget: USD available (default: remaining budget of the running task)
+        reserve: USD to keep for calls the task makes after these
+        headroom: Fraction of the budget plans may use (default: 0.9)
+        limit: Most candidates the source can yield (e.g. its max_hits)
+        rescore: Re-prioritizes held-back candidates before the final plan
+        share: Without a limit, fraction of the remaining budget one
+            batch may spend (default: 0.5)
+
+    Returns:
+        StreamPlan to dispatch
+    """
+    if not 0 < share <= 1:
+        raise ValueError(f"share must be in (0, 1], got {share}")
+    available = (remaining_budget() if budget is None else budget) * headroom - reserve
+    return StreamPlan(
+        selected=[],
+        candidates=0,
+        budget=max(0.0, available),
+        estimated_cost=0.0,
+        batches=batches,
+        limit=limit,
+        share=share,
+        rescore=rescore,
+    )
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Lists of up to size consecutive items (the last may be shorter)."""
+    if size < 1:
+        raise ValueError(f"size must be positive, got {size}")
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _knapsack(candidates: Sequence[Candidate], costs: list[float], capacity: float) -> list[int]:
+    """0/1 knapsack over costs rounded up to budget buckets (never over capacity)."""
+    ids = [i for i in range(len(candidates)) if costs[i] <= capacity and candidates[i].priority > 0]
+    if len(ids) > MAX_CANDIDATES:
+        ids.sort(key=lambda i: candidates[i].priority / max(costs[i], 1e-12), reverse=True)
+        ids = ids[:MAX_CANDIDATES]
+
+    unit = capacity / KNAPSACK_RESOLUTION
+    weights = [max(1, math.ceil(costs[i] / unit)) for i in ids]
+    values = [candidates[i].priority for i in ids]
+    size = KNAPSACK_RESOLUTION + 1
+
+    # best[w]: greatest priority within w buckets; keep[k][w]: item k taken at w
+    keep: list[Any] = []
+    if np is not None:
+        best = np.zeros(size)
+        for weight, value in zip(weights, values):
+            take = np.full(size, -np.inf)
+            take[weight:] = best[:size - weight] + value
+            taken = take > best
+            best = np.where(taken, take, best)
+            keep.append(taken)
+    else:
+        best = [0.0] * size
+        for weight, value in zip(weights, values):
+            taken = bytearray(size)
+            for w in range(size - 1, weight - 1, -1):
+                candidate = best[w - weight] + value
+                if candidate > best[w]:
+                    best[w] = candidate
+                    taken[w] = 1
+            keep.append(taken)
+
+    chosen = []
+    w = size - 1
+    for k in range(len(ids) - 1, -1, -1):
+        if keep[k][w]:
+            chosen.append(ids[k])
+            w -= weights[k]
+    return chosen
@@ -0,0 +1,218 @@
+"""
+RLM Passage Ranking
+
+BM25 relevance ranking over fixed passages of a context, so tasks can
+spend a fixed number of subcalls on the most relevant regions instead of
+the earliest regex hits.
+
+The context is split once into passages (paragraphs, with long ones cut
+at line boundaries) and a term -> (passage, frequency) index is built in
+compressed sparse form. Queries are scored with NumPy when it is
+installed and with a pure-Python accumulator otherwise; both give the
+same scores.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any
+
+from .indexes import get_index_cache, register_index_kind
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy is optional
+
+
+_TERM = re.compile(r"\w+")
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+
+# Default BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word terms of a text."""
+    return _TERM.findall(text.lower())
+
+
+def passage_spans(context: str, max_chars: int = 1000) -> list[tuple[int, int]]:
+    """
+    Split context into passages: paragraphs, with paragraphs longer than
+    max_chars cut at the last line break that keeps them within it.
+    """
+    spans: list[tuple[int, int]] = []
+    pos = 0
+    breaks = [m.end() for m in _PARAGRAPH_BREAK.finditer(context)] + [len(context)]
+    for end in breaks:
+        while end - pos > max_chars:
+            cut = context.rfind("\n", pos + 1, pos + max_chars)
+            cut = pos + max_chars if cut == -1 else cut + 1
+            spans.append((pos, cut))
+            pos = cut
+        if end > pos:
+            spans.append((pos, end))
+            pos = end
+    return spans
+
+
+class PassageIndex:
+    """
+    BM25 index over the passages of a context.
+
+    Attributes:
+        starts, ends: Passage spans
+        lengths: Number of terms in each passage
+        terms: Term -> ordinal
+        term_offsets: CSR row offsets into passage_ids / freqs per term
+        passage_ids, freqs: Postings (passage ordinal, term frequency)
+    """
+
+    __slots__ = ("starts", "ends", "lengths", "terms", "term_offsets", "passage_ids", "freqs", "avg_length")
+
+    def __init__(
+        self,
+        starts: Sequence[int],
+        ends: Sequence[int],
+        lengths: Sequence[int],
+        terms: dict[str, int],
+        term_offsets: Sequence[int],
+        passage_ids: Sequence[int],
+        freqs: Sequence[int],
+    ):
+        self.starts = starts
+        self.ends = ends
+        self.lengths = lengths
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.passage_ids = passage_ids
+        self.freqs = freqs
+        self.avg_length = (sum(lengths) / len(lengths)) if len(lengths) else 0.0
+
+    @classmethod
+    def build(cls, context: str, max_chars: int = 1000) -> PassageIndex:
+        """Split the context into passages and index their terms in one pass."""
+        spans = passage_spans(context, max_chars)
+        postings: dict[str, tuple[array, array]] = {}
+        lengths = array("I")
+        for pid, (start, end) in enumerate(spans):
+            counts = Counter(tokenize(context[start:end]))
+            lengths.append(sum(counts.values()))
+            for term, n in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("I"), array("I"))
+                entry[0].append(pid)
+                entry[1].append(n)
+
+        terms: dict[str, int] = {}
+        term_offsets = array("q", [0])
+        passage_ids = array("I")
+        freqs = array("I")
+        for i, (term, (pids, tfs)) in enumerate(postings.items()):
+            terms[term] = i
+            passage_ids.extend(pids)
+            freqs.extend(tfs)
+            term_offsets.append(len(passage_ids))
+
+        return cls(
+            array("q", (s for s, _ in spans)),
+            array("q", (e for _, e in spans)),
+            lengths, terms, term_offsets, passage_ids, freqs,
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def to_buffers(self) -> tuple[dict, dict[str, Any]]:
+        """Return (metadata, named arrays) for persisting (see rlm.sidecar)."""
+        vocab = "\n".join(self.terms).encode("utf-8", "surrogatepass")
+        return {}, {
+            "starts": self.starts,
+            "ends": self.ends,
+            "lengths": self.lengths,
+            "vocab": vocab,
+            "term_offsets": self.term_offsets,
+            "passage_ids": self.passage_ids,
+            "freqs": self.freqs,
+        }
+
+    @classmethod
+    def from_buffers(cls, meta: dict, buffers: dict[str, Any]) -> PassageIndex:
+        """Rebuild from persisted buffers; arrays stay memory-mapped."""
+        vocab = bytes(buffers["vocab"]).decode("utf-8", "surrogatepass")
+        terms = {term: i for i, term in enumerate(vocab.split("\n"))} if vocab else {}
+        return cls(
+            buffers["starts"], buffers["ends"], buffers["lengths"], terms,
+            buffers["term_offsets"], buffers["passage_ids"], buffers["freqs"],
+        )
+
+    def _postings(self, term: str) -> tuple[Sequence[int], Sequence[int]] | None:
+        i = self.terms.get(term)
+        if i is None:
+            return None
+        lo, hi = self.term_offsets[i], self.term_offsets[i + 1]
+        return self.passage_ids[lo:hi], self.freqs[lo:hi]
+
+    def _idf(self, df: int) -> float:
+        n = len(self.starts)
+        return math.log((n - df + 0.5) / (df + 0.5) + 1.0)
+
+    def top_k(self, query: str, k: int, k1: float = K1, b: float = B) -> list[tuple[int, float]]:
+        """
+        Score passages against a query with BM25.
+
+        Returns:
+            Up to k (passage ordinal, score) pairs, best first; passages
+            sharing no term with the query are never returned
+        """
+        query_terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.terms]
+        if not query_terms or k < 1:
+            return []
+        if np is not None:
+            return self._top_k_numpy(query_terms, k, k1, b)
+
+        scores: dict[int, float] = {}
+        avg = self.avg_length or 1.0
+        for term in query_terms:
+            pids, tfs = self._postings(term)
+            idf = self._idf(len(pids))
+            for pid, tf in zip(pids, tfs):
+                norm = k1 * (1.0 - b + b * self.lengths[pid] / avg)
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        return heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _top_k_numpy(self, query_terms: list[str], k: int, k1: float, b: float) -> list[tuple[int, float]]:
+        lengths = np.asarray(self.lengths, dtype=np.float64)
+        avg = self.avg_length or 1.0
+        scores = np.zeros(len(lengths), dtype=np.float64)
+        for term in query_terms:
+            pids, tfs = self._postings(term)
+            pids = np.asarray(pids, dtype=np.intp)
+            tfs = np.asarray(tfs, dtype=np.float64)
+            norm = k1 * (1.0 - b + b * lengths[pids] / avg)
+            # Passage ids are unique per term, so fancy-index += is safe
+            scores[pids] += self._idf(len(pids)) * tfs * (k1 + 1.0) / (tfs + norm)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            # Keep everything tied with the k-th best so ties break by position
+            kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[scores[candidates] >= kth]
+        order = sorted(candidates.tolist(), key=lambda pid: (-scores[pid], pid))[:k]
+        return [(pid, float(scores[pid])) for pid in order]
+
+
+register_index_kind("passages", PassageIndex)
+
+
+def get_passage_index(context: str) -> PassageIndex:
+    """Get (or build and cache) the passage index for a context."""
+    return get_index_cache().get(context, "passages", PassageIndex.build)
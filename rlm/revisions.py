@@ -0,0 +1,225 @@
+"""
+RLM Document Revisions
+
+Re-analysis of a new version of a document at the cost of its changes.
+
+A RevisionStore keeps, per document key (e.g. the file path), the text
+of the last analyzed version, the subcall responses that run used and
+the chunk boundaries context_packed_chunks chose. On the next run over
+an edited version:
+
+- The two versions are aligned line by line (unchanged lines are
+  matched by hash with difflib), giving the unchanged regions.
+- context_packed_chunks reuses the previous boundaries wherever a chunk
+  lies entirely in unchanged text, and packs fresh chunks only across
+  the changed spans, so unchanged chunks are byte-identical to last time.
+- semantic_subcall answers any request whose (model, prompt, chunk) was
+  answered in the previous run from the stored response, without cost.
+
+Other chunkers (sections, ranked passages, head/tail, match windows)
+produce identical chunks for unchanged regions on their own, so their
+subcalls are reused by the same lookup.
+
+Enabled per run with run_task(..., revisions=RevisionStore(dir),
+revision_key=...) or `run.py --revisions DIR`.
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_right
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class Alignment:
+    """
+    Unchanged regions shared by two versions of a text.
+
+    Attributes:
+        blocks: (old_start, new_start, length) of each unchanged region,
+            in order in both versions
+        new_length: Length of the new version
+    """
+    blocks: list[tuple[int, int, int]]
+    new_length: int
+
+    @property
+    def unchanged_chars(self) -> int:
+        return sum(length for _, _, length in self.blocks)
+
+    def to_new(self, old_start: int, old_end: int) -> tuple[int, int] | None:
+        """Map an old span into the new version if it is entirely unchanged."""
+        i = bisect_right(self.blocks, (old_start, float("inf"), 0)) - 1
+        if i < 0:
+            return None
+        block_old, block_new, length = self.blocks[i]
+        if old_end > block_old + length:
+            return None
+        return block_new + old_start - block_old, block_new + old_end - block_old
+
+    def changed_spans(self) -> list[tuple[int, int]]:
+        """Spans of the new version not covered by an unchanged region."""
+        spans = []
+        pos = 0
+        for _, new_start, length in self.blocks:
+            if new_start > pos:
+                spans.append((pos, new_start))
+            pos = new_start + length
+        if pos < self.new_length:
+            spans.append((pos, self.new_length))
+        return spans
+
+
+def align(old: str, new: str) -> Alignment:
+    """Find the unchanged regions of two versions by matching whole lines."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_starts = _line_starts(old_lines)
+    new_starts = _line_starts(new_lines)
+
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    blocks: list[tuple[int, int, int]] = []
+    for a, b, size in matcher.get_matching_blocks():
+        if not size:
+            continue
+        length = old_starts[a + size] - old_starts[a]
+        if blocks and blocks[-1][0] + blocks[-1][2] == old_starts[a] and blocks[-1][1] + blocks[-1][2] == new_starts[b]:
+            prev_old, prev_new, prev_length = blocks.pop()
+            blocks.append((prev_old, prev_new, prev_length + length))
+        else:
+            blocks.append((old_starts[a], new_starts[b], length))
+    return Alignment(blocks, len(new))
+
+
+def _line_starts(lines: list[str]) -> list[int]:
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+    return starts
+
+
+@dataclass
+class Revision:
+    """
+    State of one document across two runs.
+
+    Attributes:
+        key: Document key in the store
+        previous: Text of the previously analyzed version (None on the first run)
+        responses: Subcall responses of the previous run, by cache key
+        chunks: Packed chunk boundaries of the previous run, by chunking
+            scheme (unit, token cap and prompt)
+        current: Text of the version being analyzed
+    """
+    key: str
+    previous: str | None = None
+    responses: dict[str, str] = field(default_factory=dict)
+    chunks: dict[str, list[list[int]]] = field(default_factory=dict)
+    current: str | None = None
+    reused: int = 0
+    new_responses: dict[str, str] = field(default_factory=dict)
+    new_chunks: dict[str, list[list[int]]] = field(default_factory=dict)
+    _alignment: Alignment | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def alignment(self, context: str) -> Alignment | None:
+        """Alignment of the previous version to context, if context is the current version."""
+        if self.previous is None or context is not self.current:
+            return None
+        with self._lock:
+            if self._alignment is None:
+                self._alignment = align(self.previous, self.current)
+            return self._alignment
+
+    def lookup(self, key: str) -> str | None:
+        """Return the previous run's response for a subcall, keeping it for the next run."""
+        with self._lock:
+            response = self.responses.get(key)
+            if response is not None:
+                self.new_responses[key] = response
+                self.reused += 1
+            return response
+
+    def record(self, key: str, response: str) -> None:
+        """Keep a new subcall response for the next run."""
+        with self._lock:
+            self.new_responses[key] = response
+
+    def previous_chunks(self, scheme: str) -> list[list[int]]:
+        """Chunk boundaries the previous run used under a chunking scheme."""
+        return self.chunks.get(scheme, [])
+
+    def record_chunk(self, scheme: str, start: int, end: int) -> None:
+        """Keep a chunk boundary of this run for the next one."""
+        with self._lock:
+            self.new_chunks.setdefault(scheme, []).append([start, end])
+
+    def summary(self) -> dict:
+        """Reuse statistics for the run output."""
+        summary = {"previous_version": self.previous is not None, "reused_responses": self.reused}
+        if self._alignment is not None and self.current:
+            summary["unchanged_ratio"] = round(self._alignment.unchanged_chars / len(self.current), 4)
+        return summary
+
+
+class RevisionStore:
+    """
+    Directory of previously analyzed document versions.
+
+    Each key is stored as <hash>.txt (the text) and <hash>.json
+    (responses and chunk boundaries), written atomically. Only the
+    responses a run used are kept, so entries do not grow over versions.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        name = hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+        base = os.path.join(self.directory, name)
+        return f"{base}.txt", f"{base}.json"
+
+    def load(self, key: str) -> Revision:
+        """Load the last version stored under key (an empty Revision if none)."""
+        text_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(text_path, encoding="utf-8", newline="") as f:
+                previous = f.read()
+        except (OSError, ValueError):
+            return Revision(key)
+        return Revision(key, previous, meta.get("responses", {}), meta.get("chunks", {}))
+
+    def save(self, revision: Revision) -> None:
+        """Store the current version with the responses and chunks its run used."""
+        if revision.current is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        text_path, meta_path = self._paths(revision.key)
+        meta = {"key": revision.key, "responses": revision.new_responses, "chunks": revision.new_chunks}
+        for path, data in ((text_path, revision.current), (meta_path, json.dumps(meta))):
+            tmp = f"{path}.tmp{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8", newline="") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+
+_active_revision: ContextVar[Revision | None] = ContextVar("rlm_revision", default=None)
+
+
+def get_revision() -> Revision | None:
+    """Get the revision being analyzed by the current task, if any."""
+    return _active_revision.get()
+
+
+def bind_revision(revision: Revision | None) -> Revision | None:
+    """Bind a revision (or None) to the current task and return it."""
+    _active_revision.set(revision)
+    return revision
@@ -13,9 +13,16 @@ Features:
 
 from __future__ import annotations
 
+import dataclasses
+import functools
+import queue
 import sys
+import threading
+import time
 import traceback
-from typing import Any, Callable, TypeVar
+from typing import Any, Callable, Iterable, TextIO, TypeVar
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
 
 from .guards import (
     init_guards,
@@ -27,18 +34,34 @@ from .guards import (
     TokenLimitError,
     RecursionDepthError,
 )
-from .context_access import get_access_log
+from .access_log import ContextAccessLog, bind_access_log, new_access_log
+from .dryrun import DryRun, bind_dry_run, reset_dry_run
+from .incremental import IncrementalContext
+from .metrics import TASKS_TOTAL
+from .revisions import RevisionStore, bind_revision
+from .sidecar import load_sidecar, persist_new_indexes
+from .tracing import Tracer, set_tracer, trace_span
 
 
 # Type for task functions
 T = TypeVar("T")
 TaskFunction = Callable[[str], T]
 
+# Task errors that may not recur on another attempt (network, overload,
+# rate limits); any other error repeats on the same input and config
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, APIConnectionError, InternalServerError, RateLimitError)
+
 
 def run_task(
     task_fn: TaskFunction[T],
     context: str,
     config: GuardConfig | None = None,
+    tracer: Tracer | None = None,
+    access_log: ContextAccessLog | None = None,
+    source_path: str | None = None,
+    revisions: RevisionStore | None = None,
+    revision_key: str | None = None,
+    dry_run: bool | DryRun = False,
 ) -> dict[str, Any]:
     """
     Execute an RLM task with full guard protection.
@@ -53,14 +76,31 @@ def run_task(
         task_fn: Function that takes context and returns a result
         context: The long context (external state, not loaded into prompts)
         config: Optional guard configuration (uses defaults if not provided)
+        tracer: Optional Tracer to record timing spans (tracing is off if None)
+        access_log: Optional preconfigured access log (bounded retention,
+            sinks); a fresh unbounded log is used if not provided
+        source_path: File the context was read from; indexes are loaded
+            from and saved to its sidecar file (see rlm.sidecar)
+        revisions: Store of previously analyzed versions; subcalls on text
+            unchanged since the last run under the same key are answered
+            from that run (see rlm.revisions)
+        revision_key: Document key in the store (default: source_path)
+        dry_run: Run context access for real but answer subcalls with
+            stubs, charging their estimated cost (True, or a DryRun with
+            custom stubs / latency; see rlm.dryrun)
 
     Returns:
         Structured output dict with:
         - status: "completed", "partial", or "error"
         - result: The task result (may be partial)
         - error: Error message if status != "completed"
+        - retryable: Whether another attempt may succeed (only when
+          status is "error"; see TRANSIENT_ERRORS)
         - budget_summary: Guard state summary
         - access_log_summary: Context access statistics
+        - trace_summary: Span timing totals (only when a tracer is given)
+        - revision_summary: Reuse statistics (only when revisions is given)
+        - dry_run: Projected calls, tokens, cost and latency (only for dry runs)
 
     Example:
         >>> from tasks.example_task import analyze_document
@@ -70,20 +110,43 @@ def run_task(
         >>> print(result["result"])
         {'findings': [...], 'summary': '...'}
     """
-    # Clear access log from previous runs
-    access_log = get_access_log()
-    access_log.clear()
+    # Fresh access log for this run (isolated from concurrent runs)
+    if access_log is None:
+        access_log = new_access_log()
+    else:
+        bind_access_log(access_log)
 
     # Initialize guards
     guard_state = init_guards(config)
+    set_tracer(tracer)
+
+    # Reuse indexes persisted by earlier runs over the same file version
+    persisted = load_sidecar(context, source_path) if source_path else []
+
+    # Reuse subcall results of the last run over an earlier version
+    revision = None
+    if revisions is not None:
+        key = revision_key or source_path
+        if not key:
+            raise ValueError("revisions requires revision_key or source_path")
+        revision = revisions.load(key)
+        revision.current = context
+    bind_revision(revision)
+
+    # Intercept subcalls when only predicting the run
+    if dry_run is True:
+        dry_run = DryRun()
+    dry_run = dry_run or None
+    dry_run_token = bind_dry_run(dry_run)
 
-    partial_result: Any = None
     error_message: str | None = None
     status: str = "completed"
+    retryable = False
 
     try:
         # Execute the task
-        result = task_fn(context)
+        with trace_span("task", category="task"):
+            result = task_fn(context)
 
         # Successful completion
         output = finalize_result(result, status="completed")
@@ -92,7 +155,7 @@ def run_task(
         status = "partial"
         error_message = f"Cost budget exceeded: ${e.current:.4f} >= ${e.limit:.4f}"
         output = finalize_result(
-            partial_result,
+            e.partial_result,
             status="partial",
             error=error_message,
         )
@@ -101,7 +164,7 @@ def run_task(
         status = "partial"
         error_message = f"Runtime limit exceeded: {e.current:.2f}s >= {e.limit:.2f}s"
         output = finalize_result(
-            partial_result,
+            e.partial_result,
             status="partial",
             error=error_message,
         )
@@ -110,7 +173,7 @@ def run_task(
         status = "error"
         error_message = f"Token limit exceeded on subcall: {int(e.current)} > {int(e.limit)}"
         output = finalize_result(
-            partial_result,
+            e.partial_result,
             status="error",
             error=error_message,
         )
@@ -129,7 +192,7 @@ def run_task(
         status = "error"
         error_message = str(e)
         output = finalize_result(
-            partial_result,
+            e.partial_result,
             status="error",
             error=error_message,
         )
@@ -137,6 +200,7 @@ def run_task(
     except Exception as e:
         # Non-budget errors
         status = "error"
+        retryable = isinstance(e, TRANSIENT_ERRORS)
         error_message = f"{type(e).__name__}: {e}"
         output = finalize_result(
             None,
@@ -148,9 +212,256 @@ def run_task(
         if "--debug" in sys.argv:
             output["traceback"] = traceback.format_exc()
 
+    finally:
+        # Later runs in this context make real calls again
+        reset_dry_run(dry_run_token)
+
+    if status == "error":
+        output["retryable"] = retryable
+
+    if source_path:
+        persist_new_indexes(context, source_path, persisted)
+
+    if revision is not None:
+        if output["status"] != "error" and dry_run is None:
+            try:
+                revisions.save(revision)
+            except OSError:
+                pass  # The store is a cache; the next run just pays again
+        output["revision_summary"] = revision.summary()
+
     # Add context access summary
+    access_log.flush()
     output["access_log_summary"] = access_log.summary()
 
+    if dry_run is not None:
+        output["dry_run"] = dry_run.report()
+    else:
+        TASKS_TOTAL.inc(status=output["status"])
+
+    if tracer is not None:
+        output["trace_summary"] = tracer.summary()
+
+    return output
+
+
+def run_incremental(
+    task_fn: Callable[..., T],
+    context: IncrementalContext,
+    config: GuardConfig | None = None,
+    previous: Any = None,
+    merge: Callable[[Any, Any], Any] | None = None,
+    tracer: Tracer | None = None,
+    access_log: ContextAccessLog | None = None,
+    rebase: Callable[[Any, int, int], Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Analyze only the content appended to a context since the last run.
+
+    The task is called as task_fn(context.text, start=high_water_mark)
+    and should narrow from `start` on (e.g. context_search(..., start=start));
+    positions and line numbers stay absolute, so results of successive
+    runs can be merged directly. The high-water mark only advances when
+    a run completes, so a budget-truncated delta is analyzed again by the
+    next refresh.
+
+    The merged result of all completed runs is kept on the context
+    (context.result) and is what the next completed run merges into; a
+    truncated run leaves it untouched, so nothing is lost or merged twice
+    when its delta is analyzed again.
+
+    Args:
+        task_fn: Task accepting (context, start=...)
+        context: The growing context
+        config: Optional guard configuration
+        previous: Merged result to build on (default: context.result)
+        merge: Function (previous, new) -> merged result
+        tracer: Optional Tracer to record timing spans
+        access_log: Optional preconfigured access log
+        rebase: Function (result, base_offset, base_line) -> result making
+            positions absolute in the whole stream; needed when the
+            context trims its front (max_chars)
+
+    Returns:
+        run_task output for this delta (result merged with previous when
+        completed; the delta's partial result otherwise) plus
+        "merged_result" (context.result after the run) and
+        "analyzed_range": [start, end] in the whole stream
+
+    Example:
+        >>> live = IncrementalContext.open("app.log")
+        >>> out = run_incremental(find_errors_in_log, live, merge=merge_error_reports)
+        >>> live.refresh()
+        >>> out = run_incremental(find_errors_in_log, live, merge=merge_error_reports)
+        >>> report = out["merged_result"]  # also live.result
+    """
+    start = context.high_water_mark
+    end = len(context.text)
+
+    output = run_task(
+        functools.partial(task_fn, start=start),
+        context.text,
+        config,
+        tracer=tracer,
+        access_log=access_log,
+    )
+
+    if output["result"] is not None and rebase is not None and (context.base_offset or context.base_line):
+        output["result"] = rebase(output["result"], context.base_offset, context.base_line)
+    if previous is None:
+        previous = context.result
+    if output["status"] == "completed":
+        context.high_water_mark = end
+        if previous is not None and merge is not None:
+            output["result"] = merge(previous, output["result"])
+        context.result = output["result"]
+    output["merged_result"] = context.result
+    output["analyzed_range"] = [context.base_offset + start, context.base_offset + end]
+    return output
+
+
+def run_stream(
+    task_fn: Callable[..., T],
+    stream: Iterable[str],
+    config: GuardConfig | None = None,
+    merge: Callable[[Any, Any], Any] | None = None,
+    rebase: Callable[[Any, int, int], Any] | None = None,
+    max_chars: int = 64 * 1024 * 1024,
+    batch_chars: int = 1024 * 1024,
+    batch_seconds: float = 5.0,
+    spill: TextIO | None = None,
+    tracer: Tracer | None = None,
+    access_log: ContextAccessLog | None = None,
+    on_batch: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Analyze a stream of lines (e.g. stdin) as it arrives.
+
+    Lines are read by a background thread into a bounded queue, so a
+    producer faster than the analysis blocks instead of filling memory.
+    Whenever batch_chars have arrived, or batch_seconds after the first
+    line of a batch, the batch is appended to an IncrementalContext and
+    analyzed with run_incremental, so subcalls start long before EOF.
+    The context keeps at most max_chars in memory (older analyzed text
+    goes to `spill` if given), so memory is bounded for unbounded input.
+
+    The budget is shared by all batches: each run gets the cost and
+    runtime left over by the previous ones (time spent waiting for input
+    is not counted). The stream stops at the first run that does not
+    complete.
+
+    Args:
+        task_fn: Task accepting (context, start=...), see run_incremental
+        stream: Iterable of lines, e.g. sys.stdin
+        config: Guard configuration shared by the whole stream
+        merge: Function (previous, new) -> merged result
+        rebase: Function (result, base_offset, base_line) -> result with
+            absolute positions (see run_incremental)
+        max_chars: Bound on the text kept in memory
+        batch_chars: Characters that trigger a run
+        batch_seconds: Longest a partial batch waits for more input
+        spill: Text file receiving text trimmed from memory
+        tracer: Optional Tracer to record timing spans
+        access_log: Optional preconfigured access log (shared by all runs)
+        on_batch: Called with each run's output (e.g. for progress)
+
+    Returns:
+        Output of the last run with the merged result, budget totals over
+        all runs and "stream_summary" (batches, chars read, bytes held)
+    """
+    config = config or GuardConfig()
+    if access_log is None:
+        access_log = ContextAccessLog(max_records=10_000)  # Unbounded input: bounded log
+    lines: queue.Queue = queue.Queue(maxsize=max(16, batch_chars // 1024))
+
+    def read() -> None:
+        try:
+            for line in stream:
+                lines.put(line)
+        finally:
+            lines.put(None)
+
+    threading.Thread(target=read, name="rlm-stream-reader", daemon=True).start()
+
+    context = IncrementalContext(max_chars=max_chars, spill=spill)
+    result: Any = None
+    output: dict[str, Any] | None = None
+    totals = {"total_cost_usd": 0.0, "total_calls": 0, "total_input_tokens": 0,
+              "total_output_tokens": 0, "cache_hits": 0, "elapsed_seconds": 0.0}
+    batches = 0
+    chars_read = 0
+    eof = False
+
+    while not eof:
+        # Collect one batch
+        batch: list[str] = []
+        size = 0
+        deadline = None
+        while size < batch_chars:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                line = lines.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if line is None:
+                eof = True
+                break
+            batch.append(line)
+            size += len(line)
+            if deadline is None:
+                deadline = time.monotonic() + batch_seconds
+        chars_read += size
+        context.append("".join(batch))
+        if eof:
+            context.flush()
+        if not context.unanalyzed:
+            continue
+
+        remaining = dataclasses.replace(
+            config,
+            max_cost=config.max_cost - totals["total_cost_usd"],
+            max_runtime_seconds=config.max_runtime_seconds - totals["elapsed_seconds"],
+        )
+        output = run_incremental(
+            task_fn, context, remaining,
+            previous=result, merge=merge, rebase=rebase,
+            tracer=tracer, access_log=access_log,
+        )
+        batches += 1
+        budget = output["budget_summary"]
+        for key in totals:
+            totals[key] += budget[key]
+        if on_batch is not None:
+            on_batch(output)
+        if output["status"] != "completed":
+            # The stream stops here: keep what the truncated batch finished
+            if output["status"] == "partial" and output["result"] is not None:
+                partial = output["result"]
+                result = partial if result is None or merge is None else merge(result, partial)
+            break
+        result = output["result"]
+
+    if output is None:
+        output = {"status": "completed", "error": None, "access_log_summary": access_log.summary()}
+    # Results of every completed batch plus the partial result of a truncated one
+    output["result"] = result
+    output["budget_summary"] = {
+        **{key: round(value, 6) if isinstance(value, float) else value for key, value in totals.items()},
+        "cost_budget_usd": config.max_cost,
+        "cost_remaining_usd": round(config.max_cost - totals["total_cost_usd"], 6),
+        "runtime_limit_seconds": config.max_runtime_seconds,
+    }
+    output["stream_summary"] = {
+        "batches": batches,
+        "chars_read": chars_read,
+        "eof": eof,
+        "analyzed_range": [0, context.base_offset + context.high_water_mark],
+        "chars_in_memory": len(context.text),
+    }
+    output.pop("analyzed_range", None)
+    output.pop("merged_result", None)
     return output
 
 
@@ -158,6 +469,7 @@ def run_task_with_accumulator(
     task_fn: Callable[[str, list], Any],
     context: str,
     config: GuardConfig | None = None,
+    tracer: Tracer | None = None,
 ) -> dict[str, Any]:
     """
     Execute a task that accumulates partial results.
@@ -170,6 +482,7 @@ def run_task_with_accumulator(
         task_fn: Function taking (context, accumulator) and returning final result
         context: The long context
         config: Optional guard configuration
+        tracer: Optional Tracer to record timing spans
 
     Returns:
         Structured output with partial results on budget violation
@@ -184,14 +497,17 @@ def run_task_with_accumulator(
         >>> result = run_task_with_accumulator(analyze_sections, document)
         >>> # Even if budget exceeded, results list has partial data
     """
-    access_log = get_access_log()
-    access_log.clear()
+    access_log = new_access_log()
 
     guard_state = init_guards(config)
+    set_tracer(tracer)
+    bind_revision(None)
+    dry_run_token = bind_dry_run(None)
     accumulator: list = []
 
     try:
-        result = task_fn(context, accumulator)
+        with trace_span("task", category="task"):
+            result = task_fn(context, accumulator)
         output = finalize_result(result, status="completed")
 
     except BudgetExceededError as e:
@@ -209,7 +525,13 @@ def run_task_with_accumulator(
             error=f"{type(e).__name__}: {e}",
         )
 
+    finally:
+        reset_dry_run(dry_run_token)
+
     output["access_log_summary"] = access_log.summary()
+    TASKS_TOTAL.inc(status=output["status"])
+    if tracer is not None:
+        output["trace_summary"] = tracer.summary()
     return output
 
 
@@ -0,0 +1,118 @@
+"""
+RLM Severity Scoring
+
+Rank log match windows by how much they matter, not where they appear.
+
+When a budget limit cuts a log analysis short, what survives should be
+the most severe issues, not the earliest ones. Each matched line is
+scored from three signals:
+
+- Keyword weight: the most severe keyword on the line
+  (fatal > critical > exception / error > failed > warning)
+- Rarity of its template: the line with numbers, hex ids and quoted
+  values masked; a one-off failure outranks the thousandth repeat of
+  the same retry message (weight 1 + ln(lines / lines with template))
+- Recency: later lines weigh up to `1 + recency` times more, since the
+  end of a log is usually closest to the incident
+
+A window scores its best line plus a quarter of the rest, so one fatal
+line outranks a cluster of routine errors while clusters still beat
+single lines of the same kind. The scores are used as planner
+priorities: plan_budget keeps the most valuable windows and
+Plan.dispatch classifies them highest first.
+
+Rarity and recency are relative to the windows scored together, so
+scores from separate calls do not compare: score every candidate of a
+run in one call (streamed plans rescore held-back windows this way once
+the scan ends; see plan_stream's rescore).
+
+Example:
+    >>> windows = plan_windows(logs, matches, before=100, after=200)
+    >>> chunks = [context_slice(logs, w.start, w.end) for w in windows]
+    >>> scores = score_windows(windows, chunks, len(logs))
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Sequence
+
+# (pattern, weight), most severe first; a line weighs its first match
+SEVERITY_WEIGHTS = (
+    (r"fatal|panic|emerg(?:ency)?", 8.0),
+    (r"crit(?:ical)?|alert", 5.0),
+    (r"exception|error|err", 3.0),
+    (r"fail(?:ed|ure)?", 2.0),
+    (r"warn(?:ing)?", 1.0),
+)
+
+# Share of a window's other lines added to its best line
+CLUSTER_WEIGHT = 0.25
+
+_SEVERITY = [(re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE), weight) for pattern, weight in SEVERITY_WEIGHTS]
+
+# Values that vary between lines of one template
+_VARIABLE = re.compile(
+    r'"[^"]*"|\'[^\']*\'|\b0x[0-9a-f]+\b|\b[0-9a-f]*\d[0-9a-f]*\b|\d+',
+    re.IGNORECASE,
+)
+
+
+def severity_weight(line: str) -> float:
+    """Weight of the most severe keyword on a line (1.0 when none match)."""
+    for pattern, weight in _SEVERITY:
+        if pattern.search(line):
+            return weight
+    return 1.0
+
+
+def log_template(line: str) -> str:
+    """A line with its variable parts (numbers, ids, quoted values) masked."""
+    return _VARIABLE.sub("<*>", line.strip())
+
+
+def _match_line(chunk: str, offset: int) -> str:
+    """The line of chunk containing offset."""
+    begin = chunk.rfind("\n", 0, offset) + 1
+    end = chunk.find("\n", offset)
+    return chunk[begin:] if end < 0 else chunk[begin:end]
+
+
+def score_windows(windows: Sequence, chunks: Sequence[str], length: int, recency: float = 1.0) -> list[float]:
+    """
+    Score match windows for priority ordering.
+
+    Args:
+        windows: MatchWindows (from plan_windows / stream_windows)
+        chunks: Text of each window (context_slice(context, w.start, w.end))
+        length: Length of the context, for recency
+        recency: Extra weight of the last line over the first (0 disables)
+
+    Returns:
+        One score per window (higher is more important)
+    """
+    lines = []
+    for window, chunk in zip(windows, chunks):
+        window_lines = []
+        for match in window.matches:
+            line = _match_line(chunk, match.start - window.start)
+            window_lines.append((match.start, line, log_template(line)))
+        lines.append(window_lines)
+    templates = Counter(template for window_lines in lines for _, _, template in window_lines)
+    total = sum(templates.values())
+
+    scores = []
+    for window_lines in lines:
+        line_scores = sorted(
+            (
+                severity_weight(line)
+                * (1 + math.log(total / templates[template]))
+                * (1 + recency * position / max(1, length))
+                for position, line, template in window_lines
+            ),
+            reverse=True,
+        )
+        scores.append(line_scores[0] + CLUSTER_WEIGHT * sum(line_scores[1:]) if line_scores else 0.0)
+    return scores
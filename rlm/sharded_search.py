@@ -0,0 +1,193 @@
+"""
+RLM Sharded Search
+
+Parallel regex search for very large contexts.
+
+The search window is split into shards at line boundaries and the shards
+are scanned by a pool of forked worker processes. Forked workers inherit
+the context string copy-on-write, so nothing is pickled or copied per
+shard; only the (start, end, text) of each match is sent back.
+
+Each shard is scanned up to `guard_chars` past its end (the guard band),
+so a match that starts in one shard and crosses into the next is still
+found by the shard it starts in. Results are merged in positional order.
+When a match from one shard runs into the next, that shard's results are
+re-aligned in-process from the end of the match until both scans agree,
+so the output is exactly what a single finditer pass would return. The
+pool is torn down as soon as max_hits matches are collected.
+
+The context reaches the workers through a module global set just before
+the pool forks, so one sharded search runs at a time per process: a
+search started while another holds the pool (concurrent daemon or worker
+pool jobs) scans in-process instead of forking with the other job's
+context. Forked workers only run regex scans over the inherited string
+and never take locks held by the parent's other threads.
+
+Falls back to a single in-process scan where fork is unavailable, and
+for patterns with end anchors or lookaheads, which would match against
+the guard band's end as if the text stopped there.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import threading
+
+# Shards smaller than this are not worth a process round trip
+MIN_SHARD_CHARS = 4 * 1024 * 1024
+
+# Longest match guaranteed to be found across a shard boundary. Shards are
+# scanned with the band's end as endpos, where end anchors ($, \Z) and
+# lookaheads would see an artificial end of text; patterns using them are
+# scanned in one pass (see _END_SENSITIVE)
+DEFAULT_GUARD_CHARS = 4096
+
+# End anchors and lookaheads: their matches depend on where the text ends
+_END_SENSITIVE = re.compile(r"\$|\\[Zz]|\(\?[=!]")
+
+# Shards per worker; more shards make max_hits cancellation finer grained
+SHARDS_PER_WORKER = 4
+
+# Context inherited by forked workers, set and cleared under _fork_lock
+_shared_context: str | None = None
+_fork_lock = threading.Lock()
+
+
+def can_fork() -> bool:
+    """Whether sharded search can run in this process."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def shard_bounds(context: str, start: int, end: int, shards: int) -> list[tuple[int, int]]:
+    """Split [start, end) into up to `shards` ranges that end after a newline."""
+    size = max(1, (end - start) // max(1, shards))
+    bounds: list[tuple[int, int]] = []
+    pos = start
+    while pos < end:
+        target = pos + size
+        if target >= end:
+            cut = end
+        else:
+            newline = context.find("\n", target, end)
+            cut = end if newline == -1 else newline + 1
+        bounds.append((pos, cut))
+        pos = cut
+    return bounds
+
+
+def _scan_shard(job: tuple[str, int, int, int, int, int]) -> list[tuple[int, int, str]]:
+    pattern, flags, start, end, scan_end, max_hits = job
+    compiled = re.compile(pattern, flags)
+    found: list[tuple[int, int, str]] = []
+    for match in compiled.finditer(_shared_context, start, scan_end):
+        if match.start() >= end:
+            break  # Belongs to the next shard
+        found.append((match.start(), match.end(), match.group()))
+        if len(found) >= max_hits:
+            break
+    return found
+
+
+def sharded_finditer(
+    context: str,
+    compiled: re.Pattern,
+    start: int,
+    end: int,
+    max_hits: int,
+    workers: int | None = None,
+    guard_chars: int = DEFAULT_GUARD_CHARS,
+) -> list[tuple[int, int, str]]:
+    """
+    Find up to max_hits matches of compiled in context[start:end] across processes.
+
+    Args:
+        context: The full context string
+        compiled: Compiled regex pattern
+        start: Start of the search window
+        end: End of the search window
+        max_hits: Stop once this many matches are collected
+        workers: Worker processes (default: CPU count)
+        guard_chars: Scan this far past each shard end for boundary-spanning matches
+
+    Returns:
+        (start, end, text) of each match, in positional order
+    """
+    global _shared_context
+
+    workers = workers or os.cpu_count() or 1
+    shards = min(workers * SHARDS_PER_WORKER, max(1, (end - start) // MIN_SHARD_CHARS))
+    if workers < 2 or shards < 2 or not can_fork() or _END_SENSITIVE.search(compiled.pattern):
+        return _sequential(compiled, context, start, end, max_hits)
+
+    jobs = [
+        (compiled.pattern, compiled.flags, lo, hi, min(end, hi + guard_chars), max_hits)
+        for lo, hi in shard_bounds(context, start, end, shards)
+    ]
+    if not _fork_lock.acquire(blocking=False):
+        return _sequential(compiled, context, start, end, max_hits)  # Another job owns the pool
+
+    matches: list[tuple[int, int, str]] = []
+    last_end = start
+    _shared_context = context
+    try:
+        with multiprocessing.get_context("fork").Pool(min(workers, len(jobs))) as pool:
+            # imap yields in shard order; leaving the block terminates
+            # workers still scanning later shards
+            for job, found in zip(jobs, pool.imap(_scan_shard, jobs)):
+                if found and found[0][0] < last_end:
+                    # The previous shard's last match ran into this shard
+                    found = _realign(compiled, context, last_end, found, job[3], job[4])
+                for match in found:
+                    matches.append(match)
+                    if len(matches) >= max_hits:
+                        return matches
+                if found:
+                    last_end = found[-1][1]
+    finally:
+        _shared_context = None
+        _fork_lock.release()
+    return matches
+
+
+def _realign(
+    compiled: re.Pattern,
+    context: str,
+    pos: int,
+    found: list[tuple[int, int, str]],
+    shard_end: int,
+    scan_end: int,
+) -> list[tuple[int, int, str]]:
+    """
+    Rescan a shard from pos until the scan agrees with the shard's results.
+
+    Once both scans produce the same match they continue identically, so
+    the rest of the shard's results can be reused.
+    """
+    index = {match: i for i, match in enumerate(found)}
+    rescanned: list[tuple[int, int, str]] = []
+    for m in compiled.finditer(context, pos, scan_end):
+        if m.start() >= shard_end:
+            break
+        match = (m.start(), m.end(), m.group())
+        i = index.get(match)
+        if i is not None:
+            return rescanned + found[i:]
+        rescanned.append(match)
+    return rescanned
+
+
+def _sequential(
+    compiled: re.Pattern,
+    context: str,
+    start: int,
+    end: int,
+    max_hits: int,
+) -> list[tuple[int, int, str]]:
+    matches: list[tuple[int, int, str]] = []
+    for match in compiled.finditer(context, start, end):
+        matches.append((match.start(), match.end(), match.group()))
+        if len(matches) >= max_hits:
+            break
+    return matches
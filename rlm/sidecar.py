@@ -0,0 +1,232 @@
+"""
+RLM Sidecar Index Files
+
+Persists the indexes built for a context file (see rlm.indexes) to a
+versioned sidecar file so later runs over the same file version skip the
+build. Sidecars are keyed by a fingerprint of the file's content and are
+memory-mapped on load: index arrays are used directly from the mapping,
+so loading costs a header parse rather than a rebuild.
+
+Location: <cache dir>/<fingerprint>.rlmidx, where the cache dir is
+RLM_INDEX_DIR if set, else $XDG_CACHE_HOME/rlm/indexes (default
+~/.cache/rlm/indexes). Nothing is written next to the context file, and
+copies or renames of a file share one sidecar. Fingerprints are
+remembered per (path, size, mtime) within a process, so repeated runs
+over an unchanged file hash it once.
+
+File layout:
+    b"RLMIDX" | u16 format version | u32 header length | JSON header | data
+The header records the fingerprint, context length, byte order and, per
+index kind, its metadata and the (offset, length, typecode) of each
+array. Arrays are stored in native byte order, 8-byte aligned, so they
+can be cast in place.
+
+Sidecars are a cache: unreadable, stale or foreign files are ignored and
+rebuilt, and failing to write one never fails a run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from functools import lru_cache
+from typing import Any
+
+from .indexes import INDEX_KINDS, get_index_cache
+
+
+MAGIC = b"RLMIDX"
+FORMAT_VERSION = 1
+SUFFIX = ".rlmidx"
+
+_PREAMBLE = struct.Struct("<6sHI")
+_ALIGN = 8
+
+
+def content_fingerprint(path: str, block_size: int = 1 << 20) -> str:
+    """Return a blake2b fingerprint of a file's content."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=256)
+def _cached_fingerprint(path: str, size: int, mtime_ns: int) -> str:
+    return content_fingerprint(path)
+
+
+def file_fingerprint(path: str) -> str:
+    """Return the content fingerprint of a file, reused while it is unchanged."""
+    st = os.stat(path)
+    return _cached_fingerprint(os.path.realpath(path), st.st_size, st.st_mtime_ns)
+
+
+def index_dir() -> str:
+    """Return the directory sidecars are kept in."""
+    directory = os.environ.get("RLM_INDEX_DIR")
+    if directory:
+        return os.path.expanduser(directory)
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "rlm", "indexes")
+
+
+def sidecar_path(path: str, fingerprint: str | None = None) -> str:
+    """Return where the sidecar for a context file lives."""
+    return os.path.join(index_dir(), f"{fingerprint or file_fingerprint(path)}{SUFFIX}")
+
+
+def _read_header(mapped: mmap.mmap) -> dict | None:
+    if len(mapped) < _PREAMBLE.size:
+        return None
+    magic, version, header_len = _PREAMBLE.unpack_from(mapped, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    try:
+        header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_len])
+    except ValueError:
+        return None
+    header["data_start"] = _aligned(_PREAMBLE.size + header_len)
+    return header
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def load_sidecar(context: str, path: str) -> list[str]:
+    """
+    Register the persisted indexes for a context read from path.
+
+    The sidecar is found by the file's content fingerprint, so an edited
+    file never loads the indexes of its earlier version.
+
+    Args:
+        context: The context string read from path
+        path: The context file
+
+    Returns:
+        Index kinds the sidecar holds (empty if no usable sidecar exists);
+        kinds already cached for this context are not reloaded
+    """
+    try:
+        fingerprint = file_fingerprint(path)
+        with open(sidecar_path(path, fingerprint), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return []
+
+    header = _read_header(mapped)
+    if (
+        header is None
+        or header.get("fingerprint") != fingerprint
+        or header.get("context_length") != len(context)
+        or header.get("byteorder") != sys.byteorder
+    ):
+        return []
+
+    view = memoryview(mapped)
+    cache = get_index_cache()
+    cached = cache.indexes(context)
+    loaded = []
+    for kind, entry in header["indexes"].items():
+        cls = INDEX_KINDS.get(kind)
+        if cls is None:
+            continue
+        loaded.append(kind)
+        if kind in cached:
+            continue
+        buffers = {}
+        for name, (offset, length, typecode) in entry["buffers"].items():
+            start = header["data_start"] + offset
+            buf = view[start:start + length]
+            buffers[name] = buf if typecode == "B" else buf.cast(typecode)
+        cache.put(context, kind, cls.from_buffers(entry["meta"], buffers))
+    return loaded
+
+
+def save_sidecar(context: str, path: str, fingerprint: str | None = None) -> str | None:
+    """
+    Write every cached index of a context to its sidecar file.
+
+    Args:
+        context: The context string read from path
+        path: The context file
+        fingerprint: Content fingerprint if already known
+
+    Returns:
+        The sidecar path, or None if there was nothing to save or it
+        could not be written
+    """
+    indexes = {
+        kind: index for kind, index in get_index_cache().indexes(context).items()
+        if kind in INDEX_KINDS
+    }
+    if not indexes:
+        return None
+
+    try:
+        fingerprint = fingerprint or file_fingerprint(path)
+        entries: dict[str, Any] = {}
+        blobs: list[bytes | array | memoryview] = []
+        offset = 0
+        for kind, index in indexes.items():
+            meta, buffers = index.to_buffers()
+            layout = {}
+            for name, buf in buffers.items():
+                if isinstance(buf, (bytes, bytearray)):
+                    typecode, nbytes = "B", len(buf)
+                else:
+                    typecode = buf.typecode if isinstance(buf, array) else buf.format
+                    nbytes = len(buf) * buf.itemsize
+                layout[name] = (offset, nbytes, typecode)
+                blobs.append(buf)
+                padded = _aligned(offset + nbytes)
+                if padded > offset + nbytes:
+                    blobs.append(b"\0" * (padded - offset - nbytes))
+                offset = padded
+            entries[kind] = {"meta": meta, "buffers": layout}
+
+        header = json.dumps({
+            "fingerprint": fingerprint,
+            "context_length": len(context),
+            "byteorder": sys.byteorder,
+            "indexes": entries,
+        }).encode("utf-8")
+
+        location = sidecar_path(path, fingerprint)
+        tmp = f"{location}.tmp{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+                f.write(header)
+                f.write(b"\0" * (_aligned(_PREAMBLE.size + len(header)) - _PREAMBLE.size - len(header)))
+                for blob in blobs:
+                    f.write(blob)
+            os.replace(tmp, location)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return location
+    except OSError:
+        return None
+
+
+def persist_new_indexes(context: str, path: str, persisted: list[str]) -> str | None:
+    """Save the sidecar if indexes were built beyond those it already holds."""
+    built = set(get_index_cache().indexes(context)) & set(INDEX_KINDS)
+    if built - set(persisted):
+        return save_sidecar(context, path)
+    return None
@@ -0,0 +1,197 @@
+"""
+RLM Document Structure
+
+One-pass parser that finds the headings of a document and builds a
+section tree with exact spans, so tasks can send precisely one section to
+a subcall instead of a fixed window around a keyword.
+
+Recognized headings:
+- Markdown ATX:        "## Results"
+- Underlined (setext): "Results" followed by "=======" or "-------"
+- Numbered:            "3.2 Experimental Setup" (on a line of its own
+                       between blank lines, so list items don't count)
+- All-caps titles:     "RESULTS AND DISCUSSION" (after a blank line)
+
+Lines inside ``` or ~~~ code fences are never headings. A section runs
+from its heading to the next heading of the same or a higher level.
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from .indexes import get_index_cache, register_index_kind
+
+
+_HEADINGS = re.compile(
+    r"^(?P<fence>```|~~~)[^\n]*$"
+    r"|^(?P<atx>#{1,6})[ \t]+(?P<atx_title>[^\n]*?)[ \t#]*$"
+    r"|^(?P<setext_title>[^\s#|>*\-][^\n]*)\n(?P<rule>=+|-+)[ \t]*$"
+    r"|(?:\A|(?<=\n\n))(?P<num>\d+(?:\.\d+)*)\.?[ \t]+(?P<num_title>[A-Z][^\n]{0,78}[^.,:;\s])[ \t]*(?=\n[ \t]*\n|\n?\Z)"
+    r"|(?:\A|(?<=\n\n))[ \t]*(?P<caps_title>[A-Z][A-Z0-9 ,&'/\-]{2,78}[A-Z0-9])[ \t]*$",
+    re.MULTILINE,
+)
+
+_EMPHASIS = re.compile(r"[*_`]+")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title and strip emphasis markers and trailing colons."""
+    return " ".join(_EMPHASIS.sub("", title).strip().rstrip(":").lower().split())
+
+
+@dataclass(frozen=True)
+class Section:
+    """
+    A document section.
+
+    Attributes:
+        title: Heading text (without markers or numbering)
+        level: Nesting level (1 = top level)
+        start: Position of the heading
+        body_start: Position just after the heading
+        end: End of the section, including its subsections
+        parent: Ordinal of the enclosing section, or -1
+    """
+    title: str
+    level: int
+    start: int
+    body_start: int
+    end: int
+    parent: int
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+
+class SectionIndex:
+    """
+    Section tree of a context, stored as parallel arrays in document order.
+    """
+
+    __slots__ = ("titles", "levels", "starts", "body_starts", "ends", "parents", "_normalized")
+
+    def __init__(
+        self,
+        titles: list[str],
+        levels: Sequence[int],
+        starts: Sequence[int],
+        body_starts: Sequence[int],
+        ends: Sequence[int],
+        parents: Sequence[int],
+    ):
+        self.titles = titles
+        self.levels = levels
+        self.starts = starts
+        self.body_starts = body_starts
+        self.ends = ends
+        self.parents = parents
+        self._normalized = [normalize_title(t) for t in titles]
+
+    @classmethod
+    def build(cls, context: str) -> SectionIndex:
+        """Find all headings in one regex pass and nest them by level."""
+        titles: list[str] = []
+        levels = array("i")
+        starts = array("q")
+        body_starts = array("q")
+        ends = array("q")
+        parents = array("i")
+        open_sections: list[int] = []
+        in_fence = False
+
+        for m in _HEADINGS.finditer(context):
+            if m.group("fence"):
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                continue
+            if m.group("atx"):
+                title, level = m.group("atx_title"), len(m.group("atx"))
+            elif m.group("rule"):
+                title, level = m.group("setext_title"), 1 if m.group("rule")[0] == "=" else 2
+            elif m.group("num"):
+                title, level = m.group("num_title"), m.group("num").count(".") + 1
+            else:
+                title, level = m.group("caps_title"), 1
+            title = title.strip()
+            if not title:
+                continue
+
+            # Close every open section at this level or deeper
+            while open_sections and levels[open_sections[-1]] >= level:
+                ends[open_sections.pop()] = m.start()
+
+            titles.append(title)
+            levels.append(level)
+            starts.append(m.start())
+            body_starts.append(min(len(context), m.end() + 1))
+            ends.append(len(context))
+            parents.append(open_sections[-1] if open_sections else -1)
+            open_sections.append(len(titles) - 1)
+
+        return cls(titles, levels, starts, body_starts, ends, parents)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, i: int) -> Section:
+        return Section(
+            title=self.titles[i],
+            level=self.levels[i],
+            start=self.starts[i],
+            body_start=self.body_starts[i],
+            end=self.ends[i],
+            parent=self.parents[i],
+        )
+
+    def __iter__(self) -> Iterator[Section]:
+        for i in range(len(self.titles)):
+            yield self[i]
+
+    def find(self, name: str) -> Section | None:
+        """
+        Return the first section titled `name` (case-insensitive), else the
+        first whose title starts with it, else None.
+        """
+        wanted = normalize_title(name)
+        if not wanted:
+            return None
+        for matches in (
+            lambda title: title == wanted,
+            lambda title: title.startswith(wanted),
+        ):
+            for i, title in enumerate(self._normalized):
+                if matches(title):
+                    return self[i]
+        return None
+
+    def to_buffers(self) -> tuple[dict, dict[str, Any]]:
+        """Return (metadata, named arrays) for persisting (see rlm.sidecar)."""
+        return {"titles": self.titles}, {
+            "levels": self.levels,
+            "starts": self.starts,
+            "body_starts": self.body_starts,
+            "ends": self.ends,
+            "parents": self.parents,
+        }
+
+    @classmethod
+    def from_buffers(cls, meta: dict, buffers: dict[str, Any]) -> SectionIndex:
+        """Rebuild from persisted buffers; arrays stay memory-mapped."""
+        return cls(
+            meta["titles"], buffers["levels"], buffers["starts"],
+            buffers["body_starts"], buffers["ends"], buffers["parents"],
+        )
+
+
+register_index_kind("sections", SectionIndex)
+
+
+def get_section_index(context: str) -> SectionIndex:
+    """Get (or build and cache) the section index for a context."""
+    return get_index_cache().get(context, "sections", SectionIndex.build)
@@ -20,6 +20,10 @@ from typing import Any
 from openai import OpenAI
 
 from .guards import guarded_call, get_guard_state, GuardConfig
+from .cache import ResponseCache, get_response_cache
+from .dryrun import get_dry_run
+from .revisions import get_revision
+from .views import ContextView
 
 
 # Lazy-loaded client
@@ -81,7 +85,7 @@ def _make_llm_call(prompt: str, context_chunk: str) -> tuple[str, int, int]:
     return text, input_tokens, output_tokens
 
 
-def semantic_subcall(prompt: str, context_chunk: str) -> str:
+def semantic_subcall(prompt: str, context_chunk: str | ContextView) -> str:
     """
     Execute a semantic reasoning subcall on a bounded context chunk.
 
@@ -90,7 +94,7 @@ def semantic_subcall(prompt: str, context_chunk: str) -> str:
 
     Args:
         prompt: Clear instruction for what to extract/analyze
-        context_chunk: Bounded text slice (from context_access functions)
+        context_chunk: Bounded text slice or ContextView (from context_access functions)
 
     Returns:
         LLM response as string
@@ -107,18 +111,59 @@ def semantic_subcall(prompt: str, context_chunk: str) -> str:
         ...     chunk
         ... )
     """
+    return _run_subcall(prompt, context_chunk, helper="raw")
+
+
+def _run_subcall(prompt: str, context_chunk: str | ContextView, helper: str) -> str:
+    """
+    Shared path for all subcall helpers.
+
+    The helper name ("raw", "json", "bool", "choice") labels the call in
+    the guard state's latency and token histograms.
+    """
     if not isinstance(prompt, str) or not prompt.strip():
         raise ValueError("prompt must be a non-empty string")
+    if isinstance(context_chunk, ContextView):
+        # Views are materialized only here, at the point of use
+        context_chunk = context_chunk.text
     if not isinstance(context_chunk, str):
         raise TypeError(f"context_chunk must be str, got {type(context_chunk).__name__}")
 
+    # Identical requests are answered from the response cache when enabled,
+    # or from the previous run over an earlier version of the document
+    cache = get_response_cache()
+    revision = get_revision()
+    if cache is not None or revision is not None:
+        state = get_guard_state()
+        key = ResponseCache.make_key(state.config.model, prompt, context_chunk)
+        cached = cache.get(key) if cache is not None else None
+        if cached is None and revision is not None:
+            cached = revision.lookup(key)
+        elif cached is not None and revision is not None:
+            revision.record(key, cached)
+        if cached is not None:
+            state.record_cache_hit()
+            return cached
+
+    # Dry runs are charged their estimate and answered with a stub
+    dry_run = get_dry_run()
+    if dry_run is not None:
+        return dry_run.intercept(prompt, context_chunk, helper)
+
     # All enforcement happens in guarded_call
-    return guarded_call(_make_llm_call, prompt, context_chunk)
+    response = guarded_call(_make_llm_call, prompt, context_chunk, helper=helper)
+
+    if cache is not None:
+        cache.put(key, response)
+    if revision is not None:
+        revision.record(key, response)
+
+    return response
 
 
 def semantic_subcall_json(
     prompt: str,
-    context_chunk: str,
+    context_chunk: str | ContextView,
     default: Any = None,
 ) -> Any:
     """
@@ -149,7 +194,7 @@ def semantic_subcall_json(
         "IMPORTANT: Respond with valid JSON only. No explanation, no markdown, just JSON."
     )
 
-    response = semantic_subcall(json_prompt, context_chunk)
+    response = _run_subcall(json_prompt, context_chunk, helper="json")
 
     # Try to extract JSON from response
     text = response.strip()
@@ -169,12 +214,14 @@ def semantic_subcall_json(
     except json.JSONDecodeError:
         if default is not None:
             return default
+        if get_dry_run() is not None:
+            return {}
         raise ValueError(f"Failed to parse JSON from response: {response[:200]}")
 
 
 def semantic_subcall_bool(
     prompt: str,
-    context_chunk: str,
+    context_chunk: str | ContextView,
     default: bool = False,
 ) -> bool:
     """
@@ -199,7 +246,7 @@ def semantic_subcall_bool(
     """
     bool_prompt = f"{prompt}\n\nAnswer with exactly 'yes' or 'no'."
 
-    response = semantic_subcall(bool_prompt, context_chunk).strip().lower()
+    response = _run_subcall(bool_prompt, context_chunk, helper="bool").strip().lower()
 
     if response in ("yes", "true", "1"):
         return True
@@ -211,7 +258,7 @@ def semantic_subcall_bool(
 
 def semantic_subcall_choice(
     prompt: str,
-    context_chunk: str,
+    context_chunk: str | ContextView,
     choices: list[str],
     default: str | None = None,
 ) -> str:
@@ -246,7 +293,7 @@ def semantic_subcall_choice(
         "Respond with only your choice, nothing else."
     )
 
-    response = semantic_subcall(choice_prompt, context_chunk).strip()
+    response = _run_subcall(choice_prompt, context_chunk, helper="choice").strip()
 
     # Try exact match first
     if response in choices:
@@ -265,5 +312,7 @@ def semantic_subcall_choice(
 
     if default is not None:
         return default
+    if get_dry_run() is not None:
+        return choices[0]
 
     raise ValueError(f"Response '{response}' not in choices: {choices}")
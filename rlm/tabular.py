@@ -0,0 +1,343 @@
+"""
+RLM Tabular Contexts
+
+Columnar access path for CSV/TSV, JSON-lines and JSON-array contexts.
+
+The context is parsed once into a column store: one list of values per
+field, plus the (start, end) span of every record in the context, so
+records can still be cited and sliced by position. Filters are column
+predicates rather than regexes over the raw text: numeric comparisons
+run over a float64 column (vectorized with NumPy when it is installed),
+so header lines and other fields never produce false hits.
+
+Detection only samples the head of the context, so plain-text contexts
+are rejected cheaply (see detect_table_format).
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+import re
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Iterator
+
+from .indexes import get_index_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy is optional
+
+
+_LINE = re.compile(r"[^\n]*\n|[^\n]+")
+
+# Delimiters accepted for delimited text, in order of preference
+_DELIMITERS = ",\t;|"
+
+_SAMPLE_LINES = 20
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def detect_table_format(context: str) -> tuple[str, str | None] | None:
+    """
+    Detect whether a context is tabular from its first lines.
+
+    Returns:
+        ("jsonl", None), ("json", None) or ("csv", delimiter), or None
+        if the context does not look like a table
+    """
+    head = context.lstrip()[:64 * 1024]
+    if not head:
+        return None
+    lines = [line for line in head.splitlines()[:_SAMPLE_LINES] if line.strip()]
+
+    if head[0] == "[":
+        stripped = head[1:].lstrip()
+        return ("json", None) if stripped[:1] in ("{", "]") else None
+    if head[0] == "{":
+        try:
+            complete = lines[:-1] if len(lines) > 1 else lines
+            if all(isinstance(json.loads(line), dict) for line in complete):
+                return ("jsonl", None)
+        except ValueError:
+            pass
+        return None
+
+    if len(lines) < 2:
+        return None
+    for delimiter in _DELIMITERS:
+        widths = {len(row) for row in csv.reader(lines[:-1] if len(lines) > 2 else lines, delimiter=delimiter)}
+        if len(widths) == 1 and widths.pop() >= 2:
+            return ("csv", delimiter)
+    return None
+
+
+class TableIndex:
+    """
+    Column store of a tabular context.
+
+    Attributes:
+        format: "csv", "jsonl" or "json"
+        columns: Field names in order of first appearance
+        values: Field -> one value per record (None where missing)
+        starts, ends: Span of each record in the context
+        header: Header line of a CSV context ("" otherwise)
+    """
+
+    __slots__ = ("format", "columns", "values", "starts", "ends", "header", "_numeric")
+
+    def __init__(
+        self,
+        format: str,
+        columns: list[str],
+        values: dict[str, list[Any]],
+        starts: Sequence[int],
+        ends: Sequence[int],
+        header: str = "",
+    ):
+        self.format = format
+        self.columns = columns
+        self.values = values
+        self.starts = starts
+        self.ends = ends
+        self.header = header
+        self._numeric: dict[str, Any] = {}
+
+    @classmethod
+    def build(cls, context: str) -> TableIndex | None:
+        """Parse a tabular context in one pass; None if it is not tabular."""
+        detected = detect_table_format(context)
+        if detected is None:
+            return None
+        fmt, delimiter = detected
+        if fmt == "csv":
+            return cls._build_csv(context, delimiter)
+        return cls._build_json(context, fmt)
+
+    @classmethod
+    def _build_csv(cls, context: str, delimiter: str) -> TableIndex | None:
+        positions = _LinePositions(context)
+        reader = csv.reader(positions, delimiter=delimiter)
+        try:
+            columns = next(reader)
+        except StopIteration:
+            return None
+        header = context[:positions.pos]
+        columns = [name.strip() or f"column_{i + 1}" for i, name in enumerate(columns)]
+        values: dict[str, list[Any]] = {name: [] for name in columns}
+        starts, ends = array("q"), array("q")
+
+        start = positions.pos
+        for row in reader:
+            end = positions.pos
+            if row:
+                for name, value in zip(columns, row):
+                    values[name].append(value)
+                for name in columns[len(row):]:
+                    values[name].append(None)
+                starts.append(start)
+                ends.append(end)
+            start = end
+        return cls("csv", columns, values, starts, ends, header)
+
+    @classmethod
+    def _build_json(cls, context: str, fmt: str) -> TableIndex | None:
+        columns: list[str] = []
+        values: dict[str, list[Any]] = {}
+        starts, ends = array("q"), array("q")
+
+        try:
+            for start, end, record in _json_records(context, fmt):
+                n = len(starts)
+                for name, value in record.items():
+                    column = values.get(name)
+                    if column is None:
+                        columns.append(name)
+                        column = values[name] = [None] * n
+                    if isinstance(value, (dict, list)):
+                        value = json.dumps(value, ensure_ascii=False)
+                    column.append(value)
+                for column in values.values():
+                    if len(column) == n:
+                        column.append(None)
+                starts.append(start)
+                ends.append(end)
+        except ValueError:
+            return None  # Malformed JSON array: treat the context as plain text
+        return cls(fmt, columns, values, starts, ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def numeric(self, column: str) -> Any:
+        """The column as float64 (NaN where not numeric); a NumPy array when available."""
+        cached = self._numeric.get(column)
+        if cached is None:
+            cached = array("d", (_to_float(v) for v in self.values[column]))
+            if np is not None:
+                cached = np.frombuffer(cached, dtype=np.float64)
+            self._numeric[column] = cached
+        return cached
+
+    def select(
+        self,
+        where: dict[str, Any] | None = None,
+        start_row: int = 0,
+        end_row: int | None = None,
+    ) -> list[int]:
+        """
+        Row ordinals in [start_row, end_row) matching every condition.
+
+        Conditions (per column):
+        - a value: equality (numerically when the value is a number)
+        - (op, operand) with op in ==, !=, <, <=, >, >=: comparison
+          (numeric operands compare the float column, vectorized)
+        - ("in", collection): membership
+        - a compiled regex: search in the value's text
+        - a callable: predicate on the raw value
+        """
+        end_row = len(self) if end_row is None else min(end_row, len(self))
+        rows: Sequence[int] = range(max(0, start_row), end_row)
+        for column, condition in (where or {}).items():
+            if column not in self.values:
+                raise KeyError(f"Unknown column {column!r}; columns are {self.columns}")
+            rows = self._filter(column, condition, rows)
+            if not len(rows):
+                break
+        return list(rows)
+
+    def _filter(self, column: str, condition: Any, rows: Sequence[int]) -> Sequence[int]:
+        op, operand = "==", condition
+        if isinstance(condition, tuple) and len(condition) == 2 and (condition[0] in _OPERATORS or condition[0] == "in"):
+            op, operand = condition
+
+        if isinstance(operand, (int, float)) and not isinstance(operand, bool) and op in _OPERATORS:
+            numbers = self.numeric(column)
+            if np is not None:
+                ids = np.asarray(rows, dtype=np.intp)
+                with np.errstate(invalid="ignore"):
+                    mask = _OPERATORS[op](numbers[ids], operand)
+                if op == "!=":
+                    mask |= np.isnan(numbers[ids])
+                return ids[mask].tolist()
+            compare = _OPERATORS[op]
+            return [i for i in rows if compare(numbers[i], operand) or (op == "!=" and math.isnan(numbers[i]))]
+
+        column_values = self.values[column]
+        if isinstance(operand, re.Pattern):
+            return [i for i in rows if column_values[i] is not None and operand.search(str(column_values[i]))]
+        if callable(operand):
+            return [i for i in rows if operand(column_values[i])]
+        if op == "in":
+            allowed = set(operand)
+            return [i for i in rows if column_values[i] in allowed]
+        compare = _OPERATORS[op]
+        return [i for i in rows if column_values[i] is not None and compare(column_values[i], operand)]
+
+    def record(self, row: int, columns: list[str] | None = None) -> dict[str, Any]:
+        """Field values of one record (optionally only some columns)."""
+        return {name: self.values[name][row] for name in (columns or self.columns)}
+
+    def render(self, rows: Sequence[int], context: str, columns: list[str] | None = None) -> list[str]:
+        """
+        Text of each record: the raw record when all columns are wanted,
+        otherwise the projected fields in the context's own format.
+        """
+        if columns is None:
+            return [context[self.starts[i]:self.ends[i]] for i in rows]
+        if self.format == "csv":
+            return [_csv_line([self.values[name][i] for name in columns]) for i in rows]
+        return [json.dumps(self.record(i, columns), ensure_ascii=False) + "\n" for i in rows]
+
+    def render_header(self, columns: list[str] | None = None) -> str:
+        """Header line to prefix CSV chunks with ("" for JSON records)."""
+        if self.format != "csv":
+            return ""
+        return self.header if columns is None else _csv_line(columns)
+
+
+class _LinePositions:
+    """Line iterator over a context that tracks the offset consumed."""
+
+    def __init__(self, context: str):
+        self.pos = 0
+        self._lines = _LINE.finditer(context)
+
+    def __iter__(self) -> _LinePositions:
+        return self
+
+    def __next__(self) -> str:
+        m = next(self._lines)
+        self.pos = m.end()
+        return m.group()
+
+
+def _json_records(context: str, fmt: str) -> Iterator[tuple[int, int, dict]]:
+    """
+    Yield (start, end, object) of each record of a JSONL or JSON-array context.
+
+    Malformed JSONL lines are skipped; a malformed JSON array raises
+    ValueError, since its later records cannot be located reliably.
+    """
+    if fmt == "jsonl":
+        for m in _LINE.finditer(context):
+            line = m.group()
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Skip malformed lines rather than fail the task
+            if isinstance(record, dict):
+                yield m.start(), m.end(), record
+        return
+
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r"[\s,]*")
+    pos = whitespace.match(context, context.index("[") + 1).end()
+    while pos < len(context) and context[pos] != "]":
+        record, end = decoder.raw_decode(context, pos)
+        if isinstance(record, dict):
+            yield pos, end, record
+        pos = whitespace.match(context, end).end()
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _csv_line(fields: list[Any]) -> str:
+    out: list[str] = []
+    csv.writer(_ListWriter(out), lineterminator="\n").writerow(["" if f is None else f for f in fields])
+    return out[0]
+
+
+class _ListWriter:
+    def __init__(self, out: list[str]):
+        self.out = out
+
+    def write(self, text: str) -> None:
+        self.out.append(text)
+
+
+def get_table_index(context: str) -> TableIndex | None:
+    """Get (or parse and cache) the column store of a context; None if not tabular."""
+    return get_index_cache().get(context, "table", TableIndex.build)
@@ -0,0 +1,299 @@
+"""
+RLM Log Timeline
+
+Timestamp index for log contexts: the timestamp at the start of each log
+line is parsed in one pass and stored as parallel arrays of (timestamp,
+offset) in document order. Incident windows are then found by binary
+search instead of a regex over the whole log, and per-minute histograms
+come from the arrays.
+
+Recognized timestamps (within the first 48 characters of a line):
+- ISO 8601 / RFC 3339: 2024-01-15T10:23:45.123Z, 2024-01-15 10:23:45,123 +0200
+- Common Log Format:   [15/Jan/2024:10:23:45 +0000]
+- Syslog:              Jan 15 10:23:45 (no year; the current year is assumed)
+- Epoch seconds:       1705314225.123 (only at the very start of a line)
+
+Timestamps without a zone are taken as UTC. Lines without a timestamp
+(stack traces, continuation lines) belong to the entry above them.
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Any, Union
+
+from .indexes import get_index_cache, register_index_kind
+
+
+TimeValue = Union[None, int, float, str, datetime]
+
+_MONTHS = {
+    name: i for i, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1
+    )
+}
+
+_TIMESTAMP = re.compile(
+    r"^(?:(?P<epoch>1\d{9}(?:\.\d{1,9})?)(?![\d.])"
+    r"|[^\n]{0,48}?(?<!\d)(?:"
+    r"(?P<Y>\d{4})[-/](?P<m>\d{2})[-/](?P<d>\d{2})[T ](?P<H>\d{2}):(?P<M>\d{2}):(?P<S>\d{2})"
+    r"(?:[.,](?P<frac>\d{1,9}))?(?:[ ]?(?P<tz>Z|[+-]\d{2}:?\d{2})(?![\d:]))?"
+    r"|(?P<cd>\d{2})/(?P<cmon>[A-Z][a-z]{2})/(?P<cY>\d{4}):(?P<cH>\d{2}):(?P<cM>\d{2}):(?P<cS>\d{2})"
+    r"(?: (?P<ctz>[+-]\d{4}))?"
+    r"|(?P<smon>Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) {1,2}(?P<sd>\d{1,2})"
+    r" (?P<sH>\d{2}):(?P<sM>\d{2}):(?P<sS>\d{2})(?!\d)"
+    r"))",
+    re.MULTILINE,
+)
+
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=4096)
+def _day_seconds(year: int, month: int, day: int) -> int:
+    """Seconds from the Unix epoch to midnight UTC of a date."""
+    return (date(year, month, day).toordinal() - _UNIX_EPOCH_ORDINAL) * 86400
+
+
+def _zone_offset(tz: str | None) -> int:
+    """Seconds east of UTC for "Z", "+05:30" or "-0700"."""
+    if not tz or tz == "Z":
+        return 0
+    digits = tz[1:].replace(":", "")
+    seconds = int(digits[:2]) * 3600 + int(digits[2:]) * 60
+    return -seconds if tz[0] == "-" else seconds
+
+
+def _match_time(m: re.Match, default_year: int) -> float | None:
+    """Epoch seconds of a _TIMESTAMP match, or None if it is not a valid date."""
+    g = m.group
+    try:
+        if g("epoch"):
+            return float(g("epoch"))
+        if g("Y"):
+            frac = g("frac")
+            return (
+                _day_seconds(int(g("Y")), int(g("m")), int(g("d")))
+                + int(g("H")) * 3600 + int(g("M")) * 60 + int(g("S"))
+                + (int(frac) / 10 ** len(frac) if frac else 0.0)
+                - _zone_offset(g("tz"))
+            )
+        if g("cY"):
+            month = _MONTHS.get(g("cmon"))
+            if month is None:
+                return None
+            return (
+                _day_seconds(int(g("cY")), month, int(g("cd")))
+                + int(g("cH")) * 3600 + int(g("cM")) * 60 + int(g("cS"))
+                - _zone_offset(g("ctz"))
+            )
+        return float(
+            _day_seconds(default_year, _MONTHS[g("smon")], int(g("sd")))
+            + int(g("sH")) * 3600 + int(g("sM")) * 60 + int(g("sS"))
+        )
+    except ValueError:
+        return None  # e.g. month 13 or Feb 30
+
+
+def parse_time(value: TimeValue, default_year: int | None = None) -> float | None:
+    """
+    Convert a time bound to epoch seconds.
+
+    Accepts None (open bound), epoch seconds, datetimes (naive = UTC) and
+    strings in ISO 8601 or any log timestamp format recognized above.
+
+    Raises:
+        ValueError: If a string is not a recognized timestamp
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return parse_time(datetime.fromisoformat(value.strip()))
+        except ValueError:
+            pass
+        m = _TIMESTAMP.match(value.strip())
+        if m is not None:
+            parsed = _match_time(m, default_year or datetime.now(timezone.utc).year)
+            if parsed is not None:
+                return parsed
+        raise ValueError(f"Unrecognized timestamp: {value!r}")
+    raise TypeError(f"time must be str, number or datetime, got {type(value).__name__}")
+
+
+def format_time(ts: float) -> str:
+    """Format epoch seconds as an ISO 8601 UTC string."""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class TimestampIndex:
+    """
+    Timestamps of log entries in document order.
+
+    Attributes:
+        times: Epoch seconds of each entry
+        offsets: Start offset of each entry's line (ascending)
+        monotonic: Whether times never decrease; time slices of a monotonic
+            log are two binary searches, others scan the entries in range
+    """
+
+    __slots__ = ("times", "offsets", "monotonic", "_order")
+
+    def __init__(self, times: Sequence[float], offsets: Sequence[int], monotonic: bool):
+        self.times = times
+        self.offsets = offsets
+        self.monotonic = monotonic
+        self._order: tuple[list[int], list[float]] | None = None
+
+    @classmethod
+    def build(cls, context: str, default_year: int | None = None) -> TimestampIndex:
+        """Parse the leading timestamp of every line in one regex pass."""
+        index = cls(array("d"), array("q"), True)
+        index.extend(context, 0, default_year)
+        return index
+
+    def extend(self, context: str, start: int, default_year: int | None = None) -> None:
+        """Index the log lines of context after start (a line start) in place."""
+        if not isinstance(self.times, array):
+            # Persisted arrays are read-only
+            self.times = array("d", self.times)
+            self.offsets = array("q", self.offsets)
+        year = default_year or datetime.now(timezone.utc).year
+        times, offsets = self.times, self.offsets
+        last = times[-1] if len(times) else float("-inf")
+        for m in _TIMESTAMP.finditer(context, start):
+            ts = _match_time(m, year)
+            if ts is None:
+                continue
+            if ts < last:
+                self.monotonic = False
+            last = ts
+            times.append(ts)
+            offsets.append(m.start())
+        self._order = None
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def to_buffers(self) -> tuple[dict, dict[str, Any]]:
+        """Return (metadata, named arrays) for persisting (see rlm.sidecar)."""
+        return {"monotonic": self.monotonic}, {"times": self.times, "offsets": self.offsets}
+
+    @classmethod
+    def from_buffers(cls, meta: dict, buffers: dict[str, Any]) -> TimestampIndex:
+        """Rebuild from persisted buffers; arrays stay memory-mapped."""
+        return cls(buffers["times"], buffers["offsets"], meta["monotonic"])
+
+    def time_range(self) -> tuple[float, float] | None:
+        """Earliest and latest timestamp, or None if the context has none."""
+        if not len(self.times):
+            return None
+        if self.monotonic:
+            return self.times[0], self.times[-1]
+        return min(self.times), max(self.times)
+
+    def timestamp_at(self, pos: int) -> float | None:
+        """Timestamp of the entry containing position pos."""
+        i = bisect_right(self.offsets, pos) - 1
+        return self.times[i] if i >= 0 else None
+
+    def _entries(self, start: float | None, end: float | None) -> list[int] | range:
+        """Ordinals of the entries with start <= time < end."""
+        n = len(self.times)
+        if self.monotonic:
+            lo = 0 if start is None else bisect_left(self.times, start)
+            hi = n if end is None else bisect_left(self.times, end)
+            return range(lo, max(lo, hi))
+        if self._order is None:
+            order = sorted(range(n), key=self.times.__getitem__)
+            self._order = (order, [self.times[i] for i in order])
+        order, keys = self._order
+        lo = 0 if start is None else bisect_left(keys, start)
+        hi = n if end is None else bisect_left(keys, end)
+        return order[lo:hi]
+
+    def span(self, start: float | None, end: float | None, context_length: int) -> tuple[int, int]:
+        """
+        Character span of the entries with start <= time < end.
+
+        The span runs from the first matching entry's line to the line of
+        the next entry after the last one, so continuation lines are kept.
+        Open bounds extend to the start / end of the context. For
+        non-monotonic logs the span covers every matching entry and may
+        include out-of-order entries between them.
+        """
+        entries = self._entries(start, end)
+        if not entries:
+            return (0, 0)
+        if self.monotonic:
+            first, last = entries[0], entries[-1]
+        else:
+            first, last = min(entries), max(entries)
+        lo = 0 if start is None else self.offsets[first]
+        hi = context_length if end is None or last + 1 >= len(self.offsets) else self.offsets[last + 1]
+        return lo, hi
+
+    def histogram(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        bucket_seconds: int = 60,
+        positions: Sequence[int] | None = None,
+    ) -> list[tuple[float, int]]:
+        """
+        Count entries (or positions) per time bucket.
+
+        Args:
+            start, end: Time bounds (epoch seconds; None = open)
+            bucket_seconds: Bucket width (default: one minute)
+            positions: Count these context positions (e.g. match starts)
+                by the timestamp of their entry instead of counting entries
+
+        Returns:
+            (bucket start, count) pairs in time order, empty buckets omitted
+        """
+        counts: dict[float, int] = {}
+        if positions is None:
+            stamps = (self.times[i] for i in self._entries(start, end))
+        else:
+            stamps = _stamps_at(self, positions, start, end)
+        for ts in stamps:
+            bucket = ts - ts % bucket_seconds
+            counts[bucket] = counts.get(bucket, 0) + 1
+        return sorted(counts.items())
+
+
+def _stamps_at(
+    index: TimestampIndex,
+    positions: Sequence[int],
+    start: float | None,
+    end: float | None,
+):
+    for pos in positions:
+        ts = index.timestamp_at(pos)
+        if ts is not None and (start is None or ts >= start) and (end is None or ts < end):
+            yield ts
+
+
+register_index_kind("timestamps", TimestampIndex)
+
+
+def get_timestamp_index(context: str) -> TimestampIndex:
+    """Get (or build and cache) the timestamp index for a context."""
+    return get_index_cache().get(context, "timestamps", TimestampIndex.build)
+
+
+def time_window(context: str, since: TimeValue = None, until: TimeValue = None) -> tuple[int, int]:
+    """Character span of the log entries in [since, until)."""
+    return get_timestamp_index(context).span(parse_time(since), parse_time(until), len(context))
@@ -0,0 +1,365 @@
+"""
+RLM Token Estimation
+
+Shared token estimator used by guards (check_token_limit), chunkers
+(context_packed_chunks) and planners (plan_windows).
+
+Backends:
+- HeuristicEstimator: chars-per-token ratios per content type (prose,
+  code, json, cjk, other), calibrated online from the prompt_tokens the
+  API reports for each subcall. Each task run counts with the ratios
+  frozen at its start (see TokenCounter.freeze), so chunks packed or
+  planned early in a run still pass the guard after later calls
+  recalibrate; new ratios take effect from the next run.
+- BPEEstimator: exact counts from a local .tiktoken-format vocabulary
+  file (base64 token, rank per line). Uses the tiktoken package when it
+  is installed and a pure-Python byte-pair merge otherwise; nothing is
+  downloaded.
+
+The active backend is wrapped in a TokenCounter that memoizes counts per
+chunk hash. Set RLM_TOKENIZER_VOCAB to a vocabulary file to use the BPE
+backend by default.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Protocol
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # tiktoken is optional
+
+
+# Tokens the subcall message framing (system message, INSTRUCTION /
+# CONTEXT CHUNK labels, chat roles) adds on top of prompt + chunk
+MESSAGE_OVERHEAD_TOKENS = 50
+
+# Approximation of the cl100k pre-tokenizer using only the stdlib re module
+CL100K_PATTERN = (
+    r"(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\w]?[^\W\d_]+|\d{1,3}"
+    r"| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"
+)
+
+
+class TokenEstimator(Protocol):
+    """A token counting backend."""
+
+    def count(self, text: str) -> int: ...
+
+    def observe(self, text: str, actual_tokens: int) -> None: ...
+
+
+# =============================================================================
+# Heuristic backend
+# =============================================================================
+
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+_CODE_SYMBOLS = re.compile(r"[{}()\[\];=<>_:]|^[ \t]{4,}", re.MULTILINE)
+_JSON_SYMBOLS = re.compile(r"[{}\[\]\":,]")
+
+
+def classify_content(text: str, sample_chars: int = 2000) -> str:
+    """
+    Classify text as "prose", "code", "json", "cjk" or "other" from a sample.
+
+    Only sample_chars characters (half from the start, half from the
+    middle) are inspected, so this is O(1) in the length of the text.
+    """
+    half = sample_chars // 2
+    if len(text) <= sample_chars:
+        sample = text
+    else:
+        mid = len(text) // 2
+        sample = text[:half] + text[mid:mid + half]
+    if not sample:
+        return "prose"
+    n = len(sample)
+    if len(_CJK.findall(sample)) > 0.2 * n:
+        return "cjk"
+    non_ascii = sum(1 for ch in sample if ord(ch) > 127)
+    if non_ascii > 0.3 * n:
+        return "other"
+    stripped = sample.lstrip()
+    if stripped[:1] in ("{", "[") and len(_JSON_SYMBOLS.findall(sample)) > 0.1 * n:
+        return "json"
+    if len(_CODE_SYMBOLS.findall(sample)) > 0.06 * n:
+        return "code"
+    return "prose"
+
+
+class HeuristicEstimator:
+    """
+    Chars-per-token estimator with per-content-type ratios.
+
+    Ratios start from typical cl100k values and are refined by observe()
+    with an exponential moving average of the observed chars per token.
+
+    Args:
+        ratios: Initial chars-per-token ratio per content type
+        alpha: Weight of each new observation (0-1)
+        min_observed_chars: Ignore observations on shorter texts
+    """
+
+    DEFAULT_RATIOS = {
+        "prose": 4.0,
+        "code": 3.2,
+        "json": 2.8,
+        "cjk": 1.0,
+        "other": 2.0,
+    }
+
+    def __init__(
+        self,
+        ratios: dict[str, float] | None = None,
+        alpha: float = 0.2,
+        min_observed_chars: int = 200,
+    ):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"alpha must be in (0, 1], got {alpha}")
+        self.ratios = dict(self.DEFAULT_RATIOS)
+        if ratios:
+            self.ratios.update(ratios)
+        self.alpha = alpha
+        self.min_observed_chars = min_observed_chars
+        self.observations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, text: str, ratios: dict[str, float] | None = None) -> int:
+        ratio = (ratios or self.ratios)[classify_content(text)]
+        return max(1, math.ceil(len(text) / ratio))
+
+    def observe(self, text: str, actual_tokens: int) -> None:
+        """Refine the ratio for this text's content type from a measured count."""
+        if actual_tokens < 1 or len(text) < self.min_observed_chars:
+            return
+        kind = classify_content(text)
+        observed = len(text) / actual_tokens
+        with self._lock:
+            self.ratios[kind] += self.alpha * (observed - self.ratios[kind])
+            self.observations[kind] = self.observations.get(kind, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "heuristic",
+                "ratios": {kind: round(r, 3) for kind, r in self.ratios.items()},
+                "observations": dict(self.observations),
+            }
+
+
+# =============================================================================
+# BPE backend
+# =============================================================================
+
+def load_tiktoken_vocab(path: str) -> dict[bytes, int]:
+    """Load a .tiktoken-format vocabulary file (base64 token, rank per line)."""
+    ranks: dict[bytes, int] = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+def _bpe_count(piece: bytes, ranks: dict[bytes, int]) -> int:
+    """Number of tokens a pre-tokenized piece merges into."""
+    if piece in ranks:
+        return 1
+    parts = [piece[i:i + 1] for i in range(len(piece))]
+    while len(parts) > 1:
+        best_rank = None
+        best_i = -1
+        for i in range(len(parts) - 1):
+            rank = ranks.get(parts[i] + parts[i + 1])
+            if rank is not None and (best_rank is None or rank < best_rank):
+                best_rank = rank
+                best_i = i
+        if best_rank is None:
+            break
+        parts[best_i:best_i + 2] = [parts[best_i] + parts[best_i + 1]]
+    return len(parts)
+
+
+class BPEEstimator:
+    """
+    Exact token counts from a local byte-pair-encoding vocabulary.
+
+    Args:
+        vocab_path: Path to a .tiktoken-format vocabulary file
+        pattern: Pre-tokenization regex (default: cl100k approximation)
+        max_cached_pieces: Memoized pre-token counts (pure-Python path)
+    """
+
+    def __init__(self, vocab_path: str, pattern: str = CL100K_PATTERN, max_cached_pieces: int = 100_000):
+        self.vocab_path = vocab_path
+        self._ranks = load_tiktoken_vocab(vocab_path)
+        self._pattern = re.compile(pattern)
+        self._encoding = None
+        if tiktoken is not None:
+            self._encoding = tiktoken.Encoding(
+                name=os.path.basename(vocab_path),
+                pat_str=pattern,
+                mergeable_ranks=self._ranks,
+                special_tokens={},
+            )
+        self.max_cached_pieces = max_cached_pieces
+        self._pieces: dict[str, int] = {}
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return max(1, len(self._encoding.encode_ordinary(text)))
+        total = 0
+        pieces = self._pieces
+        for piece in self._pattern.findall(text):
+            n = pieces.get(piece)
+            if n is None:
+                n = _bpe_count(piece.encode("utf-8", "surrogatepass"), self._ranks)
+                if len(pieces) < self.max_cached_pieces:
+                    pieces[piece] = n
+            total += n
+        return max(1, total)
+
+    def observe(self, text: str, actual_tokens: int) -> None:
+        pass  # Counts are exact; nothing to calibrate
+
+    def stats(self) -> dict:
+        return {
+            "backend": "bpe",
+            "vocab": self.vocab_path,
+            "vocab_size": len(self._ranks),
+            "tiktoken": self._encoding is not None,
+        }
+
+
+# =============================================================================
+# Shared counter
+# =============================================================================
+
+# Heuristic calibration a run counts with: (counter, generation, ratios)
+_frozen_calibration: ContextVar[tuple[TokenCounter, int, dict[str, float]] | None] = ContextVar(
+    "rlm_frozen_calibration", default=None
+)
+
+
+class TokenCounter:
+    """
+    Memoizing front end over an estimator backend.
+
+    Counts for texts of at least min_cached_chars are cached by a hash of
+    the text. Calibration (observe) invalidates cached heuristic counts,
+    except for runs that froze the calibration they started with.
+
+    Args:
+        backend: The estimator that produces counts
+        max_entries: Maximum number of memoized counts
+        min_cached_chars: Shorter texts are counted directly
+    """
+
+    def __init__(self, backend: TokenEstimator, max_entries: int = 4096, min_cached_chars: int = 256):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.min_cached_chars = min_cached_chars
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._memo: OrderedDict[bytes, tuple[int, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def freeze(self) -> None:
+        """
+        Count with the current calibration for the rest of this task run.
+
+        Called by init_guards. Observations made during the run still
+        refine the shared ratios, but only runs started later use them.
+        """
+        if not isinstance(self.backend, HeuristicEstimator):
+            return  # Exact counts never change
+        with self._lock, self.backend._lock:
+            _frozen_calibration.set((self, self._generation, dict(self.backend.ratios)))
+
+    def _count(self, text: str, frozen: tuple | None) -> int:
+        if frozen is None:
+            return self.backend.count(text)
+        return self.backend.count(text, frozen[2])
+
+    def count(self, text: str) -> int:
+        """Return the token count of text."""
+        frozen = _frozen_calibration.get()
+        if frozen is not None and frozen[0] is not self:
+            frozen = None  # Frozen for a replaced counter
+        if len(text) < self.min_cached_chars:
+            return self._count(text, frozen)
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            generation = self._generation if frozen is None else frozen[1]
+            cached = self._memo.get(key)
+            if cached is not None and cached[0] == generation:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        n = self._count(text, frozen)
+        with self._lock:
+            self._memo[key] = (generation, n)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return n
+
+    def observe(self, text: str, actual_tokens: int) -> None:
+        """Feed a measured token count back to the backend."""
+        self.backend.observe(text, actual_tokens)
+        if isinstance(self.backend, HeuristicEstimator):
+            with self._lock:
+                self._generation += 1
+
+    def observe_usage(self, prompt: str, context_chunk: str, prompt_tokens: int) -> None:
+        """Calibrate from a subcall's reported prompt_tokens."""
+        if prompt_tokens > MESSAGE_OVERHEAD_TOKENS:
+            self.observe(f"{prompt}\n\n{context_chunk}", prompt_tokens - MESSAGE_OVERHEAD_TOKENS)
+
+    def stats(self) -> dict:
+        """Return backend and memoization statistics."""
+        with self._lock:
+            memo = {"entries": len(self._memo), "hits": self.hits, "misses": self.misses}
+        return {**self.backend.stats(), "memo": memo}
+
+
+_counter: TokenCounter | None = None
+_counter_lock = threading.Lock()
+
+
+def get_token_estimator() -> TokenCounter:
+    """Get the shared token counter, creating it on first use."""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                vocab = os.environ.get("RLM_TOKENIZER_VOCAB")
+                backend = BPEEstimator(vocab) if vocab else HeuristicEstimator()
+                _counter = TokenCounter(backend)
+    return _counter
+
+
+def set_token_estimator(backend: TokenEstimator) -> TokenCounter:
+    """Replace the shared estimator backend and return the new counter."""
+    global _counter
+    with _counter_lock:
+        _counter = TokenCounter(backend)
+    return _counter
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in text with the shared estimator."""
+    return get_token_estimator().count(text)
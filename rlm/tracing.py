@@ -0,0 +1,185 @@
+"""
+RLM Tracing
+
+Lightweight timing spans for finding where a task spends its time:
+context access, guard checks, network calls and task-defined phases.
+
+Tracing is off unless a Tracer is bound to the current task (run_task
+does this when given a tracer). With no tracer bound, instrumented code
+pays a single context-variable lookup per call.
+
+Export formats:
+- Chrome trace event format (load in chrome://tracing or Perfetto)
+- Compact JSON summary (per-span and per-category totals)
+
+Example:
+    >>> tracer = Tracer()
+    >>> output = run_task(find_errors_in_log, logs, tracer=tracer)
+    >>> output["trace_summary"]["by_category"]
+    {'context': {...}, 'guard': {...}, 'network': {...}, 'phase': {...}}
+    >>> tracer.write_chrome_trace("trace.json")
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, TypeVar
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Tracer:
+    """
+    Collects completed spans for one task run.
+
+    Spans are stored as flat tuples; timestamps are perf_counter seconds
+    relative to the tracer's creation.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._spans: list[tuple[str, str, float, float, int, dict[str, Any] | None]] = []
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        end: float,
+        args: dict[str, Any] | None = None,
+    ) -> None:
+        """Record a completed span (start/end are perf_counter values)."""
+        span = (name, category, start - self._origin, end - start, threading.get_ident(), args)
+        with self._lock:
+            self._spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, category: str = "task", **args: Any) -> Iterator[None]:
+        """Time the enclosed block as a span."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, time.perf_counter(), args or None)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Return spans in the Chrome trace event format."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+        events = []
+        for name, category, offset, duration, tid, args in spans:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round(offset * 1e6, 3),
+                "dur": round(duration * 1e6, 3),
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the Chrome trace to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+    def summary(self) -> dict[str, Any]:
+        """Return per-span-name and per-category timing totals."""
+        with self._lock:
+            spans = list(self._spans)
+
+        def bucket() -> dict[str, Any]:
+            return {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+        by_name: dict[str, dict[str, Any]] = {}
+        by_category: dict[str, dict[str, Any]] = {}
+        for name, category, _, duration, _, _ in spans:
+            ms = duration * 1000
+            for stats in (by_name.setdefault(name, bucket()), by_category.setdefault(category, bucket())):
+                stats["count"] += 1
+                stats["total_ms"] += ms
+                stats["max_ms"] = max(stats["max_ms"], ms)
+
+        for table in (by_name, by_category):
+            for stats in table.values():
+                stats["total_ms"] = round(stats["total_ms"], 3)
+                stats["max_ms"] = round(stats["max_ms"], 3)
+
+        return {
+            "span_count": len(spans),
+            "wall_ms": round((time.perf_counter() - self._origin) * 1000, 3),
+            "by_category": by_category,
+            "by_name": by_name,
+        }
+
+
+# Tracer bound to the current task, None while tracing is disabled
+_active_tracer: ContextVar[Tracer | None] = ContextVar("rlm_tracer", default=None)
+
+
+def get_tracer() -> Tracer | None:
+    """Get the tracer bound to the current task (None if tracing is off)."""
+    return _active_tracer.get()
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    """Bind a tracer to the current task (None disables tracing)."""
+    _active_tracer.set(tracer)
+
+
+@contextmanager
+def trace_span(name: str, category: str = "task", **args: Any) -> Iterator[None]:
+    """Time the enclosed block if tracing is enabled."""
+    tracer = _active_tracer.get()
+    if tracer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.add(name, category, start, time.perf_counter(), args or None)
+
+
+def trace_phase(name: str) -> Any:
+    """
+    Mark a task-defined phase.
+
+    Example:
+        >>> with trace_phase("phase1_narrowing"):
+        ...     matches = context_search(context, r"error")
+    """
+    return trace_span(name, category="phase")
+
+
+def traced(name: str, category: str = "context") -> Callable[[F], F]:
+    """Decorator that records each call of a function as a span."""
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = _active_tracer.get()
+            if tracer is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                tracer.add(name, category, start, time.perf_counter())
+        return wrapper  # type: ignore[return-value]
+    return decorator
@@ -0,0 +1,136 @@
+"""
+RLM Context Views
+
+Zero-copy windows into a shared context buffer.
+
+A ContextView is a (source, start, end) triple. Creating, shifting,
+sub-slicing and merging views never copies text; the text is only
+materialized when a view is passed to a subcall (or .text is read).
+This keeps wide scan passes that take many overlapping windows at O(1)
+memory per view instead of O(window size).
+
+The backing source may be a str (offsets are characters) or a
+bytes-like object such as bytes or mmap (offsets are bytes, and text is
+decoded as UTF-8 on materialization).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Union
+
+
+Source = Union[str, bytes, bytearray, memoryview]
+
+
+class ContextView:
+    """
+    A window [start, end) into a shared context buffer.
+
+    Attributes:
+        source: The backing str or bytes-like buffer (shared, never copied)
+        start: Start offset (inclusive)
+        end: End offset (exclusive)
+
+    Example:
+        >>> view = ContextView(document, 1000, 2000)
+        >>> wider = view.expand(200, 200)
+        >>> semantic_subcall("Summarize this section.", wider)  # materialized here
+    """
+
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source: Source, start: int = 0, end: int | None = None):
+        if not isinstance(source, (str, memoryview)):
+            try:
+                source = memoryview(source)  # bytes, bytearray, mmap
+            except TypeError:
+                raise TypeError(f"source must be str or bytes-like, got {type(source).__name__}")
+        length = len(source)
+        if end is None:
+            end = length
+        start = max(0, min(start, length))
+        end = max(0, min(end, length))
+        if start > end:
+            start, end = end, start
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self) -> str:
+        """Materialize the view's text."""
+        if isinstance(self.source, str):
+            return self.source[self.start:self.end]
+        return bytes(self.source[self.start:self.end]).decode("utf-8", errors="replace")
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"ContextView({self.start}-{self.end}, len={len(self)})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ContextView):
+            return NotImplemented
+        return self.source is other.source and self.start == other.start and self.end == other.end
+
+    def __hash__(self) -> int:
+        return hash((id(self.source), self.start, self.end))
+
+    @property
+    def source_length(self) -> int:
+        """Length of the backing buffer."""
+        return len(self.source)
+
+    def sub(self, start: int, end: int | None = None) -> ContextView:
+        """Return a view of [start, end) relative to this view, clamped to it."""
+        end = len(self) if end is None else end
+        start = max(0, min(start, len(self)))
+        end = max(start, min(end, len(self)))
+        return ContextView(self.source, self.start + start, self.start + end)
+
+    def shift(self, delta: int) -> ContextView:
+        """Return the same-size window moved by delta (clamped to the buffer)."""
+        return ContextView(self.source, self.start + delta, self.end + delta)
+
+    def expand(self, before: int = 0, after: int = 0) -> ContextView:
+        """Return a view grown by `before`/`after` characters (clamped)."""
+        return ContextView(self.source, self.start - before, self.end + after)
+
+    def contains(self, pos: int) -> bool:
+        """Whether an absolute offset falls inside the view."""
+        return self.start <= pos < self.end
+
+    def overlaps(self, other: ContextView, gap: int = 0) -> bool:
+        """Whether two views on the same source overlap (or are within gap)."""
+        return (
+            self.source is other.source
+            and self.start <= other.end + gap
+            and other.start <= self.end + gap
+        )
+
+    def merge(self, other: ContextView) -> ContextView:
+        """Return the smallest view covering both (same source required)."""
+        if self.source is not other.source:
+            raise ValueError("Cannot merge views over different sources")
+        return ContextView(self.source, min(self.start, other.start), max(self.end, other.end))
+
+    @staticmethod
+    def merge_all(views: Iterable[ContextView], gap: int = 0) -> list[ContextView]:
+        """Coalesce overlapping (or within-gap) views, returned in offset order."""
+        ordered = sorted(views, key=lambda v: (id(v.source), v.start, v.end))
+        merged: list[ContextView] = []
+        for view in ordered:
+            if merged and merged[-1].overlaps(view, gap):
+                merged[-1] = merged[-1].merge(view)
+            else:
+                merged.append(view)
+        return merged
+
+
+def materialize(chunk: str | ContextView) -> str:
+    """Return the text of a chunk that may be a str or a ContextView."""
+    return chunk.text if isinstance(chunk, ContextView) else chunk
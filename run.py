@@ -6,17 +6,23 @@ Entry point for executing RLM tasks. Loads context from file,
 runs task through the guarded runtime, and prints structured output.
 
 Usage:
-    python run.py <context_file> [--task <task_name>] [--debug]
+    python run.py <context_file | -> [--task <task_name>] [--debug]
 
 Examples:
     python run.py document.txt
     python run.py logs.txt --task find_errors_in_log
     python run.py data.txt --debug
+    python run.py logs.txt --task find_errors_in_log --trace trace.json
+    python run.py logs.txt --task find_errors_in_log --since 2024-01-15T10:20 --until 2024-01-15T10:30
+    python run.py contract.txt --task extract_entities --revisions .rlm_revisions
+    python run.py app.log.gz --task find_errors_in_log
+    journalctl -f | python run.py - --task find_errors_in_log --timeout 600
 """
 
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import os
 import sys
@@ -29,6 +35,9 @@ try:
 except ImportError:
     pass  # dotenv is optional
 
+# Tasks whose Phase 1 is a forward scan: stdin is analyzed as it arrives
+STREAMING_TASKS = ("find_errors_in_log",)
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -39,6 +48,7 @@ Examples:
   python run.py document.txt
   python run.py logs.txt --task find_errors_in_log
   python run.py report.txt --cost 0.25 --timeout 30
+  python run.py big.log --task find_errors_in_log --dry-run
 
 Available tasks:
   analyze_document   - Extract title, abstract, key points, conclusion
@@ -50,7 +60,8 @@ Available tasks:
     parser.add_argument(
         "context_file",
         type=Path,
-        help="Path to the context file to process",
+        help="Path to the context file to process (plain UTF-8, gzip or zstd), "
+             "or - to read stdin",
     )
 
     parser.add_argument(
@@ -89,6 +100,85 @@ Available tasks:
         help="OpenAI model to use (default: gpt-4o-mini)",
     )
 
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Record timing spans and write a Chrome trace to FILE",
+    )
+
+    parser.add_argument(
+        "--access-log",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Stream the complete context access audit trail to a JSONL file "
+             "(only the most recent 10000 records are kept in memory)",
+    )
+
+    parser.add_argument(
+        "--since",
+        type=str,
+        default=None,
+        metavar="TIME",
+        help="Only process log entries at or after TIME (ISO 8601 or log timestamp)",
+    )
+
+    parser.add_argument(
+        "--until",
+        type=str,
+        default=None,
+        metavar="TIME",
+        help="Only process log entries before TIME",
+    )
+
+    parser.add_argument(
+        "--revisions",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Keep the analyzed version in DIR and, on later runs over an edited "
+             "file, only pay for subcalls on the changed text",
+    )
+
+    parser.add_argument(
+        "--buffer-mb",
+        type=float,
+        default=64.0,
+        metavar="MB",
+        help="Streamed stdin: most text kept in memory (default: 64)",
+    )
+
+    parser.add_argument(
+        "--batch-seconds",
+        type=float,
+        default=5.0,
+        metavar="SECONDS",
+        help="Streamed stdin: longest a batch waits for more input before "
+             "it is analyzed (default: 5)",
+    )
+
+    parser.add_argument(
+        "--spill",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Streamed stdin: append text dropped from memory to FILE",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Run context access but no LLM calls; report projected calls, tokens, cost and time",
+    )
+
+    parser.add_argument(
+        "--no-index-cache",
+        action="store_true",
+        help="Do not load or write the index sidecar in the cache dir (see RLM_INDEX_DIR)",
+    )
+
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -110,34 +200,68 @@ Available tasks:
 
     args = parser.parse_args()
 
-    # Validate API key
-    if not os.environ.get("OPENAI_API_KEY"):
+    # Validate API key (dry runs make no calls)
+    if not args.dry_run and not os.environ.get("OPENAI_API_KEY"):
         print("ERROR: OPENAI_API_KEY environment variable not set.", file=sys.stderr)
         print("Set it in .env file or export it in your shell.", file=sys.stderr)
         sys.exit(1)
 
-    # Load context from file
-    if not args.context_file.exists():
+    # Load context from file (or stdin)
+    from_stdin = str(args.context_file) == "-"
+    if from_stdin and args.revisions:
+        print("ERROR: --revisions requires a context file, not stdin.", file=sys.stderr)
+        sys.exit(1)
+    if not from_stdin and not args.context_file.exists():
         print(f"ERROR: Context file not found: {args.context_file}", file=sys.stderr)
         sys.exit(1)
 
+    from rlm.compressed import CompressedContext, detect_compression
+
+    # Forward-scan tasks analyze stdin batch by batch as it arrives
+    # (a dry run reads all of stdin to project the whole input)
+    stream_stdin = from_stdin and args.task in STREAMING_TASKS and not (args.since or args.until or args.dry_run)
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace") if from_stdin else None
+
+    compression = None
     try:
-        context = args.context_file.read_text(encoding="utf-8")
+        if stream_stdin:
+            context = None
+        elif from_stdin:
+            context = stdin.read()
+        elif compression := detect_compression(str(args.context_file)):
+            context = CompressedContext(str(args.context_file), compression)
+            # Log search streams the compressed file; other tasks (and time
+            # windows / revisions, which need the whole text) decompress it
+            # into memory
+            if args.task != "find_errors_in_log" or args.since or args.until or args.revisions:
+                context = context[:]
+        else:
+            context = args.context_file.read_text(encoding="utf-8")
     except Exception as e:
         print(f"ERROR: Failed to read context file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    if not context.strip():
+    if stream_stdin:
+        empty = False  # Known at EOF only
+    elif isinstance(context, CompressedContext):
+        empty = len(context) == 0
+    else:
+        empty = not context.strip()
+    if empty:
         print("ERROR: Context file is empty.", file=sys.stderr)
         sys.exit(1)
 
     # Import RLM modules (after environment setup)
-    from rlm.runtime import run_task
+    from rlm.runtime import run_task, run_stream
     from rlm.guards import GuardConfig
+    from rlm.tracing import Tracer
+    from rlm.access_log import ContextAccessLog, JsonlSink
     from tasks.example_task import (
         analyze_document,
         find_errors_in_log,
         extract_entities,
+        merge_error_reports,
+        rebase_error_report,
     )
 
     # Map task names to functions
@@ -149,6 +273,30 @@ Available tasks:
 
     task_fn = task_map[args.task]
 
+    # Index sidecars describe the text of plain files only
+    source_path = None if args.no_index_cache or compression or from_stdin else str(args.context_file)
+    revision_key = f"{args.context_file.resolve()}:{args.task}"
+
+    # Narrow a log to an incident window with the (persisted) timestamp index
+    if args.since or args.until:
+        from rlm.sidecar import load_sidecar, persist_new_indexes
+        from rlm.timeline import time_window
+
+        persisted = load_sidecar(context, source_path) if source_path else []
+        try:
+            start, end = time_window(context, args.since, args.until)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        if source_path:
+            persist_new_indexes(context, source_path, persisted)
+        context = context[start:end]
+        source_path = None  # Indexes of the window are not the file's
+
+        if not context.strip():
+            print("ERROR: No log entries in the requested time window.", file=sys.stderr)
+            sys.exit(1)
+
     # Configure guards
     config = GuardConfig(
         max_cost=args.cost,
@@ -160,12 +308,67 @@ Available tasks:
     # Print task info
     if args.debug:
         print(f"Task: {args.task}", file=sys.stderr)
-        print(f"Context: {args.context_file} ({len(context)} chars)", file=sys.stderr)
+        if stream_stdin:
+            print("Context: stdin (streamed)", file=sys.stderr)
+        else:
+            print(f"Context: {args.context_file} ({len(context)} chars)", file=sys.stderr)
         print(f"Budget: ${config.max_cost:.2f}, {config.max_runtime_seconds}s timeout", file=sys.stderr)
         print("-" * 60, file=sys.stderr)
 
+    revisions = None
+    if args.revisions:
+        from rlm.revisions import RevisionStore
+        revisions = RevisionStore(str(args.revisions))
+        if args.since or args.until:
+            revision_key += f":{args.since}:{args.until}"
+
     # Execute task
-    result = run_task(task_fn, context, config)
+    tracer = Tracer() if args.trace else None
+    access_log = None
+    if args.access_log:
+        access_log = ContextAccessLog(max_records=10_000, sinks=[JsonlSink(str(args.access_log))])
+    if stream_stdin:
+        merge, rebase = {"find_errors_in_log": (merge_error_reports, rebase_error_report)}[args.task]
+        spill = open(args.spill, "a", encoding="utf-8") if args.spill else None
+
+        def progress(output: dict) -> None:
+            if args.debug:
+                start, end = output["analyzed_range"]
+                print(f"Batch {start}-{end}: {output['status']}", file=sys.stderr)
+
+        try:
+            result = run_stream(
+                task_map[args.task], stdin, config,
+                merge=merge, rebase=rebase,
+                max_chars=int(args.buffer_mb * 1024 * 1024),
+                batch_seconds=args.batch_seconds,
+                spill=spill,
+                tracer=tracer,
+                access_log=access_log,
+                on_batch=progress,
+            )
+        finally:
+            if spill is not None:
+                spill.close()
+    else:
+        result = run_task(
+            task_fn, context, config,
+            tracer=tracer,
+            access_log=access_log,
+            source_path=source_path,
+            revisions=revisions,
+            revision_key=revision_key,
+            dry_run=args.dry_run,
+        )
+
+    if access_log is not None:
+        for sink in access_log.sinks:
+            sink.close()
+
+    if tracer is not None:
+        tracer.write_chrome_trace(str(args.trace))
+        if args.debug:
+            print(f"Trace written to {args.trace}", file=sys.stderr)
 
     # Output
     indent = None if args.compact else 2
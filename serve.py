@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+RLM Daemon Entry Point
+
+Starts a long-running RLM worker that keeps the OpenAI client, context
+indexes and subcall responses warm, and accepts jobs over a local JSON API.
+
+Usage:
+    python serve.py [--port <port> | --socket <path>] [--jobs <n>]
+
+Examples:
+    python serve.py --port 8765
+    python serve.py --socket /tmp/rlm.sock --jobs 8
+
+    curl -s localhost:8765/jobs -d '{"task": "find_errors_in_log",
+        "context_file": "logs.txt", "config": {"max_cost": 0.10}}'
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+# Load environment variables from .env if present
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv is optional
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the RLM daemon (warm worker with a local JSON API)",
+    )
+
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Host to bind the HTTP API to (default: 127.0.0.1)",
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Port for the HTTP API (default: 8765)",
+    )
+
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Serve on a Unix domain socket instead of TCP",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="Maximum concurrently running jobs (default: 4)",
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        help="Also dump Prometheus metrics to this file every 15s",
+    )
+
+    parser.add_argument(
+        "--no-response-cache",
+        action="store_true",
+        help="Disable reuse of identical subcall responses across jobs",
+    )
+
+    args = parser.parse_args()
+
+    # Validate API key
+    if not os.environ.get("OPENAI_API_KEY"):
+        print("ERROR: OPENAI_API_KEY environment variable not set.", file=sys.stderr)
+        print("Set it in .env file or export it in your shell.", file=sys.stderr)
+        sys.exit(1)
+
+    from rlm.daemon import RLMDaemon
+    from tasks.example_task import (
+        analyze_document,
+        find_errors_in_log,
+        extract_entities,
+    )
+
+    daemon = RLMDaemon(
+        {
+            "analyze_document": analyze_document,
+            "find_errors_in_log": find_errors_in_log,
+            "extract_entities": extract_entities,
+        },
+        max_concurrent_jobs=args.jobs,
+        cache_responses=not args.no_response_cache,
+    )
+    daemon.warm_up()
+
+    if args.metrics_file:
+        from rlm.metrics import MetricsDumper
+        dumper = MetricsDumper(args.metrics_file)
+        dumper.start()
+
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"RLM daemon listening on {where} ({args.jobs} concurrent jobs)", file=sys.stderr)
+
+    try:
+        if args.socket:
+            daemon.serve_unix(args.socket)
+        else:
+            daemon.serve_http(args.host, args.port)
+    except KeyboardInterrupt:
+        print("\nShutting down.", file=sys.stderr)
+    finally:
+        if args.metrics_file:
+            dumper.stop()
+
+
+if __name__ == "__main__":
+    main()
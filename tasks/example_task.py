@@ -10,18 +10,45 @@ This task finds and analyzes key sections in a document.
 
 from __future__ import annotations
 
+import re
+from bisect import bisect_left
+from dataclasses import replace
+from itertools import islice
+
 from rlm.context_access import (
     context_head,
     context_tail,
     context_search,
+    context_search_iter,
     context_slice,
     context_around_match,
+    context_rank,
+    context_section,
+    context_sections,
+    context_table_schema,
+    context_rows,
+    context_row_chunks,
+    stream_windows,
 )
+from rlm.guards import BudgetExceededError
+from rlm.planner import batched, estimate_call_cost, make_candidate, plan_budget, plan_stream
+from rlm.severity import score_windows, severity_weight
+from rlm.tabular import get_table_index
 from rlm.subcalls import (
     semantic_subcall,
     semantic_subcall_json,
     semantic_subcall_choice,
 )
+from rlm.tracing import trace_phase
+
+# Candidate bounds of Phase 1; the budget planner decides how many of
+# the candidates get a subcall
+MAX_KEY_POINTS = 10
+MAX_ERROR_HITS = 200
+MAX_ENTITY_CHUNKS = 50
+
+# Candidates planned together while the scan goes on
+WINDOW_BATCH = 16
 
 
 def analyze_document(context: str) -> dict:
@@ -45,87 +72,101 @@ def analyze_document(context: str) -> dict:
     # Code navigates context, identifies relevant regions
     # =========================================================================
 
-    findings = {
-        "document_length": len(context),
-        "title": None,
-        "abstract": None,
-        "key_points": [],
-        "conclusion": None,
-        "document_type": None,
-    }
-
-    # --- Extract potential title from head ---
-    # First 500 chars likely contain title/heading
-    head_chunk = context_head(context, 500)
-
-    # --- Search for key structural elements ---
-    # Find section markers to understand document structure
-    section_matches = context_search(
-        context,
-        r"(abstract|introduction|summary|conclusion|results|discussion)",
-        max_hits=10,
-    )
-
-    # --- Find key claims or important statements ---
-    claim_matches = context_search(
-        context,
-        r"(conclude|finding|result|important|significant|key|critical)",
-        max_hits=5,
-    )
+    with trace_phase("phase1_narrowing"):
+        findings = {
+            "document_length": len(context),
+            "title": None,
+            "abstract": None,
+            "key_points": [],
+            "conclusion": None,
+            "document_type": None,
+        }
+
+        # --- Extract potential title from head ---
+        # First 500 chars likely contain title/heading
+        head_chunk = context_head(context, 500)
+
+        # --- Locate sections from the document's headings ---
+        sections = list(context_sections(context))
+        abstract_chunk = context_section(context, "abstract", max_chars=4000)
+        if abstract_chunk is None:
+            # No abstract heading: fall back to the first mention of the word
+            abstract_matches = context_search(context, r"\babstract\b", max_hits=1)
+            if abstract_matches:
+                abstract_chunk = context_around_match(context, abstract_matches[0], before=50, after=1000)
+        conclusion_chunk = context_section(context, "conclusion", max_chars=1500)
+        if conclusion_chunk is None:
+            # Conclusions usually close a document
+            conclusion_chunk = context_tail(context, 1500)
+
+        # --- Find key claims or important statements ---
+        # Rank passages by relevance instead of taking the earliest hits
+        claim_passages = context_rank(
+            context,
+            "conclude conclusion finding findings result results important significant key critical",
+            k=MAX_KEY_POINTS,
+        )
 
     # =========================================================================
     # PHASE 2: Semantic Interpretation
     # LLM reasons on bounded chunks (depth=1, no recursion)
     # =========================================================================
 
-    # --- Extract title from head ---
-    findings["title"] = semantic_subcall(
-        "Extract the document title or main heading from this text. "
-        "Return ONLY the title text, nothing else. "
-        "If no clear title exists, return 'Untitled Document'.",
-        head_chunk,
-    ).strip()
-
-    # --- Classify document type ---
-    findings["document_type"] = semantic_subcall_choice(
-        "What type of document is this based on the opening?",
-        head_chunk,
-        choices=["research_paper", "report", "article", "documentation", "other"],
-        default="other",
+    claim_prompt = (
+        "Extract the key claim or finding from this text. "
+        "Return JSON: {\"claim\": \"the main claim\", \"confidence\": \"high|medium|low\"}"
+    )
+    conclusion_prompt = (
+        "Extract the main conclusion or final takeaway from this text. "
+        "Summarize in 1-2 sentences. If no clear conclusion, state that."
     )
 
-    # --- Extract abstract if present ---
-    abstract_matches = [m for m in section_matches if "abstract" in m.text.lower()]
-    if abstract_matches:
-        abstract_chunk = context_around_match(context, abstract_matches[0], before=50, after=1000)
-        findings["abstract"] = semantic_subcall(
-            "Extract the abstract or summary section from this text. "
-            "Return only the abstract content, not the heading.",
-            abstract_chunk,
+    with trace_phase("phase2_semantic"):
+        # --- Extract title from head ---
+        findings["title"] = semantic_subcall(
+            "Extract the document title or main heading from this text. "
+            "Return ONLY the title text, nothing else. "
+            "If no clear title exists, return 'Untitled Document'.",
+            head_chunk,
         ).strip()
 
-    # --- Extract key points from claim statements ---
-    for match in claim_matches[:3]:  # Bounded: max 3 key points
-        chunk = context_around_match(context, match, before=100, after=200)
-        point = semantic_subcall_json(
-            "Extract the key claim or finding from this text. "
-            "Return JSON: {\"claim\": \"the main claim\", \"confidence\": \"high|medium|low\"}",
-            chunk,
-            default={"claim": "Unable to extract", "confidence": "low"},
+        # --- Classify document type ---
+        findings["document_type"] = semantic_subcall_choice(
+            "What type of document is this based on the opening?",
+            head_chunk,
+            choices=["research_paper", "report", "article", "documentation", "other"],
+            default="other",
         )
-        findings["key_points"].append({
-            "position": match.start,
-            "line": match.line_number,
-            **point,
-        })
-
-    # --- Extract conclusion from tail ---
-    tail_chunk = context_tail(context, 1500)
-    findings["conclusion"] = semantic_subcall(
-        "Extract the main conclusion or final takeaway from this text. "
-        "Summarize in 1-2 sentences. If no clear conclusion, state that.",
-        tail_chunk,
-    ).strip()
+
+        # --- Extract abstract if present ---
+        if abstract_chunk is not None:
+            findings["abstract"] = semantic_subcall(
+                "Extract the abstract or summary section from this text. "
+                "Return only the abstract content, not the heading.",
+                abstract_chunk,
+            ).strip()
+
+        # --- Extract key points from the best claims the budget allows ---
+        # (keeping enough for the conclusion call that follows)
+        candidates = []
+        for passage in claim_passages:
+            chunk = context_slice(context, passage.start, passage.end)
+            candidates.append(make_candidate((passage, chunk), claim_prompt, chunk, priority=passage.score, helper="json"))
+        plan = plan_budget(candidates, reserve=estimate_call_cost(conclusion_prompt, conclusion_chunk))
+        points = plan.dispatch(lambda item: semantic_subcall_json(
+            claim_prompt,
+            item[1],
+            default={"claim": "Unable to extract", "confidence": "low"},
+        ))
+        for (passage, chunk), point in zip(plan.items, points):
+            findings["key_points"].append({
+                "position": passage.start,
+                "line": passage.line_number,
+                **point,
+            })
+
+        # --- Extract conclusion ---
+        findings["conclusion"] = semantic_subcall(conclusion_prompt, conclusion_chunk).strip()
 
     # =========================================================================
     # AGGREGATION: Python constructs final result
@@ -135,55 +176,125 @@ def analyze_document(context: str) -> dict:
     return {
         "analysis": findings,
         "metadata": {
-            "sections_found": len(section_matches),
+            "sections_found": len(sections),
             "claims_analyzed": len(findings["key_points"]),
+            "claims_found": len(claim_passages),
             "has_abstract": findings["abstract"] is not None,
         },
     }
 
 
-def find_errors_in_log(context: str) -> dict:
+def find_errors_in_log(context: str, start: int = 0) -> dict:
     """
     Example task: Find and classify errors in a log file.
 
-    Demonstrates bounded iteration with early termination.
+    Demonstrates bounded iteration with early termination. Clustered
+    hits are coalesced into shared windows so one subcall covers them all.
+    Windows are scored by severity, template rarity and recency. While
+    the budget surely covers every window the scan can still produce,
+    they are classified as the scan yields them; otherwise they are held
+    back, rescored over all windows once the scan ends, and the most
+    important ones the budget can pay for are classified concurrently,
+    highest first. If a limit is hit anyway, the windows classified so
+    far are reported as the partial result.
 
     Args:
-        context: Log file content
+        context: Log file content (or a CompressedContext for .gz / .zst logs)
+        start: Only analyze the log from this position on (the high-water
+            mark of an incremental run; see rlm.runtime.run_incremental)
 
     Returns:
         Categorized error analysis
     """
-
-    # Phase 1: Programmatic narrowing
-    error_matches = context_search(
-        context,
-        r"(error|exception|failed|fatal|critical)",
-        max_hits=10,  # Hard limit on iterations
+    # Structured logs (CSV / JSON lines) are filtered on their level column
+    schema = context_table_schema(context) if isinstance(context, str) else None
+    if schema is not None:
+        level_column = next((c for c in schema["columns"] if c.lower() in _LEVEL_COLUMNS), None)
+        if level_column is not None:
+            return _find_errors_in_table(context, level_column, start)
+
+    classify_prompt = (
+        "Classify this error. Return JSON: "
+        "{\"severity\": \"critical|warning|info\", "
+        "\"category\": \"network|database|auth|validation|other\", "
+        "\"message\": \"brief description\"}"
     )
 
-    # Phase 2: Semantic interpretation (bounded)
-    errors = []
-    for match in error_matches[:5]:  # Process at most 5
-        chunk = context_around_match(context, match, before=100, after=200)
-
-        classification = semantic_subcall_json(
-            "Classify this error. Return JSON: "
-            "{\"severity\": \"critical|warning|info\", "
-            "\"category\": \"network|database|auth|validation|other\", "
-            "\"message\": \"brief description\"}",
+    error_matches = []
+
+    def scan():
+        # Phase 1: Programmatic narrowing, one forward scan
+        for match in context_search_iter(
+            context,
+            r"(error|exception|failed|fatal|critical)",
+            max_hits=MAX_ERROR_HITS,  # Hard limit on iterations
+            start=start,
+        ):
+            error_matches.append(match)
+            yield match
+
+    # (window, chunk) of every window so far; rarity is counted over all
+    seen = []
+
+    def scores():
+        length = len(context) if isinstance(context, str) or context.indexed else seen[-1][0].end
+        return score_windows([window for window, _ in seen], [chunk for _, chunk in seen], length)
+
+    def candidates():
+        # Overlapping windows around clustered hits share one subcall;
+        # priorities are provisional until the scan ends
+        windows = stream_windows(context, scan(), before=100, after=200, prompt=classify_prompt)
+        for batch in batched(windows, WINDOW_BATCH):
+            first = len(seen)
+            seen.extend((window, context_slice(context, window.start, window.end)) for window in batch)
+            yield [
+                make_candidate(item, classify_prompt, item[1], priority=score, helper="json")
+                for item, score in zip(seen[first:], scores()[first:])
+            ]
+
+    def rescore(held_back):
+        final = {id(window): score for (window, _), score in zip(seen, scores())}
+        return [replace(c, priority=final[id(c.item[0])]) for c in held_back]
+
+    # Coverage follows the budget: the most important windows of the
+    # whole log that the remaining budget can pay for
+    plan = plan_stream(candidates(), limit=MAX_ERROR_HITS, rescore=rescore)
+
+    def classify(item):
+        window, chunk = item
+        return semantic_subcall_json(
+            classify_prompt,
             chunk,
             default={"severity": "info", "category": "other", "message": "Unknown error"},
         )
 
-        errors.append({
-            "position": match.start,
-            "line": match.line_number,
-            "matched_text": match.text,
-            **classification,
-        })
-
-    # Aggregation in Python
+    # Aggregation in Python, most important windows first
+    def report() -> dict:
+        completed = plan.completed(by_priority=True)
+        errors = []
+        for (window, chunk), classification in completed:
+            for match in window.matches:
+                errors.append({
+                    "position": match.start,
+                    "line": match.line_number,
+                    "matched_text": match.text,
+                    **classification,
+                })
+        return _error_report(errors, len(error_matches), len(completed), plan.candidates)
+
+    # Phases overlap: windows are classified while the scan continues
+    with trace_phase("phase1_phase2_pipelined"):
+        try:
+            plan.dispatch(classify)
+        except BudgetExceededError as e:
+            e.partial_result = report()
+            raise
+
+    return report()
+
+
+def _error_report(errors: list[dict], total_matches: int, subcalls: int, candidates: int) -> dict:
+    """Error report of find_errors_in_log with its per-severity counts."""
     severity_counts = {}
     for error in errors:
         sev = error.get("severity", "info")
@@ -192,18 +303,131 @@ def find_errors_in_log(context: str) -> dict:
     return {
         "errors": errors,
         "summary": {
-            "total_matches": len(error_matches),
+            "total_matches": total_matches,
             "analyzed": len(errors),
+            "subcalls": subcalls,
+            "candidates": candidates,
             "by_severity": severity_counts,
         },
     }
 
 
+_LEVEL_COLUMNS = ("level", "severity", "log_level", "loglevel", "levelname", "priority")
+
+
+def _find_errors_in_table(context: str, level_column: str, start: int = 0) -> dict:
+    """
+    find_errors_in_log for tabular logs: select error records by their
+    level column and classify them in whole-record batches.
+    """
+    with trace_phase("phase1_narrowing"):
+        # Skip records before start first, so the cap applies to new records
+        hits = context_rows(
+            context,
+            where={level_column: re.compile(r"error|exception|fatal|critical|crit|emerg|alert", re.I)},
+            start_row=bisect_left(get_table_index(context).starts, start),
+            max_rows=MAX_ERROR_HITS,
+        )
+
+        classify_prompt = (
+            "Classify each error record. Return JSON: "
+            "{\"errors\": [{\"record\": <1-based position of the record in this chunk>, "
+            "\"severity\": \"critical|warning|info\", "
+            "\"category\": \"network|database|auth|validation|other\", "
+            "\"message\": \"brief description\"}]}"
+        )
+        batches = list(context_row_chunks(context, classify_prompt, rows=[row.row for row in hits]))
+
+        # Batches of the most severe, most recent records come first
+        by_row = {row.row: row for row in hits}
+        scores = [
+            sum(
+                severity_weight(str(by_row[i].values.get(level_column)))
+                * (1 + by_row[i].start / max(1, len(context)))
+                for i in ids
+            )
+            for ids, chunk in batches
+        ]
+        plan = plan_budget([
+            make_candidate((ids, chunk), classify_prompt, chunk, priority=score, helper="json")
+            for (ids, chunk), score in zip(batches, scores)
+        ])
+
+    def report() -> dict:
+        completed = plan.completed(by_priority=True)
+        errors = []
+        for (ids, chunk), result in completed:
+            classified = {
+                item.get("record"): item
+                for item in result.get("errors", [])
+                if isinstance(item, dict)
+            }
+            for position, i in enumerate(ids):
+                item = classified.get(position + 1, {})
+                row = by_row[i]
+                errors.append({
+                    "position": row.start,
+                    "row": i,
+                    "matched_text": str(row.values.get(level_column)),
+                    "severity": item.get("severity", "info"),
+                    "category": item.get("category", "other"),
+                    "message": item.get("message", "Unknown error"),
+                })
+        return _error_report(errors, len(hits), len(completed), len(batches))
+
+    with trace_phase("phase2_semantic"):
+        try:
+            plan.dispatch(lambda batch: semantic_subcall_json(classify_prompt, batch[1], default={"errors": []}))
+        except BudgetExceededError as e:
+            e.partial_result = report()
+            raise
+
+    return report()
+
+
+def rebase_error_report(report: dict, offset: int, lines: int) -> dict:
+    """
+    Make find_errors_in_log positions absolute for a context that starts
+    `offset` characters and `lines` lines into a stream (see run_stream).
+    """
+    errors = []
+    for error in report["errors"]:
+        error = {**error, "position": error["position"] + offset}
+        if "line" in error:
+            error["line"] += lines
+        errors.append(error)
+    return {**report, "errors": errors}
+
+
+def merge_error_reports(previous: dict, new: dict) -> dict:
+    """
+    Merge find_errors_in_log results from successive incremental runs.
+
+    Positions and line numbers are absolute, so errors are concatenated
+    and the summary counts added.
+    """
+    summary = {
+        key: previous["summary"].get(key, 0) + new["summary"].get(key, 0)
+        for key in ("total_matches", "analyzed", "subcalls", "candidates")
+    }
+    by_severity = dict(previous["summary"]["by_severity"])
+    for sev, count in new["summary"]["by_severity"].items():
+        by_severity[sev] = by_severity.get(sev, 0) + count
+    summary["by_severity"] = by_severity
+
+    return {
+        "errors": previous["errors"] + new["errors"],
+        "summary": summary,
+    }
+
+
 def extract_entities(context: str) -> dict:
     """
     Example task: Extract named entities from document.
 
-    Demonstrates chunked processing with overlap.
+    Demonstrates chunked processing packed to the per-subcall token
+    budget, so each subcall sees as many whole sentences as it allows;
+    chunks are extracted concurrently.
 
     Args:
         context: Document text
@@ -211,7 +435,7 @@ def extract_entities(context: str) -> dict:
     Returns:
         Extracted entities by type
     """
-    from rlm.context_access import context_chunks
+    from rlm.context_access import context_packed_chunks
 
     all_entities = {
         "people": [],
@@ -220,34 +444,49 @@ def extract_entities(context: str) -> dict:
         "dates": [],
     }
 
-    # Process in chunks (bounded iteration)
-    chunks_processed = 0
-    max_chunks = 5  # Hard limit
-
-    for start, end, chunk in context_chunks(context, chunk_size=2000, overlap=100):
-        if chunks_processed >= max_chunks:
-            break
+    prompt = (
+        "Extract named entities from this text. Return JSON: "
+        "{\"people\": [...], \"organizations\": [...], "
+        "\"locations\": [...], \"dates\": [...]}"
+    )
 
-        entities = semantic_subcall_json(
-            "Extract named entities from this text. Return JSON: "
-            "{\"people\": [...], \"organizations\": [...], "
-            "\"locations\": [...], \"dates\": [...]}",
+    def extract(packed):
+        start, end, chunk = packed
+        return semantic_subcall_json(
+            prompt,
             chunk,
             default={"people": [], "organizations": [], "locations": [], "dates": []},
         )
 
-        # Aggregate (Python handles deduplication)
-        for entity_type in all_entities:
-            for entity in entities.get(entity_type, []):
-                if entity not in all_entities[entity_type]:
-                    all_entities[entity_type].append(entity)
+    # Process in chunks (bounded iteration): as many chunks as the budget
+    # allows, each worth its share of the text, packing the next batch
+    # while earlier ones are being extracted if the budget covers them all
+    chunks = islice(context_packed_chunks(context, prompt=prompt, unit="sentence"), MAX_ENTITY_CHUNKS)
+    plan = plan_stream(
+        (
+            [make_candidate(packed, prompt, packed[2], priority=len(packed[2]), helper="json") for packed in batch]
+            for batch in batched(chunks, WINDOW_BATCH)
+        ),
+        limit=MAX_ENTITY_CHUNKS,
+    )
+
+    with trace_phase("phase2_semantic"):
+        results = plan.dispatch(extract)
+
+        # Aggregate in chunk order (Python handles deduplication)
+        for _, entities in sorted(zip(plan.items, results), key=lambda pair: pair[0][0]):
+            for entity_type in all_entities:
+                for entity in entities.get(entity_type, []):
+                    if entity not in all_entities[entity_type]:
+                        all_entities[entity_type].append(entity)
 
-        chunks_processed += 1
+        chunks_processed = len(results)
 
     return {
         "entities": all_entities,
         "metadata": {
             "chunks_processed": chunks_processed,
+            "chunks_found": plan.candidates,
             "document_length": len(context),
         },
     }
@@ -0,0 +1,46 @@
+"""Random access into gzip contexts must read exactly what gzip.decompress returns."""
+
+import gzip
+import re
+
+import pytest
+
+from rlm.compressed import CompressedContext
+
+
+def _log(lines: int) -> bytes:
+    # Repetitive lines compress far past 16:1, so one read inflates past a piece
+    return "".join(
+        "2024-01-01 INFO request ok\n" * 20 + (f"ERROR failed {i}\n" if i % 97 == 0 else "")
+        for i in range(lines)
+    ).encode()
+
+
+@pytest.fixture(params=["single", "members"])
+def gzipped(request, tmp_path):
+    raw = _log(20000)
+    path = tmp_path / "app.log.gz"
+    if request.param == "single":
+        path.write_bytes(gzip.compress(raw))
+    else:
+        half = len(raw) // 2
+        path.write_bytes(gzip.compress(raw[:half]) + gzip.compress(raw[half:]))
+    return raw, CompressedContext(str(path), "gzip", span=256 * 1024)
+
+
+def test_slices_match_decompress(gzipped):
+    raw, ctx = gzipped
+    assert len(ctx) == len(raw)
+    assert len(ctx.checkpoints) > 10
+    for start in range(0, len(raw), len(raw) // 37):
+        assert ctx[start:start + 5000] == raw[start:start + 5000].decode()
+    assert ctx[len(raw) - 100:len(raw)] == raw[-100:].decode()
+
+
+@pytest.mark.parametrize("start", [0, 3_000_000, 7_654_321])
+def test_search_matches_decompress(gzipped, start):
+    raw, ctx = gzipped
+    len(ctx)  # Index the whole file first so the search resumes from a checkpoint
+    expected = [(m.start(), m.end()) for m in re.finditer(rb"ERROR failed \d+", raw[start:])]
+    found = [(s - start, e - start) for s, e, _, _ in ctx.finditer(re.compile(r"ERROR failed \d+"), start)]
+    assert found == expected
@@ -0,0 +1,24 @@
+"""A dry run must stay inside the run_task call that asked for it."""
+
+from rlm.dryrun import get_dry_run
+from rlm.runtime import run_task, run_task_with_accumulator
+from rlm.subcalls import semantic_subcall
+
+
+def _summarize(context, accumulator=None):
+    return semantic_subcall("Summarize.", context)
+
+
+def test_dry_run_is_unbound_after_run_task():
+    out = run_task(_summarize, "hello", dry_run=True)
+    assert out["dry_run"]["calls"] == 1
+    assert out["budget_summary"]["total_calls"] == 0
+    assert get_dry_run() is None
+
+
+def test_later_runs_make_real_calls(monkeypatch):
+    monkeypatch.setattr("rlm.subcalls._make_llm_call", lambda prompt, chunk: ("summary", 10, 2))
+    run_task(_summarize, "hello", dry_run=True)
+    out = run_task_with_accumulator(_summarize, "hello")
+    assert out["result"] == "summary"
+    assert out["budget_summary"]["total_calls"] == 1
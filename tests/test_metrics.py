@@ -0,0 +1,23 @@
+"""Counter shards of exited threads must not pile up between scrapes."""
+
+import threading
+
+from rlm.metrics import MIN_SHARDS, Counter
+
+
+def test_exited_thread_shards_are_folded_without_collect():
+    counter = Counter("test_total", "Test counter", ["kind"])
+
+    def work():
+        for _ in range(10):
+            counter.inc(kind="a")
+
+    for _ in range(40):
+        threads = [threading.Thread(target=work) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(counter._shards) <= MIN_SHARDS
+    assert counter.value(kind="a") == 4000
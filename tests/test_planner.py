@@ -0,0 +1,52 @@
+"""Streamed plans must spend the budget as a plan over all candidates would."""
+
+from dataclasses import replace
+
+from rlm.planner import Candidate, batched, plan_budget, plan_stream
+
+
+def _candidates(n: int) -> list[Candidate]:
+    # Later candidates are worth more, so arrival order is the wrong order
+    return [Candidate(item=i, input_tokens=1000 + 37 * (i % 5), output_tokens=100, priority=1 + i) for i in range(n)]
+
+
+def test_bounded_stream_matches_plan_budget():
+    candidates = _candidates(60)
+    expected = plan_budget(candidates, budget=0.002, headroom=1.0)
+    plan = plan_stream(batched(candidates, 8), budget=0.002, headroom=1.0, limit=60)
+    plan.dispatch(lambda item: item, workers=2)
+    assert sorted(plan.items) == expected.items
+    assert plan.candidates == 60
+    assert plan.selected[0].item == 59  # Highest priority admitted first
+
+
+def test_ample_budget_admits_before_the_source_ends():
+    consumed = []
+
+    def batches():
+        for batch in batched(_candidates(40), 8):
+            consumed.append(len(batch))
+            yield batch
+
+    plan = plan_stream(batches(), budget=10.0, limit=40)
+    admitted = plan._admit()
+    next(admitted)
+    assert len(consumed) == 1  # First batch dispatched while the rest is unread
+    list(admitted)
+    assert len(plan.selected) == 40
+
+
+def test_rescore_reorders_held_back_candidates():
+    candidates = _candidates(30)
+    reversed_priority = lambda pool: [replace(c, priority=100 - c.item) for c in pool]
+    plan = plan_stream(batched(candidates, 8), budget=0.001, headroom=1.0, limit=30, rescore=reversed_priority)
+    plan.dispatch(lambda item: item)
+    assert plan.selected
+    assert plan.selected[0].item == 0
+
+
+def test_unbounded_stream_keeps_budget_for_later_batches():
+    plan = plan_stream(batched(_candidates(60), 8), budget=0.004, headroom=1.0)
+    plan.dispatch(lambda item: item)
+    assert plan.estimated_cost <= 0.004
+    assert max(plan.items) > 8  # The first batch did not take everything
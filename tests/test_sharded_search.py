@@ -0,0 +1,96 @@
+"""Sharded search must return exactly what a single finditer pass returns."""
+
+import re
+import threading
+
+import pytest
+
+from rlm import sharded_search
+from rlm.sharded_search import _sequential, can_fork, sharded_finditer
+
+pytestmark = pytest.mark.skipif(not can_fork(), reason="sharded search needs fork")
+
+
+@pytest.fixture(autouse=True)
+def small_shards(monkeypatch):
+    # Force many shards on small test contexts
+    monkeypatch.setattr(sharded_search, "MIN_SHARD_CHARS", 64)
+
+
+def _log(lines: int) -> str:
+    return "".join(
+        f"{i:05d} {'ERROR' if i % 7 == 0 else 'INFO'} " + "x" * (i % 23) + "\n"
+        for i in range(lines)
+    )
+
+
+@pytest.mark.parametrize("pattern", [
+    r"ERROR",
+    r"\d+",
+    r"ERROR[^\n]*\n[^\n]*",    # Matches run past line (and shard) ends
+    r"x+\n\d+",                # Every match straddles a newline
+    r"(?s)ERROR.{0,300}?INFO",  # Long, lazy, multi-line matches
+    r"(?m)ERROR x*$",           # End anchors and lookaheads see where the text ends
+    r"\d+(?= INFO)",
+])
+def test_sharded_matches_sequential(pattern):
+    context = _log(400)
+    compiled = re.compile(pattern)
+    for start, end in ((0, len(context)), (13, len(context) - 29)):
+        expected = _sequential(compiled, context, start, end, 10_000)
+        assert sharded_finditer(context, compiled, start, end, 10_000, workers=4) == expected
+
+
+@pytest.mark.parametrize("pattern", [r"(?s).{1,40}\Z", r"(?s)ERROR(?!.{0,40}ERROR)", r"(?s)x(?=.{30}$)"])
+def test_end_sensitive_patterns_ignore_guard_band_end(pattern):
+    # With a narrow band, a shard's scan would end 16 chars past its cut
+    context = _log(400)
+    compiled = re.compile(pattern)
+    expected = _sequential(compiled, context, 0, len(context), 10_000)
+    assert sharded_finditer(context, compiled, 0, len(context), 10_000, workers=4, guard_chars=16) == expected
+
+
+def test_realign_after_match_crossing_shard_end():
+    # One match spans almost the whole context, so every later shard's
+    # own results start inside it and must be re-aligned
+    context = "A" + ("b" * 50 + "\n") * 40 + "A\n" + "A\nA\n" * 200
+    compiled = re.compile(r"A[^A]*A|A")
+    realigned = []
+    original = sharded_search._realign
+
+    def spy(*args):
+        realigned.append(args[2])
+        return original(*args)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(sharded_search, "_realign", spy)
+        found = sharded_finditer(context, compiled, 0, len(context), 10_000, workers=4, guard_chars=4096)
+
+    assert realigned, "no shard needed re-alignment"
+    assert found == _sequential(compiled, context, 0, len(context), 10_000)
+
+
+def test_max_hits_truncates_in_order():
+    context = _log(400)
+    compiled = re.compile(r"ERROR")
+    assert sharded_finditer(context, compiled, 0, len(context), 5, workers=4) == _sequential(
+        compiled, context, 0, len(context), 5
+    )
+
+
+def test_concurrent_searches_keep_their_own_context():
+    contexts = [_log(400), _log(400).replace("ERROR", "WARN!")]
+    compiled = re.compile(r"ERROR|WARN!")
+    results: dict[int, list] = {}
+
+    def search(i: int) -> None:
+        results[i] = sharded_finditer(contexts[i], compiled, 0, len(contexts[i]), 10_000, workers=4)
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in (0, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i, context in enumerate(contexts):
+        assert results[i] == _sequential(compiled, context, 0, len(context), 10_000)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+RLM Batch Worker
+
+Enqueue jobs into a durable SQLite job queue and process them with a
+bounded pool of workers. Finished jobs survive restarts and are never
+reprocessed; jobs held by a crashed worker are retried after their lease
+expires.
+
+Usage:
+    python worker.py <queue_db> enqueue <context_file>... [--task <task_name>]
+    python worker.py <queue_db> work [--workers <n>] [--until-empty]
+    python worker.py <queue_db> status
+
+Examples:
+    python worker.py jobs.db enqueue logs/*.log --task find_errors_in_log --cost 0.10
+    python worker.py jobs.db work --workers 8 --until-empty
+    python worker.py jobs.db status
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Load environment variables from .env if present
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv is optional
+
+
+TASK_NAMES = ["analyze_document", "find_errors_in_log", "extract_entities"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Durable batch processing of RLM tasks",
+    )
+    parser.add_argument("queue_db", help="Path to the SQLite job queue database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add context files as jobs")
+    enqueue.add_argument("context_files", nargs="+", help="Context files to process")
+    enqueue.add_argument("--task", choices=TASK_NAMES, default="analyze_document",
+                         help="Task to execute (default: analyze_document)")
+    enqueue.add_argument("--cost", type=float, default=None, help="Maximum cost budget per job in USD")
+    enqueue.add_argument("--timeout", type=float, default=None, help="Maximum runtime per job in seconds")
+    enqueue.add_argument("--attempts", type=int, default=3, help="Attempts before dead-lettering (default: 3)")
+
+    work = commands.add_parser("work", help="Run a worker pool")
+    work.add_argument("--workers", type=int, default=4, help="Concurrent workers (default: 4)")
+    work.add_argument("--lease", type=float, default=60.0, help="Lease duration in seconds (default: 60)")
+    work.add_argument("--until-empty", action="store_true", help="Exit once no jobs are outstanding")
+    work.add_argument("--metrics-file", default=None, help="Dump Prometheus metrics to this file every 15s")
+
+    commands.add_parser("status", help="Show job counts and dead letters")
+
+    args = parser.parse_args()
+
+    if args.command == "work" and not os.environ.get("OPENAI_API_KEY"):
+        print("ERROR: OPENAI_API_KEY environment variable not set.", file=sys.stderr)
+        print("Set it in .env file or export it in your shell.", file=sys.stderr)
+        sys.exit(1)
+
+    from rlm.jobqueue import JobQueue, WorkerPool
+
+    queue = JobQueue(args.queue_db)
+
+    if args.command == "enqueue":
+        config = {}
+        if args.cost is not None:
+            config["max_cost"] = args.cost
+        if args.timeout is not None:
+            config["max_runtime_seconds"] = args.timeout
+        for path in args.context_files:
+            job_id = queue.enqueue(
+                args.task,
+                context_file=os.path.abspath(path),
+                config=config,
+                max_attempts=args.attempts,
+            )
+            print(f"{job_id}\t{path}")
+
+    elif args.command == "work":
+        from tasks.example_task import (
+            analyze_document,
+            find_errors_in_log,
+            extract_entities,
+        )
+
+        pool = WorkerPool(
+            queue,
+            {
+                "analyze_document": analyze_document,
+                "find_errors_in_log": find_errors_in_log,
+                "extract_entities": extract_entities,
+            },
+            workers=args.workers,
+            lease_seconds=args.lease,
+        )
+        if args.metrics_file:
+            from rlm.metrics import MetricsDumper
+            dumper = MetricsDumper(args.metrics_file)
+            dumper.start()
+        if args.until_empty:
+            counts = pool.run_until_empty()
+            print(json.dumps(counts))
+        else:
+            pool.start()
+            try:
+                while True:
+                    time.sleep(1.0)
+            except KeyboardInterrupt:
+                print("\nFinishing in-flight jobs...", file=sys.stderr)
+                pool.stop()
+        if args.metrics_file:
+            dumper.stop()
+
+    else:
+        print(json.dumps({
+            "counts": queue.counts(),
+            "dead_letters": [
+                {"id": job["id"], "task": job["task"], "error": job["error"]}
+                for job in queue.dead_letters()
+            ],
+        }, indent=2))
+
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()